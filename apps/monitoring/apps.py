@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.monitoring"
+
+    def ready(self):
+        """
+        Import signals to register the slow query log on new database
+        connections.
+        """
+        # Supress unused import warnings
+        # pylint: disable=unused-import,import-outside-toplevel
+        import apps.monitoring.signals  # noqa: F401
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.monitoring.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints a token that enables profiling of requests sending it in "
+        "the X-Profile-Token header."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token())
+        self.stderr.write(
+            "Valid for "
+            + f"{settings.PROFILING['TOKEN_MAX_AGE']} seconds, e.g.\n"
+            + "  curl -H 'X-Profile-Token: <token>' "
+            + "-H 'X-Profile-Mode: download' -o profile.zip <url>"
+        )
@@ -0,0 +1,119 @@
+import json
+import os
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = {
+    "total": lambda stats: stats["total_ms"],
+    "max": lambda stats: stats["max_ms"],
+    "mean": lambda stats: stats["total_ms"] / stats["count"],
+    "count": lambda stats: stats["count"],
+}
+
+
+def log_files(path):
+    """The log file and its rotated backups (path.1, path.2, ...)."""
+    paths = [path] if os.path.exists(path) else []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        paths.append(f"{path}.{index}")
+        index += 1
+    return paths
+
+
+def read_entries(paths):
+    """Yields the slow query entries of JSON log files."""
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if "fingerprint" in entry and "duration_ms" in entry:
+                    yield entry
+
+
+def summarize(entries):
+    """
+    Groups the entries by fingerprint.
+
+    Returns:
+        dict: Per fingerprint, the number of slow runs, their total and
+        maximum duration, the normalized SQL, where they ran from and
+        the most recent query plan.
+    """
+    summary = {}
+    for entry in entries:
+        stats = summary.setdefault(
+            entry["fingerprint"],
+            {
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "sql": entry.get("sql", ""),
+                "origins": Counter(),
+                "plan": None,
+                "time": "",
+            },
+        )
+        stats["count"] += 1
+        stats["total_ms"] += entry["duration_ms"]
+        stats["max_ms"] = max(stats["max_ms"], entry["duration_ms"])
+        origin = entry.get("origin")
+        if origin:
+            stats["origins"][
+                f"{origin['file']}:{origin['line']} {origin['function']}"
+            ] += 1
+        if entry.get("plan") and entry.get("time", "") >= stats["time"]:
+            stats["plan"] = entry["plan"]
+            stats["time"] = entry.get("time", "")
+    return summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarizes the slow query log: the worst query fingerprints, "
+        "where they run from and their query plans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            default=settings.SLOW_QUERIES["LOG_FILE"],
+            help="Slow query log, rotated backups are read too.",
+        )
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--sort", choices=list(SORT_KEYS), default="total")
+
+    def handle(self, *args, **options):
+        paths = log_files(options["file"])
+        if not paths:
+            raise CommandError(f"No slow query log at {options['file']}.")
+
+        summary = summarize(read_entries(paths))
+        if not summary:
+            self.stdout.write("No slow queries logged.")
+            return
+
+        worst = sorted(
+            summary.items(),
+            key=lambda item: SORT_KEYS[options["sort"]](item[1]),
+            reverse=True,
+        )[: options["limit"]]
+        for rank, (fingerprint, stats) in enumerate(worst, start=1):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"#{rank} {fingerprint}: {stats['count']} slow runs, "
+                    + f"total {stats['total_ms']:.1f} ms, "
+                    + f"mean {stats['total_ms'] / stats['count']:.1f} ms, "
+                    + f"max {stats['max_ms']:.1f} ms"
+                )
+            )
+            self.stdout.write(f"  SQL: {stats['sql'][:500]}")
+            for origin, count in stats["origins"].most_common(3):
+                self.stdout.write(f"  From: {origin} ({count}x)")
+            for line in stats["plan"] or []:
+                self.stdout.write(f"  Plan: {line}")
+            self.stdout.write("")
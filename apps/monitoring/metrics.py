@@ -0,0 +1,96 @@
+"""
+Prometheus metrics.
+
+Under gunicorn every worker writes its samples to memory-mapped files in
+PROMETHEUS_MULTIPROC_DIR (set up by gunicorn.conf.py) and the metrics
+endpoint aggregates them. Without that variable (development, tests)
+the metrics live in the process' default registry.
+"""
+
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by URL name.",
+    ["url_name", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSES = Counter(
+    "http_responses",
+    "Responses by URL name and status code.",
+    ["url_name", "method", "status"],
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request",
+    "Number of database queries per request.",
+    ["url_name"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME = Histogram(
+    "db_query_duration_seconds_per_request",
+    "Time spent in database queries per request.",
+    ["url_name"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "Cache lookups by result, the hit ratio is hit / (hit + miss).",
+    ["cache", "result"],
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests being handled, per worker.",
+    multiprocess_mode="liveall",
+)
+
+
+def record_cache_lookup(cache, hit):
+    """
+    Counts a cache lookup for the hit ratio metrics.
+
+    Args:
+        cache (str): Name of the cache, e.g. "filter_results".
+        hit (bool): True if the lookup was a hit.
+    """
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render_metrics():
+    """
+    Returns the metrics of all workers in the Prometheus text format.
+
+    Returns:
+        tuple: The body (bytes) and its content type.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,290 @@
+import cProfile
+import logging
+import random
+from time import perf_counter
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from static.utils.timing import (
+    RequestTimer,
+    activate_timer,
+    deactivate_timer,
+    current_timer,
+)
+from .metrics import (
+    REQUEST_LATENCY,
+    RESPONSES,
+    DB_QUERIES,
+    DB_TIME,
+    IN_FLIGHT,
+)
+from .profiling import (
+    artifact_name,
+    build_artifact,
+    save_artifact,
+    take_rate_limit_slot,
+    valid_token,
+    zip_artifact,
+)
+from .queries import QueryRecorder, QueryTimer, execute_wrappers
+
+
+timing_logger = logging.getLogger("app.timing")
+profiling_logger = logging.getLogger("app.profiling")
+
+
+def view_name(request):
+    """
+    Returns the URL name and view (class) name of the resolved request,
+    e.g. ("post-list", "PostAPIView").
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None, None
+    view = getattr(match.func, "view_class", match.func)
+    return match.url_name, getattr(view, "__name__", None)
+
+
+def metric_label(request):
+    """
+    Returns a bounded label for the request's route: the URL name,
+    the view's path for unnamed URLs, or "unmatched".
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name
+
+
+class RequestTimingMiddleware:
+    """
+    Times a sample of requests: the total time, the time spent in (and
+    number of) database queries, response rendering and any spans the
+    views add with `static.utils.timing.timed()`.
+
+    The result is sent in a `Server-Timing` header and logged as a
+    structured record by the `app.timing` logger. Requests that aren't
+    sampled pass straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_TIMING["SAMPLE_RATE"]
+        self.server_timing_header = settings.REQUEST_TIMING[
+            "SERVER_TIMING_HEADER"
+        ]
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        queries = QueryTimer()
+        token = activate_timer(timer)
+        start = perf_counter()
+        try:
+            with execute_wrappers(queries):
+                response = self.get_response(request)
+        finally:
+            deactivate_timer(token)
+        total = perf_counter() - start
+
+        if self.server_timing_header:
+            response["Server-Timing"] = self.server_timing(
+                total, queries, timer
+            )
+        self.log(request, response, total, queries, timer)
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        DRF responses are rendered after the view returns, time the
+        rendering with a post-render callback.
+        """
+        # pylint: disable=unused-argument
+        timer = current_timer()
+        if timer is not None:
+            start = perf_counter()
+
+            def rendered(_response):
+                timer.add("render", perf_counter() - start)
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def server_timing(total, queries, timer):
+        metrics = [
+            f"total;dur={total * 1000:.2f}",
+            f'db;dur={queries.duration * 1000:.2f};desc="{queries.count} '
+            + 'queries"',
+        ]
+        for name, seconds in timer.spans.items():
+            metrics.append(f"{name};dur={seconds * 1000:.2f}")
+        return ", ".join(metrics)
+
+    @staticmethod
+    def log(request, response, total, queries, timer):
+        if not timing_logger.isEnabledFor(logging.INFO):
+            return
+        url_name, view = view_name(request)
+        timing_logger.info(
+            "%s %s %s in %.2f ms (%s queries)",
+            request.method,
+            url_name or request.path,
+            response.status_code,
+            total * 1000,
+            queries.count,
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "url_name": url_name,
+                "view": view,
+                "status": response.status_code,
+                "duration_ms": round(total * 1000, 2),
+                "db_ms": round(queries.duration * 1000, 2),
+                "db_queries": queries.count,
+                "spans_ms": {
+                    name: round(seconds * 1000, 2)
+                    for name, seconds in timer.spans.items()
+                },
+            },
+        )
+
+
+class MetricsMiddleware:
+    """
+    Records Prometheus metrics for every request: latency, status code,
+    database query count and time, and the number of requests in
+    flight.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        start = perf_counter()
+        with IN_FLIGHT.track_inprogress():
+            with execute_wrappers(queries):
+                response = self.get_response(request)
+        duration = perf_counter() - start
+
+        label = metric_label(request)
+        REQUEST_LATENCY.labels(label, request.method).observe(duration)
+        RESPONSES.labels(label, request.method, response.status_code).inc()
+        DB_QUERIES.labels(label).observe(queries.count)
+        DB_TIME.labels(label).observe(queries.duration)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request on demand with cProfile and records its
+    SQL timeline.
+
+    Profiling is requested with `?profile=save` or `?profile=download`
+    (or the `X-Profile-Mode` header) by staff users, or by anyone
+    sending a token minted with `manage.py profile_token` in the
+    `X-Profile-Token` header. Saved profiles are written to
+    PROFILING["DIRECTORY"] and named in the `X-Profile` response
+    header, downloads replace the response with a zip of the profile.
+
+    Other requests pass straight through, and at most
+    PROFILING["RATE_LIMIT"] requests are profiled per minute.
+    """
+
+    MODES = ("save", "download")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.PROFILING["ENABLED"]
+
+    def __call__(self, request):
+        mode = self.requested_mode(request) if self.enabled else None
+        if mode is None:
+            return self.get_response(request)
+        if not take_rate_limit_slot():
+            response = self.get_response(request)
+            response["X-Profile"] = "rate-limited"
+            return response
+
+        profiler = cProfile.Profile()
+        queries = QueryRecorder()
+        start = perf_counter()
+        with execute_wrappers(queries):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        total = perf_counter() - start
+
+        url_name, view = view_name(request)
+        files = build_artifact(
+            profiler,
+            queries,
+            {
+                "method": request.method,
+                "path": request.get_full_path(),
+                "url_name": url_name,
+                "view": view,
+                "status": response.status_code,
+                "duration_ms": round(total * 1000, 3),
+            },
+        )
+        name = artifact_name(metric_label(request))
+        profiling_logger.info(
+            "Profiled %s %s (%s)",
+            request.method,
+            request.path,
+            name,
+            extra={"profile": name, "mode": mode},
+        )
+
+        if mode == "download":
+            download = HttpResponse(
+                zip_artifact(files), content_type="application/zip"
+            )
+            download["Content-Disposition"] = (
+                f'attachment; filename="{name}.zip"'
+            )
+            download["X-Profile"] = name
+            return download
+
+        save_artifact(files, name)
+        response["X-Profile"] = name
+        return response
+
+    def requested_mode(self, request):
+        """
+        Returns the profiling mode if the request asks for, and is
+        allowed to be profiled, None otherwise.
+        """
+        token = request.headers.get("X-Profile-Token")
+        mode = request.headers.get("X-Profile-Mode") or request.GET.get(
+            "profile"
+        )
+        if not token and not mode:
+            return None
+        if mode not in self.MODES:
+            mode = "save"
+        if token and valid_token(token):
+            return mode
+        return mode if self.is_staff(request) else None
+
+    @staticmethod
+    def is_staff(request):
+        """
+        Checks the session user, then the JWT the API authenticates
+        with (which DRF only reads later, in the view).
+        """
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            return True
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return authenticated is not None and authenticated[0].is_staff
@@ -0,0 +1,126 @@
+import io
+import json
+import marshal
+import os
+import pstats
+import re
+import zipfile
+from datetime import datetime, timezone
+from time import time
+from uuid import uuid4
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+# Separates profiling tokens from other values signed with SECRET_KEY
+TOKEN_SALT = "apps.monitoring.profiling"
+# Lines of the cProfile summary written to profile.txt
+STATS_LINES = 60
+
+
+def make_token():
+    """
+    Returns a signed token that enables profiling through the
+    `X-Profile-Token` header until it's older than
+    PROFILING["TOKEN_MAX_AGE"] seconds.
+    """
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def valid_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING["TOKEN_MAX_AGE"]
+        )
+    except signing.BadSignature:
+        # Expired tokens raise SignatureExpired, a BadSignature
+        return False
+    return True
+
+
+def take_rate_limit_slot():
+    """
+    Counts a profiled request against PROFILING["RATE_LIMIT"], the
+    number of profiled requests allowed per minute (per cache, so per
+    process with the default local memory cache).
+
+    Returns:
+        bool: False when the limit has been reached.
+    """
+    key = f"profiling:{int(time() // 60)}"
+    cache.add(key, 0, timeout=60)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # The key expired between add() and incr()
+        count = 1
+    return count <= settings.PROFILING["RATE_LIMIT"]
+
+
+def build_artifact(profiler, queries, metadata):
+    """
+    Collects the results of a profiled request.
+
+    Args:
+        profiler (cProfile.Profile): The disabled profiler.
+        queries (QueryRecorder): The request's SQL timeline.
+        metadata (dict): Details of the request and response.
+
+    Returns:
+        dict: File names mapped to their content (bytes): the raw
+        profile (profile.prof, readable with pstats or snakeviz), a
+        summary sorted by cumulative time, the SQL timeline and the
+        metadata.
+    """
+    profiler.create_stats()
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats(
+        "cumulative"
+    ).print_stats(STATS_LINES)
+
+    return {
+        "profile.prof": marshal.dumps(profiler.stats),
+        "profile.txt": summary.getvalue().encode("utf-8"),
+        "sql.json": json.dumps(queries.timeline, indent=2).encode("utf-8"),
+        "request.json": json.dumps(
+            {
+                **metadata,
+                "db_queries": queries.count,
+                "db_ms": round(queries.duration * 1000, 3),
+            },
+            indent=2,
+        ).encode("utf-8"),
+    }
+
+
+def artifact_name(label):
+    """
+    Returns a unique, sortable name for a profile of the route `label`.
+    """
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    label = re.sub(r"[^\w-]+", "_", label)
+    return f"{timestamp}-{label}-{uuid4().hex[:8]}"
+
+
+def save_artifact(files, name):
+    """
+    Writes the files to a directory called `name` in
+    PROFILING["DIRECTORY"].
+
+    Returns:
+        str: The path of the directory.
+    """
+    directory = os.path.join(settings.PROFILING["DIRECTORY"], name)
+    os.makedirs(directory, exist_ok=True)
+    for filename, content in files.items():
+        with open(os.path.join(directory, filename), "wb") as file:
+            file.write(content)
+    return directory
+
+
+def zip_artifact(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for filename, content in files.items():
+            archive.writestr(filename, content)
+    return buffer.getvalue()
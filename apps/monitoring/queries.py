@@ -0,0 +1,151 @@
+import logging
+import os
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+from django.conf import settings
+from django.db import DatabaseError, connections
+from static.utils.inspect_stack import get_app_caller
+from static.utils.sql import fingerprint_sql, normalize_sql
+
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+
+class QueryTimer:
+    """
+    Database execute wrapper that counts the queries run through it
+    and the time spent in them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += perf_counter() - start
+
+
+class QueryRecorder(QueryTimer):
+    """
+    QueryTimer that also keeps a timeline of the queries: when each one
+    started (relative to the recorder's creation), how long it took and
+    its SQL. Parameters aren't kept, they may contain personal data.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.started = perf_counter()
+        self.timeline = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            self.timeline.append(
+                {
+                    "start_ms": round((start - self.started) * 1000, 3),
+                    "duration_ms": round(duration * 1000, 3),
+                    "fingerprint": fingerprint_sql(sql),
+                    "many": many,
+                    "sql": sql,
+                }
+            )
+
+
+class SlowQueryLogger:
+    """
+    Database execute wrapper that logs queries slower than
+    SLOW_QUERIES["THRESHOLD_MS"] to the `app.slow_queries` logger, with
+    their fingerprint, the project code that ran them and, for SELECT
+    statements, the database's query plan.
+    """
+
+    # Frames in this app are skipped when looking for the origin
+    EXCLUDE = (os.path.dirname(os.path.abspath(__file__)),)
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (perf_counter() - start) * 1000
+
+        threshold = settings.SLOW_QUERIES["THRESHOLD_MS"]
+        if 0 < threshold <= duration_ms:
+            self.log(sql, params, many, duration_ms)
+        return result
+
+    def log(self, sql, params, many, duration_ms):
+        origin = get_app_caller(settings.BASE_DIR, self.EXCLUDE)
+        plan = None
+        if (
+            settings.SLOW_QUERIES["EXPLAIN"]
+            and not many
+            and sql.lstrip()[:6].upper() == "SELECT"
+        ):
+            plan = self.explain(sql, params)
+
+        fingerprint = fingerprint_sql(sql)
+        slow_query_logger.warning(
+            "Slow query %s took %.1f ms (%s)",
+            fingerprint,
+            duration_ms,
+            ":".join(str(part) for part in origin[:2]) if origin else "-",
+            extra={
+                "fingerprint": fingerprint,
+                "duration_ms": round(duration_ms, 3),
+                "sql": normalize_sql(sql),
+                "database": self.connection.alias,
+                "origin": (
+                    {
+                        "file": origin[0],
+                        "line": origin[1],
+                        "function": origin[2],
+                    }
+                    if origin
+                    else None
+                ),
+                "plan": plan,
+            },
+        )
+
+    def explain(self, sql, params):
+        """
+        Returns the plan of the query as a list of lines. Runs on a
+        backend cursor, so the EXPLAIN isn't seen by execute wrappers
+        (including this one) or counted as a query.
+        """
+        prefix = self.connection.ops.explain_query_prefix()
+        cursor = self.connection.create_cursor()
+        try:
+            cursor.execute(f"{prefix} {sql}", params)
+            return [
+                " ".join(str(column) for column in row)
+                for row in cursor.fetchall()
+            ]
+        except DatabaseError as e:
+            return [f"EXPLAIN failed: {e}"]
+        finally:
+            cursor.close()
+
+
+@contextmanager
+def execute_wrappers(*wrappers):
+    """
+    Installs the given execute wrappers on every database connection
+    (of the current thread) for the duration of the block.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            for wrapper in wrappers:
+                stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
@@ -0,0 +1,18 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from .queries import SlowQueryLogger
+
+
+@receiver(connection_created)
+def install_slow_query_logger(sender, connection, **kwargs):
+    """
+    Adds the slow query log to every database connection as it opens.
+
+    Connections that reconnect already have it, and keep it.
+    """
+    # pylint: disable=unused-argument
+    if not any(
+        isinstance(wrapper, SlowQueryLogger)
+        for wrapper in connection.execute_wrappers
+    ):
+        connection.execute_wrappers.append(SlowQueryLogger(connection))
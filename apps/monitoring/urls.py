@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import metrics
+
+
+urlpatterns = [
+    # No trailing slash, it's where Prometheus looks by default
+    path("metrics", metrics, name="metrics"),
+]
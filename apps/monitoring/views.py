@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from .metrics import render_metrics
+
+
+def metrics(request):
+    """
+    Prometheus metrics endpoint. Requires a bearer token when
+    METRICS_TOKEN is set.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401)
+
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,110 @@
+"""
+Suggestions for the search box, as the user types.
+
+Every kind of suggestion is a prefix match on a lowercased column with
+an index on lower(column) (see the models' indexes). The prefix is
+matched as a range, lower(column) >= "wo" AND lower(column) < "wp",
+which the database answers by reading the first matches from the index
+in order, instead of scanning whole tables like the `icontains` filter.
+
+Ranges follow the database's collation. SQLite compares bytes, which is
+exact. With a language-aware collation on Postgres the few values that
+sort outside the range (e.g. with punctuation) aren't suggested, values
+inside it that don't start with the prefix are filtered out.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Lower
+from .models import Material, Post, Tag, Tool
+from .tags import normalize_tag
+
+User = get_user_model()
+
+# Suggestions per kind by default, and at most
+AUTOCOMPLETE_LIMIT = 5
+AUTOCOMPLETE_MAX_LIMIT = 20
+# Longer prefixes are cut
+AUTOCOMPLETE_MAX_LENGTH = 100
+
+
+def prefixed(queryset, expression, prefix):
+    """
+    Filters `queryset` to the rows whose `expression` starts with
+    `prefix`, as a range scan of the expression's index.
+
+    Returns:
+        QuerySet: The rows, annotated with the expression as `match`
+        and ordered by it.
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (
+        queryset.annotate(match=expression)
+        .filter(match__gte=prefix, match__lt=upper, match__startswith=prefix)
+        .order_by("match")
+    )
+
+
+def _names(model, prefix, limit):
+    """Distinct lowercase names of tools or materials."""
+    return list(
+        prefixed(model.objects.all(), Lower("name"), prefix)
+        .values_list("match", flat=True)
+        .distinct()[:limit]
+    )
+
+
+def _titles(prefix, limit, safe_only):
+    posts = Post.objects.all()
+    if safe_only:
+        posts = posts.filter(
+            harmful_material_categories__isnull=True,
+            harmful_tool_categories__isnull=True,
+            harmful_post=False,
+        )
+    return list(
+        prefixed(posts, Lower("title"), prefix).values("id", "title")[:limit]
+    )
+
+
+# Functions returning the suggestions of a kind
+SUGGESTERS = {
+    "users": lambda prefix, limit, safe_only: list(
+        prefixed(
+            User.objects.filter(is_active=True), Lower("username"), prefix
+        ).values("id", "username")[:limit]
+    ),
+    # Tags are stored lowercase
+    "tags": lambda prefix, limit, safe_only: list(
+        prefixed(
+            Tag.objects.all(), F("name"), normalize_tag(prefix) or prefix
+        ).values_list("name", flat=True)[:limit]
+    ),
+    "titles": _titles,
+    "tools": lambda prefix, limit, safe_only: _names(Tool, prefix, limit),
+    "materials": lambda prefix, limit, safe_only: _names(
+        Material, prefix, limit
+    ),
+}
+
+
+def suggest(prefix, kinds=None, limit=AUTOCOMPLETE_LIMIT, safe_only=True):
+    """
+    Returns suggestions for what the user has typed, a query per kind.
+
+    Args:
+        prefix (str): What the user has typed.
+        kinds (list, optional): Kinds of suggestions (keys of
+            SUGGESTERS), all by default.
+        limit (int): Suggestions per kind.
+        safe_only (bool): If True, only suggests titles of posts without
+            harmful content.
+
+    Returns:
+        dict: The suggestions per kind, alphabetically.
+    """
+    prefix = prefix.strip().lower()[:AUTOCOMPLETE_MAX_LENGTH]
+    return {
+        kind: SUGGESTERS[kind](prefix, limit, safe_only) if prefix else []
+        for kind in kinds or SUGGESTERS
+    }
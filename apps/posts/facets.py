@@ -0,0 +1,89 @@
+"""
+Facet counts of filter results: how many of the matching posts have
+each tag, author and harmful category.
+
+All requested facets are counted by one query, a UNION ALL of a
+grouped count per facet over the matching posts, and cached with the
+filter's results (see filter_cache.py).
+"""
+
+from django.db.models import Count, F, Value
+from .models import Post, PostTag
+
+# Values returned per facet, most common first
+FACET_LIMIT = 20
+
+
+def _categories(field, category_field):
+    """Counts of the harmful categories linked through `field`."""
+    through = getattr(Post, field).through
+    return lambda posts: through.objects.filter(post__in=posts).values(
+        value=F(f"{category_field}__category")
+    )
+
+
+# Functions returning the rows to count per facet value, given the
+# matching posts
+FACETS = {
+    "tags": lambda posts: PostTag.objects.filter(post__in=posts).values(
+        value=F("tag__name")
+    ),
+    "authors": lambda posts: Post.objects.filter(pk__in=posts).values(
+        value=F("user__username")
+    ),
+    "harmful_tool_categories": _categories(
+        "harmful_tool_categories", "harmfultoolcategory"
+    ),
+    "harmful_material_categories": _categories(
+        "harmful_material_categories", "harmfulmaterialcategory"
+    ),
+}
+
+
+def requested_facets(value):
+    """
+    Returns the facet names of a filter request's "facets", a list of
+    names (none if empty).
+
+    Raises:
+        TypeError: If `value` is something else.
+    """
+    if not value:
+        return []
+    if isinstance(value, list) and all(isinstance(f, str) for f in value):
+        return value
+    raise TypeError(f"facets is {value!r}")
+
+
+def facet_counts(posts, names):
+    """
+    Counts the facets `names` (keys of FACETS) of `posts` in one query.
+
+    Args:
+        posts (QuerySet): The matching posts.
+        names (list): The facets to count.
+
+    Returns:
+        dict: Per facet, the FACET_LIMIT most common values as dicts
+        with "value" and "count".
+    """
+    if not names:
+        return {}
+    posts = posts.order_by().values("pk")
+    queries = [
+        FACETS[name](posts)
+        .annotate(facet=Value(name), count=Count("pk"))
+        .values_list("facet", "value", "count")
+        for name in names
+    ]
+    rows = queries[0].union(*queries[1:], all=True)
+
+    counts = {name: [] for name in names}
+    for name, value, count in rows:
+        counts[name].append({"value": value, "count": count})
+    return {
+        name: sorted(values, key=lambda row: (-row["count"], row["value"]))[
+            :FACET_LIMIT
+        ]
+        for name, values in counts.items()
+    }
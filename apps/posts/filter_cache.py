@@ -0,0 +1,169 @@
+"""
+Cached results of the post filter.
+
+The result of a filter only depends on its `filters` and on what the
+viewer may see, so the ordered ids of the matching posts are cached
+under a signature of both: the filters normalized (defaults filled in,
+ignored and order-independent values dropped or sorted) and the viewer's
+visibility class. A page of posts is then loaded by id.
+
+Cached ids live for FILTER_CACHE["TIMEOUT"] seconds. Creating, updating
+or deleting a post starts a new generation of keys, so filters see the
+change right away; likes and comments, which only change the order of
+the "likes" and "comments" sorts, are picked up when the ids expire.
+The generation is a counter in the cache, so it only reaches every
+worker when the cache is shared by all of them (Redis); without
+REDIS_URL the cache is off unless FILTER_CACHE_TIMEOUT turns it on.
+"""
+
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from apps.monitoring.metrics import record_cache_lookup
+from .facets import facet_counts
+from .models import Post
+from .tags import filter_tags, normalize_tag
+from .utils import with_serializer_data
+
+# Visibility classes, see PostAPIView.visibility_class
+GUEST, MINOR, ADULT = "guest", "minor", "adult"
+# Cache key of the current generation
+GENERATION_KEY = "filter:generation"
+
+
+def filter_signature(filters, visibility):
+    """
+    Returns a digest identifying the result of `filters` for a viewer
+    of the `visibility` class, equal for filters with the same result.
+    """
+    user_id = str(filters.get("user_id") or "")
+    search_query = filters.get("search_query") or []
+    view = filters.get("view", "show_all_posts")
+    normalized = {
+        "visibility": visibility,
+        # Usernames are matched ignoring case
+        "user_id": user_id if user_id.isdigit() else user_id.lower(),
+        "sort_by": filters.get("sort_by", "date"),
+        # Terms narrow the result in order
+        "search_query": search_query,
+        "also_search_in": (
+            sorted(set(filters.get("also_search_in") or []))
+            if search_query
+            else []
+        ),
+        "tags": sorted(
+            {normalize_tag(tag) for tag in filter_tags(filters.get("tags"))}
+        ),
+        "followers": (
+            sorted(set(filters.get("followers") or []))
+            if view == "only_users_you_follow"
+            else []
+        ),
+    }
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+def _cache():
+    return caches[settings.FILTER_CACHE["CACHE"]]
+
+
+def invalidate_filter_results():
+    """
+    Starts a new generation of cached filter results, once the current
+    transaction commits.
+    """
+
+    def bump():
+        cache = _cache()
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            # The generation was evicted or never set
+            cache.set(GENERATION_KEY, 1, timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def _cached(kind, signature, compute, cacheable=None):
+    """
+    Returns the `kind` of result cached under `signature` in the current
+    generation, or computes and caches it.
+
+    Args:
+        kind (str): What's cached, e.g. "ids".
+        signature (str): The signature of the filters and visibility.
+        compute (callable): Returns the result on a miss.
+        cacheable (callable, optional): Tells whether a computed result
+            is cached.
+    """
+    if not settings.FILTER_CACHE["TIMEOUT"]:
+        return compute()
+
+    cache = _cache()
+    generation = cache.get_or_set(GENERATION_KEY, 0, timeout=None)
+    key = f"filter:{generation}:{kind}:{signature}"
+    value = cache.get(key)
+    record_cache_lookup("filter_results", value is not None)
+    if value is None:
+        value = compute()
+        if cacheable is None or cacheable(value):
+            cache.set(key, value, settings.FILTER_CACHE["TIMEOUT"])
+    return value
+
+
+def filtered_post_ids(filters, visibility, posts):
+    """
+    Returns the ids of the posts matching `filters`, in order, from the
+    cache if the same filters were run recently.
+
+    Args:
+        filters (dict): The filters of the request.
+        visibility (str): The viewer's visibility class.
+        posts (callable): Returns the filtered posts, called on a miss.
+
+    Returns:
+        list: The post ids.
+    """
+    return _cached(
+        "ids",
+        filter_signature(filters, visibility),
+        lambda: list(posts().values_list("pk", flat=True)),
+        lambda ids: len(ids) <= settings.FILTER_CACHE["MAX_IDS"],
+    )
+
+
+def filtered_facets(filters, visibility, names, posts):
+    """
+    Returns the facet counts `names` of the posts matching `filters`,
+    from the cache if the same filters and facets were run recently.
+
+    Args:
+        filters (dict): The filters of the request.
+        visibility (str): The viewer's visibility class.
+        names (list): The facets, see apps/posts/facets.py.
+        posts (callable): Returns the filtered posts, called on a miss.
+
+    Returns:
+        dict: The counts per facet.
+    """
+    if not names:
+        return {}
+    names = sorted(set(names))
+    return _cached(
+        "facets:" + ",".join(names),
+        filter_signature(filters, visibility),
+        lambda: facet_counts(posts(), names),
+    )
+
+
+def hydrate_posts(ids, user):
+    """
+    Loads the posts with `ids` for `PostSerializer`, in the order of
+    `ids`, skipping posts deleted since the ids were cached.
+    """
+    posts = with_serializer_data(Post.objects.filter(pk__in=ids), user)
+    by_id = {post.pk: post for post in posts}
+    return [by_id[pk] for pk in ids if pk in by_id]
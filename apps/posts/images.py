@@ -0,0 +1,156 @@
+"""
+Queue of image files to delete from storage.
+
+Deleting a file can mean a slow or failing call to the storage backend,
+so requests only record the files their post or profile no longer uses
+(`enqueue_orphaned_images`) in the same transaction as the change.
+`delete_orphaned_images` deletes them later, in batches, retrying failed
+deletions with an exponential backoff.
+"""
+
+import logging
+from datetime import timedelta
+import cloudinary.api
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from .models import OrphanedImage
+
+cleanup_logger = logging.getLogger("app.image_cleanup")
+
+
+def _delete_default(names):
+    """
+    Deletes files from Django's default storage.
+
+    Returns:
+        dict: The names of the files that couldn't be deleted mapped to
+        the error.
+    """
+    errors = {}
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError as e:
+            errors[name] = str(e)
+    return errors
+
+
+def _delete_cloudinary(names):
+    """Deletes images from Cloudinary with one API call."""
+    deleted = cloudinary.api.delete_resources(names)["deleted"]
+    return {
+        name: f"Cloudinary status: {deleted.get(name)}"
+        for name in names
+        if deleted.get(name) not in ("deleted", "not_found")
+    }
+
+
+# Functions deleting a batch of files, per backend
+STORAGE_DELETERS = {
+    "default": _delete_default,
+    "cloudinary": _delete_cloudinary,
+}
+
+
+def image_reference(image):
+    """
+    Returns the backend and name of an image field's value (a file of
+    an ImageField or a CloudinaryField resource), or None if it's empty.
+    """
+    if not image:
+        return None
+    if isinstance(image, FieldFile):
+        return "default", image.name
+    return "cloudinary", image.public_id
+
+
+def enqueue_orphaned_images(*images):
+    """
+    Queues images for deletion, skipping empty values and images that
+    are already queued.
+
+    Args:
+        *images: Values of image fields that are no longer used.
+    """
+    references = {
+        reference
+        for reference in map(image_reference, images)
+        if reference is not None
+    }
+    OrphanedImage.objects.bulk_create(
+        [
+            OrphanedImage(backend=backend, name=name)
+            for backend, name in references
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def delete_orphaned_images(batch_size=None):
+    """
+    Deletes a batch of queued images that are due.
+
+    Deleted images (and images that were already gone) leave the
+    queue, failed ones are retried after IMAGE_CLEANUP["RETRY_DELAY"]
+    seconds, doubled after every attempt, until
+    IMAGE_CLEANUP["MAX_ATTEMPTS"] attempts failed.
+
+    Args:
+        batch_size (int, optional): Images per batch, defaults to
+            IMAGE_CLEANUP["BATCH_SIZE"].
+
+    Returns:
+        tuple: The number of deleted and of failed images.
+    """
+    options = settings.IMAGE_CLEANUP
+    now = timezone.now()
+    batch = list(
+        OrphanedImage.objects.filter(
+            next_attempt_at__lte=now,
+            attempts__lt=options["MAX_ATTEMPTS"],
+        ).order_by("next_attempt_at", "id")[
+            : batch_size or options["BATCH_SIZE"]
+        ]
+    )
+
+    errors = {}
+    for backend in {image.backend for image in batch}:
+        names = [image.name for image in batch if image.backend == backend]
+        try:
+            failed = STORAGE_DELETERS[backend](names)
+        except Exception as e:
+            failed = dict.fromkeys(names, str(e))
+        errors.update(
+            {(backend, name): error for name, error in failed.items()}
+        )
+
+    failed = []
+    for image in batch:
+        error = errors.get((image.backend, image.name))
+        if error is None:
+            continue
+        image.attempts += 1
+        image.last_error = error
+        image.next_attempt_at = now + timedelta(
+            seconds=options["RETRY_DELAY"] * 2 ** (image.attempts - 1)
+        )
+        failed.append(image)
+        cleanup_logger.warning(
+            "Failed to delete an image",
+            extra={
+                "backend": image.backend,
+                "image": image.name,
+                "attempts": image.attempts,
+                "error": error,
+            },
+        )
+
+    OrphanedImage.objects.filter(
+        pk__in=[image.pk for image in batch if image not in failed]
+    ).delete()
+    OrphanedImage.objects.bulk_update(
+        failed, ["attempts", "last_error", "next_attempt_at"]
+    )
+    return len(batch) - len(failed), len(failed)
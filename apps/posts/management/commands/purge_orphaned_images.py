@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from apps.posts.images import delete_orphaned_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the files of removed or replaced post and profile "
+        "images from storage, in batches. Failed deletions are retried "
+        "by later runs. Meant to run periodically, e.g. from a "
+        "scheduler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        total_deleted = total_failed = 0
+        while True:
+            deleted, failed = delete_orphaned_images(options["batch_size"])
+            if not deleted and not failed:
+                break
+            total_deleted += deleted
+            total_failed += failed
+
+        message = f"Deleted {total_deleted} image(s)"
+        if total_failed:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{message}, {total_failed} failed (see the log)."
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{message}."))
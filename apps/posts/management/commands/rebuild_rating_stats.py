@@ -0,0 +1,22 @@
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from apps.posts.models import Post
+from apps.posts.ratings import refresh_all_rating_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the rating averages and histograms of every post "
+        "from their ratings. They're kept up to date as ratings are "
+        "written, run this if ratings were changed outside the API."
+    )
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        refreshed = refresh_all_rating_stats(Post.objects.all())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed {refreshed} post(s) in "
+                + f"{perf_counter() - start:.1f}s."
+            )
+        )
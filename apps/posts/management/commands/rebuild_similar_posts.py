@@ -0,0 +1,46 @@
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from apps.posts.models import Post
+from apps.posts.similarity import (
+    SIMILARITY_BATCH_SIZE,
+    index_posts,
+    rebuild_similar_posts,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reindexes the tools, materials and tags of every post and "
+        "recomputes all similar posts. Posts are kept up to date when "
+        "they're submitted or deleted, run this once after deploying "
+        "the feature."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SIMILARITY_BATCH_SIZE,
+            help="Posts indexed per batch.",
+        )
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        post_ids = list(
+            Post.objects.order_by("pk").values_list("pk", flat=True)
+        )
+        batches = [
+            post_ids[i : i + options["batch_size"]]
+            for i in range(0, len(post_ids), options["batch_size"])
+        ]
+        # Scores need the tokens of all posts
+        for batch in batches:
+            index_posts(batch)
+        for batch in batches:
+            rebuild_similar_posts(batch)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt the similar posts of {len(post_ids)} post(s) in "
+                + f"{perf_counter() - start:.1f}s."
+            )
+        )
@@ -0,0 +1,65 @@
+from time import perf_counter
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.posts.seeding import DEFAULT_BATCH_SIZE, DEFAULT_VOLUMES, seed_data
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates users, posts and activity for load testing, e.g. "
+        "`seed_data --users 20000 --posts 100000` creates about a "
+        "million rows. Volumes other than users and posts are averages "
+        "per post (per user for follows)."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(f"--{name}", type=int, default=default)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of the random generators, the same seed and "
+            + "volumes generate the same data.",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix of the generated usernames.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(
+            username__startswith=f"{prefix}_user_"
+        ).exists():
+            raise CommandError(
+                f"Users prefixed with '{prefix}' already exist, "
+                + "pick another --prefix."
+            )
+
+        start = perf_counter()
+        with transaction.atomic():
+            seeded = seed_data(
+                {name: options[name] for name in DEFAULT_VOLUMES},
+                seed=options["seed"],
+                prefix=prefix,
+                batch_size=options["batch_size"],
+            )
+        elapsed = perf_counter() - start
+
+        for model, count in sorted(seeded["counts"].items()):
+            self.stdout.write(f"{model}: {count}")
+        total = sum(seeded["counts"].values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {total} rows in {elapsed:.1f}s "
+                + f"({total / max(elapsed, 1e-9):.0f} rows/s)."
+            )
+        )
@@ -0,0 +1,47 @@
+from datetime import timedelta
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.posts.filter_cache import invalidate_filter_results
+from apps.posts.models import Post
+from apps.posts.trending import active_post_ids, refresh_hot_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Refreshes the trending scores of the posts created, liked, "
+        "commented or rated recently. Meant to run periodically, e.g. "
+        "every 10 minutes with --minutes 15 (a little overlap keeps "
+        "late runs from missing activity)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=15,
+            help="Refresh posts with activity in the last N minutes.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Refresh every post, e.g. after removed likes or "
+            + "comments, which don't count as activity.",
+        )
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        if options["all"]:
+            posts = Post.objects.all()
+        else:
+            since = timezone.now() - timedelta(minutes=options["minutes"])
+            posts = Post.objects.filter(pk__in=active_post_ids(since))
+        updated = refresh_hot_scores(posts)
+        if updated:
+            # Cached trending results have the old order
+            invalidate_filter_results()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {updated} post(s) in {perf_counter() - start:.1f}s."
+            )
+        )
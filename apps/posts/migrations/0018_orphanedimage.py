@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0017_alter_post_default_image_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrphanedImage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("backend", models.CharField(max_length=20)),
+                ("name", models.CharField(max_length=255)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["next_attempt_at"],
+                        name="posts_orpha_next_at_b786a3_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("backend", "name"),
+                        name="unique_orphaned_image",
+                    )
+                ],
+            },
+        ),
+    ]
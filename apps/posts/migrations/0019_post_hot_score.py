@@ -0,0 +1,78 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:32
+
+from datetime import datetime, timezone
+from math import log10
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# The hot score as this migration computes it, independent of later
+# changes to apps/posts/trending.py
+ACTIVITY_WEIGHTS = {"likes": 1.0, "comments": 2.0, "ratings": 1.5}
+HOT_SCORE_TIMESCALE = 45000
+HOT_SCORE_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+HOT_SCORE_BATCH_SIZE = 1000
+
+
+def hot_score(created_at, likes, comments, ratings):
+    activity = (
+        likes * ACTIVITY_WEIGHTS["likes"]
+        + comments * ACTIVITY_WEIGHTS["comments"]
+        + ratings * ACTIVITY_WEIGHTS["ratings"]
+    )
+    age = (created_at - HOT_SCORE_EPOCH).total_seconds()
+    return round(log10(max(activity, 1)) + age / HOT_SCORE_TIMESCALE, 7)
+
+
+def compute_hot_scores(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+
+    def count(model_name):
+        model = apps.get_model("posts", model_name)
+        return Coalesce(
+            Subquery(
+                model.objects.filter(post=OuterRef("pk"))
+                .order_by()
+                .values("post")
+                .annotate(value=Count("pk"))
+                .values("value")
+            ),
+            0,
+        )
+
+    posts = (
+        Post.objects.order_by("pk")
+        .only("pk", "created_at")
+        .annotate(
+            like_count=count("Like"),
+            comment_count=count("Comment"),
+            rating_count=count("Rating"),
+        )
+    )
+    last_pk = 0
+    while batch := list(posts.filter(pk__gt=last_pk)[:HOT_SCORE_BATCH_SIZE]):
+        for post in batch:
+            post.hot_score = hot_score(
+                post.created_at,
+                post.like_count,
+                post.comment_count,
+                post.rating_count,
+            )
+        Post.objects.bulk_update(batch, ["hot_score"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0018_orphanedimage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="hot_score",
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.RunPython(compute_hot_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:39
+
+import re
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Posts tagged per query
+BATCH_SIZE = 1000
+# Tags as this migration parses them, independent of later changes to
+# apps/posts/tags.py
+TAG_SEPARATORS = re.compile(r"[\s,]+")
+TAG_MAX_LENGTH = 50
+
+
+def parse_tags(value):
+    names = []
+    for part in TAG_SEPARATORS.split(value or ""):
+        name = part.strip().lstrip("#").lower()[:TAG_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def tag_existing_posts(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Tag = apps.get_model("posts", "Tag")
+    PostTag = apps.get_model("posts", "PostTag")
+
+    posts = Post.objects.exclude(tags=None).exclude(tags="").order_by("pk")
+    last_pk = 0
+    while batch := list(
+        posts.filter(pk__gt=last_pk).values_list("pk", "tags")[:BATCH_SIZE]
+    ):
+        names_by_post = {pk: parse_tags(tags) for pk, tags in batch}
+        names = set().union(*names_by_post.values())
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in names], ignore_conflicts=True
+        )
+        tag_ids = dict(
+            Tag.objects.filter(name__in=names).values_list("name", "pk")
+        )
+        PostTag.objects.bulk_create(
+            [
+                PostTag(post_id=post_id, tag_id=tag_ids[name])
+                for post_id, post_names in names_by_post.items()
+                for name in post_names
+            ],
+            ignore_conflicts=True,
+        )
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0020_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PostTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="post_tags",
+                        to="posts.post",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="post_tags",
+                        to="posts.tag",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["tag", "post"], name="post_tag_tag_post_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "tag"), name="unique_post_tag"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(tag_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:41
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0021_tag_posttag"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="material",
+            index=models.Index(
+                django.db.models.functions.text.Lower("name"),
+                name="material_name_lower_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                django.db.models.functions.text.Lower("title"),
+                name="post_title_lower_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tool",
+            index=models.Index(
+                django.db.models.functions.text.Lower("name"),
+                name="tool_name_lower_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 5.1.4 on 2026-10-19 19:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Least
+
+# Rating figures as this migration computes them, independent of later
+# changes to apps/posts/ratings.py
+RATING_FIELDS = ["saves_money", "saves_time", "is_useful"]
+RATING_BUCKET_WIDTH = 10
+RATING_BUCKETS = 10
+RATING_STATS_BATCH_SIZE = 1000
+
+
+def compute_rating_stats(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Rating = apps.get_model("posts", "Rating")
+    RatingBucket = apps.get_model("posts", "RatingBucket")
+
+    def per_post(aggregate):
+        return Subquery(
+            Rating.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(value=aggregate)
+            .values("value")
+        )
+
+    post_ids = list(Post.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(post_ids), RATING_STATS_BATCH_SIZE):
+        batch = post_ids[start : start + RATING_STATS_BATCH_SIZE]
+        Post.objects.filter(pk__in=batch).update(
+            rating_count=Coalesce(per_post(Count("pk")), 0),
+            **{
+                f"avg_{field}": Coalesce(per_post(Avg(field)), 0.0)
+                for field in RATING_FIELDS
+            },
+        )
+        ratings = Rating.objects.filter(post_id__in=batch).order_by()
+        RatingBucket.objects.bulk_create(
+            [
+                RatingBucket(
+                    post_id=row["post_id"],
+                    field=field,
+                    bucket=row["bucket"],
+                    count=row["count"],
+                )
+                for field in RATING_FIELDS
+                for row in ratings.values(
+                    "post_id",
+                    bucket=Least(
+                        F(field) / RATING_BUCKET_WIDTH, RATING_BUCKETS - 1
+                    ),
+                ).annotate(count=Count("pk"))
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0023_posttoken_similarpost"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatingBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("field", models.CharField(max_length=20)),
+                ("bucket", models.PositiveSmallIntegerField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="avg_is_useful",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="avg_saves_money",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="avg_saves_time",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-avg_saves_money", "-rating_count", "-id"],
+                name="post_avg_saves_money_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-avg_saves_time", "-rating_count", "-id"],
+                name="post_avg_saves_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-avg_is_useful", "-rating_count", "-id"],
+                name="post_avg_is_useful_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ratingbucket",
+            name="post",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="rating_buckets",
+                to="posts.post",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="ratingbucket",
+            constraint=models.UniqueConstraint(
+                fields=("post", "field", "bucket"), name="unique_rating_bucket"
+            ),
+        ),
+        migrations.RunPython(compute_rating_stats, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from static.utils.environment import is_development
@@ -24,8 +26,28 @@ class HarmfulMaterialCategory(models.Model):
 
 
 class Post(models.Model):
+    class Meta:
+        indexes = [
+            # The feed, newest first
+            models.Index(fields=["-created_at"], name="post_created_idx"),
+            # A user's posts, newest first (also covers lookups by user)
+            models.Index(
+                fields=["user", "-created_at"], name="post_user_created_idx"
+            ),
+            # Autocomplete, see apps/posts/autocomplete.py
+            models.Index(Lower("title"), name="post_title_lower_idx"),
+            # Rating leaderboards, see apps/posts/ratings.py
+            *(
+                models.Index(
+                    fields=[f"-avg_{field}", "-rating_count", "-id"],
+                    name=f"post_avg_{field}_idx",
+                )
+                for field in ["saves_money", "saves_time", "is_useful"]
+            ),
+        ]
+
     id = models.AutoField(primary_key=True)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     title = models.CharField(max_length=255)
     description = models.TextField()
     public = models.BooleanField(default=True)
@@ -39,6 +61,13 @@ class Post(models.Model):
     harmful_material_categories = models.ManyToManyField(
         HarmfulMaterialCategory, related_name="posts"
     )
+    # Sorts the feed by trending, see apps/posts/trending.py
+    hot_score = models.FloatField(default=0, db_index=True)
+    # Rating figures, kept up to date by apps/posts/ratings.py
+    rating_count = models.PositiveIntegerField(default=0)
+    avg_saves_money = models.FloatField(default=0)
+    avg_saves_time = models.FloatField(default=0)
+    avg_is_useful = models.FloatField(default=0)
     # Image index for posts with no image attached
     default_image_index = models.PositiveIntegerField(
         default=1, validators=[MinValueValidator(0), MaxValueValidator(3)]
@@ -51,9 +80,57 @@ class Post(models.Model):
         image = CloudinaryField("image", blank=True, null=True)
 
 
+class Tag(models.Model):
+    """
+    A tag, normalized by `apps.posts.tags.parse_tags` (lowercase, without
+    "#"), so tags are matched exactly through the unique index.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+
+    # Display in admin portal
+    def __str__(self):
+        return str(self.name)
+
+
+class PostTag(models.Model):
+    """
+    Links a post to the tags parsed from its `tags` field, see
+    apps/posts/tags.py.
+    """
+
+    class Meta:
+        constraints = [
+            # Also covers lookups by post
+            models.UniqueConstraint(
+                fields=["post", "tag"], name="unique_post_tag"
+            )
+        ]
+        indexes = [
+            # The posts of a tag, and tag counts
+            models.Index(fields=["tag", "post"], name="post_tag_tag_post_idx")
+        ]
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="post_tags",
+        db_index=False,
+    )
+    tag = models.ForeignKey(
+        Tag, on_delete=models.CASCADE, related_name="post_tags", db_index=False
+    )
+
+
 class Material(models.Model):
     """This model is related to the Post model"""
 
+    class Meta:
+        indexes = [
+            # Autocomplete, see apps/posts/autocomplete.py
+            models.Index(Lower("name"), name="material_name_lower_idx")
+        ]
+
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name="materials"
     )
@@ -65,6 +142,12 @@ class Material(models.Model):
 class Tool(models.Model):
     """This model is related to the Post model"""
 
+    class Meta:
+        indexes = [
+            # Autocomplete, see apps/posts/autocomplete.py
+            models.Index(Lower("name"), name="tool_name_lower_idx")
+        ]
+
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name="tools"
     )
@@ -83,8 +166,9 @@ class Like(models.Model):
             )
         ]
 
+    # Lookups and counts by post use the index of unique_like
     post = models.ForeignKey(
-        Post, on_delete=models.CASCADE, related_name="likes"
+        Post, on_delete=models.CASCADE, related_name="likes", db_index=False
     )
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="likes"
@@ -102,8 +186,12 @@ class Rating(models.Model):
             )
         ]
 
+    # Lookups by post use the index of unique_rating
     post = models.ForeignKey(
-        Post, on_delete=models.CASCADE, related_name="post_ratings"
+        Post,
+        on_delete=models.CASCADE,
+        related_name="post_ratings",
+        db_index=False,
     )
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="post_ratings"
@@ -115,14 +203,151 @@ class Rating(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+class RatingBucket(models.Model):
+    """
+    How many of a post's ratings of one dimension (e.g. "saves_money")
+    fall in a bucket of values, see apps/posts/ratings.py.
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "field", "bucket"], name="unique_rating_bucket"
+            )
+        ]
+
+    # Lookups by post use the index of unique_rating_bucket
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="rating_buckets",
+        db_index=False,
+    )
+    field = models.CharField(max_length=20)
+    bucket = models.PositiveSmallIntegerField()
+    # Not a PositiveIntegerField, decrements are inserted as -1 before
+    # they're added to the existing count
+    count = models.IntegerField(default=0)
+
+
 class Comment(models.Model):
     """This model is related to the Post model"""
 
+    class Meta:
+        indexes = [
+            # A post's comments, oldest first (also covers lookups by post)
+            models.Index(
+                fields=["post", "created_at"], name="comment_post_created_idx"
+            )
+        ]
+
     post = models.ForeignKey(
-        Post, on_delete=models.CASCADE, related_name="post_comment"
+        Post,
+        on_delete=models.CASCADE,
+        related_name="post_comment",
+        db_index=False,
     )
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="post_comment"
     )
     text = models.TextField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
+
+
+class PostToken(models.Model):
+    """
+    A normalized tool, material or tag of a post, e.g. "tool:saw". The
+    rows form an inverted index from tokens to posts, used to find
+    similar posts (see apps/posts/similarity.py).
+
+    Attributes:
+        token (CharField): The kind of token and the normalized name.
+        weight (FloatField): The token's weight in the similarity.
+    """
+
+    class Meta:
+        constraints = [
+            # Also covers lookups by post
+            models.UniqueConstraint(
+                fields=["post", "token"], name="unique_post_token"
+            )
+        ]
+        indexes = [
+            # The posts of a token
+            models.Index(fields=["token", "post"], name="post_token_idx")
+        ]
+
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="tokens", db_index=False
+    )
+    token = models.CharField(max_length=300)
+    weight = models.FloatField()
+
+
+class SimilarPost(models.Model):
+    """
+    A post among the most similar ones of another post, precomputed
+    from their tokens (see apps/posts/similarity.py).
+
+    Attributes:
+        post (ForeignKey): The post.
+        similar (ForeignKey): The similar post.
+        score (FloatField): Their weighted Jaccard similarity, from 0
+            to 1.
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "similar"], name="unique_similar_post"
+            )
+        ]
+        indexes = [
+            # A post's similar posts, most similar first
+            models.Index(
+                fields=["post", "-score"], name="similar_post_score_idx"
+            )
+        ]
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="similar_posts",
+        db_index=False,
+    )
+    similar = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.FloatField()
+
+
+class OrphanedImage(models.Model):
+    """
+    An image file no longer referenced by a post or profile, waiting to
+    be deleted from storage by `manage.py purge_orphaned_images` (see
+    apps/posts/images.py), so requests never wait on the storage.
+
+    Attributes:
+        backend (CharField): "default" (Django's default storage) or
+            "cloudinary".
+        name (CharField): The file name, or Cloudinary public id.
+        attempts (PositiveIntegerField): Failed deletion attempts.
+        last_error (TextField): Why the last attempt failed.
+        next_attempt_at (DateTimeField): When the deletion is due,
+            pushed back after every failed attempt.
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["backend", "name"], name="unique_orphaned_image"
+            )
+        ]
+        indexes = [models.Index(fields=["next_attempt_at"])]
+
+    backend = models.CharField(max_length=20)
+    name = models.CharField(max_length=255)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,207 @@
+"""
+Rating figures of posts: averages, histograms and leaderboards.
+
+Each post stores its number of ratings and the average of each rating
+dimension (`Post.rating_count`, `Post.avg_<field>`), and RatingBucket
+rows count its ratings per dimension and bucket of RATING_BUCKET_WIDTH
+values. Both are updated by the delta of every rating written, so
+neither the serializer, the distribution nor the leaderboards read the
+Rating table, and leaderboards are scans of an index per dimension.
+
+`refresh_rating_stats` recomputes the figures of posts from their
+ratings, for posts whose ratings were deleted and as a backfill
+(`manage.py rebuild_rating_stats`). Ratings saved or deleted through the
+ORM (e.g. in the admin) refresh their post once the transaction commits,
+see signals.py.
+"""
+
+import threading
+from collections import Counter
+from django.db import transaction
+from django.db.models import Avg, Count, F, Value
+from django.db.models.functions import Coalesce, Least
+from static.utils.sql import add_on_conflict
+from .models import Post, Rating, RatingBucket
+from .utils import RATING_FIELDS, count_per_post, per_post
+
+# Ratings are from 0 to 100, bucketed by tens (90 to 100 is the last)
+RATING_MAX = 100
+RATING_BUCKET_WIDTH = 10
+RATING_BUCKETS = RATING_MAX // RATING_BUCKET_WIDTH
+# Posts per leaderboard, by default and at most
+LEADERBOARD_LIMIT = 10
+LEADERBOARD_MAX_LIMIT = 50
+# Posts refreshed per query
+RATING_STATS_BATCH_SIZE = 1000
+
+# Posts waiting for a refresh on commit, per thread (and so connection)
+_pending = threading.local()
+
+
+def rating_bucket(value):
+    """Returns the bucket of a rating value."""
+    return min(value // RATING_BUCKET_WIDTH, RATING_BUCKETS - 1)
+
+
+def bucket_bounds():
+    """Returns the lowest and highest value of each bucket."""
+    return [
+        [
+            bucket * RATING_BUCKET_WIDTH,
+            (
+                RATING_MAX
+                if bucket == RATING_BUCKETS - 1
+                else (bucket + 1) * RATING_BUCKET_WIDTH - 1
+            ),
+        ]
+        for bucket in range(RATING_BUCKETS)
+    ]
+
+
+def record_rating(post_id, values, previous=None):
+    """
+    Adds a written rating to the figures of its post, in two queries.
+
+    Args:
+        post_id (int): The rated post.
+        values (dict): The rating, per field of RATING_FIELDS.
+        previous (tuple, optional): The values of RATING_FIELDS the
+            rating replaced, None for a new rating.
+    """
+    added = 0 if previous else 1
+    old = dict(zip(RATING_FIELDS, previous or []))
+    # The new average is computed from the stored one, all expressions
+    # read the row as it was before the update
+    Post.objects.filter(pk=post_id).update(
+        rating_count=F("rating_count") + added,
+        **{
+            f"avg_{field}": (
+                F(f"avg_{field}") * F("rating_count")
+                + (values[field] - old.get(field, 0))
+            )
+            / (F("rating_count") + added)
+            for field in RATING_FIELDS
+        },
+    )
+
+    changes = Counter()
+    for field in RATING_FIELDS:
+        changes[field, rating_bucket(values[field])] += 1
+        if field in old:
+            changes[field, rating_bucket(old[field])] -= 1
+    add_on_conflict(
+        RatingBucket,
+        [
+            {"post": post_id, "field": field, "bucket": bucket, "count": n}
+            for (field, bucket), n in changes.items()
+            if n
+        ],
+        unique_fields=["post", "field", "bucket"],
+        field="count",
+    )
+
+
+def refresh_rating_stats(post_ids):
+    """
+    Recomputes the rating figures of posts from their ratings, in four
+    queries.
+    """
+    post_ids = list(post_ids)
+    Post.objects.filter(pk__in=post_ids).update(
+        rating_count=count_per_post(Rating),
+        **{
+            f"avg_{field}": Coalesce(per_post(Rating, Avg(field)), 0.0)
+            for field in RATING_FIELDS
+        },
+    )
+
+    ratings = Rating.objects.filter(post_id__in=post_ids).order_by()
+    queries = [
+        ratings.values(
+            "post_id",
+            bucket=Least(F(field) / RATING_BUCKET_WIDTH, RATING_BUCKETS - 1),
+        )
+        .annotate(field=Value(field), count=Count("pk"))
+        .values_list("post_id", "field", "bucket", "count")
+        for field in RATING_FIELDS
+    ]
+    buckets = [
+        RatingBucket(post_id=post_id, field=field, bucket=bucket, count=count)
+        for post_id, field, bucket, count in queries[0].union(
+            *queries[1:], all=True
+        )
+    ]
+    RatingBucket.objects.filter(post_id__in=post_ids).delete()
+    RatingBucket.objects.bulk_create(buckets)
+
+
+def refresh_rating_stats_on_commit(post_id):
+    """
+    Refreshes the figures of a post once the current transaction
+    commits. Posts of a transaction are refreshed together, by the first
+    of its callbacks.
+    """
+    if not hasattr(_pending, "post_ids"):
+        _pending.post_ids = set()
+    _pending.post_ids.add(post_id)
+    transaction.on_commit(_refresh_pending)
+
+
+def _refresh_pending():
+    # Posts of a rolled back transaction are left in the set, refreshing
+    # them again is harmless
+    post_ids, _pending.post_ids = _pending.post_ids, set()
+    if post_ids:
+        refresh_rating_stats(post_ids)
+
+
+def refresh_all_rating_stats(posts, batch_size=RATING_STATS_BATCH_SIZE):
+    """
+    Recomputes the rating figures of `posts`, a batch at a time.
+
+    Returns:
+        int: The number of posts refreshed.
+    """
+    post_ids = list(posts.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(post_ids), batch_size):
+        refresh_rating_stats(post_ids[start : start + batch_size])
+    return len(post_ids)
+
+
+def rating_distribution(post):
+    """
+    Returns the figures of a post's ratings: their number, the average
+    and the number of ratings per bucket of each dimension.
+    """
+    distribution = {field: [0] * RATING_BUCKETS for field in RATING_FIELDS}
+    for field, bucket, count in RatingBucket.objects.filter(
+        post=post
+    ).values_list("field", "bucket", "count"):
+        distribution[field][bucket] = count
+    return {
+        "rating_count": post.rating_count,
+        "averages": {
+            field: getattr(post, f"avg_{field}") for field in RATING_FIELDS
+        },
+        "buckets": bucket_bounds(),
+        "distribution": distribution,
+    }
+
+
+def leaderboard(posts, field, min_ratings=1):
+    """
+    Orders posts by their average rating of `field`, best first, through
+    the post_avg_<field>_idx index.
+
+    Args:
+        posts (QuerySet): The posts to rank.
+        field (str): A field of RATING_FIELDS.
+        min_ratings (int): Posts with fewer ratings are left out.
+
+    Returns:
+        QuerySet: The ranked posts, ties broken by the number of
+        ratings, then by the newest post.
+    """
+    return posts.filter(rating_count__gte=max(min_ratings, 1)).order_by(
+        f"-avg_{field}", "-rating_count", "-id"
+    )
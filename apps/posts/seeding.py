@@ -0,0 +1,367 @@
+import random
+from collections import Counter
+from datetime import date, timedelta
+from itertools import accumulate
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from apps.users.models import Profile, Follow
+from .models import (
+    Post,
+    Tool,
+    Material,
+    Like,
+    Rating,
+    Comment,
+    HarmfulToolCategory,
+    HarmfulMaterialCategory,
+)
+from .constants import HARMFUL_TOOL_CATEGORIES, HARMFUL_MATERIAL_CATEGORIES
+from .ratings import refresh_all_rating_stats
+from .similarity import index_posts, rebuild_similar_posts
+from .tags import tag_posts
+from .trending import refresh_hot_scores
+
+User = get_user_model()
+
+# Volumes of generated data. Users and posts are totals, the rest are
+# averages per post (tools, materials, likes, ratings, comments) or per
+# user (follows).
+DEFAULT_VOLUMES = {
+    "users": 20,
+    "posts": 50,
+    "tools": 3,
+    "materials": 3,
+    "likes": 5,
+    "ratings": 2,
+    "comments": 3,
+    "follows": 3,
+}
+# Rows per INSERT statement
+DEFAULT_BATCH_SIZE = 2000
+# Exponent of the Zipf-like popularity of users and posts, higher values
+# concentrate likes, comments and followers on fewer of them
+POPULARITY_SKEW = 1.1
+# Posts are dated over this many days before the seeding
+POST_AGE_DAYS = 365
+# Password of every generated user
+SEED_PASSWORD = "securePassword"
+
+WORDS = [
+    "bottle",
+    "cardboard",
+    "denim",
+    "garden",
+    "jar",
+    "lamp",
+    "pallet",
+    "planter",
+    "shelf",
+    "tire",
+    "wood",
+    "wool",
+]
+TOOLS = ["Scissors", "Glue gun", "Drill", "Saw", "Hammer", "Needle"]
+MATERIALS = ["Glass jar", "Old t-shirt", "Wooden pallet", "Rope", "Paint"]
+
+
+class _Batches:
+    """
+    Buffers generated rows per model and bulk-creates them whenever
+    `batch_size` rows are waiting, which keeps memory use flat however
+    much data is generated.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.rows = {}
+        self.counts = Counter()
+
+    def add(self, row):
+        rows = self.rows.setdefault(type(row), [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self.flush(type(row))
+
+    def flush(self, model=None):
+        for row_model in [model] if model else list(self.rows):
+            rows = self.rows.pop(row_model, [])
+            if rows:
+                row_model.objects.bulk_create(rows)
+                self.counts[row_model.__name__] += len(rows)
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _popularity(rng, size):
+    """
+    Returns Zipf-like weights (averaging 1) in random order: a few items
+    get most of the activity, most items get little.
+    """
+    weights = [1 / rank**POPULARITY_SKEW for rank in range(1, size + 1)]
+    rng.shuffle(weights)
+    mean = sum(weights) / size if size else 1
+    return [weight / mean for weight in weights]
+
+
+def _activity(rng, average, weight=1.0):
+    """A random count averaging `average * weight`."""
+    return int(rng.random() * 2 * average * weight + 0.5)
+
+
+def _distinct_sample(rng, population, count, cum_weights=None, exclude=None):
+    """
+    Returns up to `count` distinct items of `population`, drawn
+    uniformly or by `cum_weights`, so generated rows respect unique
+    constraints. Items are drawn in a few rounds, heavily skewed
+    weights may leave the sample a bit short of `count`.
+    """
+    count = min(count, len(population) - (exclude is not None))
+    if count <= 0:
+        return []
+    if cum_weights is None:
+        sample = rng.sample(population, min(count + 1, len(population)))
+        return [item for item in sample if item != exclude][:count]
+
+    picked = {}
+    for _ in range(3):
+        for item in rng.choices(
+            population, cum_weights=cum_weights, k=count - len(picked)
+        ):
+            if item != exclude:
+                picked[item] = None
+        if len(picked) >= count:
+            break
+    return list(picked)[:count]
+
+
+def seed_data(
+    volumes=None, seed=0, prefix="seed", batch_size=DEFAULT_BATCH_SIZE
+):
+    """
+    Generates users with profiles and follows, and posts with tools,
+    materials, harmful categories, likes, ratings and comments.
+
+    Authors, followed users and posts have a skewed popularity, like
+    real data. Unique constraints (likes, ratings and follows) are
+    respected and rows are inserted in batches. The posts' rating
+    figures, hot scores and similar posts are computed once they're
+    inserted.
+
+    Args:
+        volumes (dict, optional): Overrides for DEFAULT_VOLUMES.
+        seed (int): Seed for the random generators, the same seed and
+            volumes generate the same data.
+        prefix (str): Prefix of the generated usernames, which must not
+            be in use yet.
+        batch_size (int): Rows per INSERT statement.
+
+    Returns:
+        dict: The generated `users`, the ids of the generated posts
+        (`post_ids`) and the number of rows created per model
+        (`counts`).
+    """
+    volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+    rng = random.Random(seed)
+    batches = _Batches(batch_size)
+
+    users = _seed_users(rng, batches, volumes, prefix)
+    context = {
+        "volumes": volumes,
+        "user_ids": [user.id for user in users],
+        # Popular users write more posts and have more followers
+        "user_weights": list(accumulate(_popularity(rng, len(users)))),
+        "tool_categories": list(
+            HarmfulToolCategory.objects.filter(
+                category__in=HARMFUL_TOOL_CATEGORIES
+            )
+        ),
+        "material_categories": list(
+            HarmfulMaterialCategory.objects.filter(
+                category__in=HARMFUL_MATERIAL_CATEGORIES
+            )
+        ),
+    }
+    for user_id in context["user_ids"]:
+        for followed_id in _distinct_sample(
+            rng,
+            context["user_ids"],
+            _activity(rng, volumes["follows"]),
+            cum_weights=context["user_weights"],
+            exclude=user_id,
+        ):
+            batches.add(Follow(follower_id=user_id, following_id=followed_id))
+
+    post_ids = _seed_posts(seed, batches, context)
+    batches.flush()
+    if post_ids:
+        seeded = Post.objects.filter(pk__range=(post_ids[0], post_ids[-1]))
+        # Hot scores count the ratings stored on the posts
+        refresh_all_rating_stats(seeded, batch_size=batch_size)
+        refresh_hot_scores(seeded, batch_size=batch_size)
+        # Scores need the tokens of all seeded posts
+        batches_of_ids = [
+            post_ids[i : i + batch_size]
+            for i in range(0, len(post_ids), batch_size)
+        ]
+        for ids in batches_of_ids:
+            index_posts(ids)
+        for ids in batches_of_ids:
+            rebuild_similar_posts(ids)
+    return {"users": users, "post_ids": post_ids, "counts": batches.counts}
+
+
+def _seed_users(rng, batches, volumes, prefix):
+    """Generates the users and their profiles."""
+    password = make_password(SEED_PASSWORD)
+    users = []
+    for start in range(0, volumes["users"], batches.batch_size):
+        users += User.objects.bulk_create(
+            [
+                User(username=f"{prefix}_user_{i}", password=password)
+                for i in range(
+                    start, min(start + batches.batch_size, volumes["users"])
+                )
+            ]
+        )
+    batches.counts["User"] = len(users)
+
+    for user in users:
+        batches.add(
+            Profile(
+                user=user,
+                # Roughly one in ten users is too young for harmful posts
+                birth_date=date(
+                    2011 if rng.random() < 0.1 else rng.randint(1960, 2005),
+                    rng.randint(1, 12),
+                    rng.randint(1, 28),
+                ),
+            )
+        )
+    return users
+
+
+def _new_post(rng, context, now):
+    """
+    Returns an unsaved post and its creation date, which is only set
+    after the insert since `created_at` is filled in on insert.
+    """
+    post = Post(
+        user_id=rng.choices(
+            context["user_ids"], cum_weights=context["user_weights"]
+        )[0],
+        title=_sentence(rng, 3),
+        description=_sentence(rng, 12),
+        instructions=_sentence(rng, 30),
+        tags=" ".join(rng.sample(WORDS, 3)),
+        harmful_post=rng.random() < 0.1,
+    )
+    age = timedelta(seconds=rng.randint(0, POST_AGE_DAYS * 24 * 3600))
+    return post, now - age
+
+
+def _seed_posts(seed, batches, context):
+    """
+    Generates the posts, a batch at a time, with their activity.
+
+    Returns:
+        list: The ids of the generated posts.
+    """
+    # Separate generators keep the data independent of the batch size
+    post_rng = random.Random(f"{seed}:posts")
+    activity_rng = random.Random(f"{seed}:activity")
+    total = context["volumes"]["posts"]
+    post_weights = _popularity(post_rng, total)
+    post_ids = []
+    now = timezone.now()
+
+    for start in range(0, total, batches.batch_size):
+        rows = [
+            _new_post(post_rng, context, now)
+            for _ in range(start, min(start + batches.batch_size, total))
+        ]
+        posts = Post.objects.bulk_create([post for post, _ in rows])
+        for post, (_, created_at) in zip(posts, rows):
+            post.created_at = created_at
+        Post.objects.bulk_update(posts, ["created_at"])
+        tag_posts(posts)
+        batches.counts["Post"] += len(posts)
+
+        for post, weight in zip(posts, post_weights[start:]):
+            post_ids.append(post.id)
+            _seed_post_activity(activity_rng, batches, post, weight, context)
+    return post_ids
+
+
+def _seed_post_activity(rng, batches, post, weight, context):
+    """
+    Generates the tools, materials, harmful categories, likes, ratings
+    and comments of a post, the last three scaled by its popularity.
+    """
+    volumes = context["volumes"]
+    user_ids = context["user_ids"]
+    tool_categories = context["tool_categories"]
+    material_categories = context["material_categories"]
+
+    for _ in range(_activity(rng, volumes["tools"])):
+        batches.add(
+            Tool(
+                post=post,
+                quantity=str(rng.randint(1, 5)),
+                name=rng.choice(TOOLS),
+                description=_sentence(rng, 4),
+            )
+        )
+    for _ in range(_activity(rng, volumes["materials"])):
+        batches.add(
+            Material(
+                post=post,
+                quantity=str(rng.randint(1, 5)),
+                name=rng.choice(MATERIALS),
+                description=_sentence(rng, 4),
+            )
+        )
+    if tool_categories and rng.random() < 0.1:
+        batches.add(
+            Post.harmful_tool_categories.through(
+                post=post,
+                harmfultoolcategory=rng.choice(tool_categories),
+            )
+        )
+    if material_categories and rng.random() < 0.1:
+        batches.add(
+            Post.harmful_material_categories.through(
+                post=post,
+                harmfulmaterialcategory=rng.choice(material_categories),
+            )
+        )
+
+    for user_id in _distinct_sample(
+        rng, user_ids, _activity(rng, volumes["likes"], weight)
+    ):
+        batches.add(Like(post=post, user_id=user_id))
+    for user_id in _distinct_sample(
+        rng,
+        user_ids,
+        _activity(rng, volumes["ratings"], weight),
+        exclude=post.user_id,
+    ):
+        batches.add(
+            Rating(
+                post=post,
+                user_id=user_id,
+                saves_money=rng.randint(0, 100),
+                saves_time=rng.randint(0, 100),
+                is_useful=rng.randint(0, 100),
+            )
+        )
+    for _ in range(_activity(rng, volumes["comments"], weight)):
+        batches.add(
+            Comment(
+                post=post,
+                user_id=rng.choice(user_ids),
+                text=_sentence(rng, 8),
+            )
+        )
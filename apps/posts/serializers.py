@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
 from static.utils.environment import image_url
-from static.utils.logging import log_debug
+from static.utils.logging import log_debug, debug_switch
 from static.utils.validators import validate_image_extension
 from static.utils.helpers import check_age
 from static.utils.constants import GLOBAL_VALIDATION_RULES
@@ -12,11 +14,19 @@ from .models import (
     Comment,
 )
 from .fields.list_of_primitive_dict_field import ListOfPrimitiveDictField
-from .utils import handle_post_submission, validate_harmful_category
+from .filter_cache import invalidate_filter_results
+from .images import enqueue_orphaned_images
+from .trending import hot_score
+from .utils import (
+    RATING_FIELDS,
+    handle_post_submission,
+    validate_harmful_category,
+)
 
 
 # Securely hash passwords before storing in database
 User = get_user_model()
+SHOW_DEBUGGING = debug_switch(__name__)
 
 
 class PostSerializer(serializers.ModelSerializer):
@@ -87,26 +97,10 @@ class PostSerializer(serializers.ModelSerializer):
         }
 
     def get_ratings(self, obj):
-        """Retrieve aggregated rating data"""
-        ratings = obj.post_ratings.all()
-
-        if not ratings.exists():
-            return {
-                "saves_money": 0,
-                "saves_time": 0,
-                "is_useful": 0,
-            }
-
-        # Calculate the average scores
-        total_saves_money = sum(r.saves_money for r in ratings)
-        total_saves_time = sum(r.saves_time for r in ratings)
-        total_is_useful = sum(r.is_useful for r in ratings)
-        count = ratings.count()
-
+        """Rating averages, stored on the post (see ratings.py)"""
         return {
-            "saves_money": total_saves_money / count,
-            "saves_time": total_saves_time / count,
-            "is_useful": total_is_useful / count,
+            field: getattr(obj, f"avg_{field}") if obj.rating_count else 0
+            for field in RATING_FIELDS
         }
 
     def get_comments(self, obj):
@@ -115,20 +109,21 @@ class PostSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             # If the user is not authenticated, only return comments
             # from safe posts
-            comments = obj.post_comment.filter(post__harmful_post=False)
+            can_view_harmful = False
         else:
             # Check if the user is mature
             user_age = check_age(request.user.profile.birth_date)
             age_restriction = GLOBAL_VALIDATION_RULES[
                 "AGE_RESTRICTED_CONTENT_AGE"
             ]
+            can_view_harmful = user_age >= age_restriction
 
-            if user_age < age_restriction:
-                # User is too young, only return safe post comments
-                comments = obj.post_comment.filter(post__harmful_post=False)
-            else:
-                # Mature users can view all comments
-                comments = obj.post_comment.all()
+        # Users who are too young only get comments of safe posts.
+        # Checked here instead of filtering the comments so prefetched
+        # comments are used.
+        if obj.harmful_post and not can_view_harmful:
+            return []
+        comments = obj.post_comment.all()
 
         return [
             {
@@ -186,16 +181,23 @@ class PostSerializer(serializers.ModelSerializer):
         # Include likes
         request = self.context.get("request", None)
         # Include likes object
-        representation["likes"] = {
+        # Prefer the figures annotated by `with_serializer_data`
+        user_has_liked = getattr(instance, "user_has_liked", None)
+        if user_has_liked is None:
             # Determine if the user has liked this post
-            "user_has_liked": (
+            user_has_liked = (
                 instance.likes.filter(user=request.user).exists()
                 if request
                 and hasattr(request, "user")
                 and request.user.is_authenticated
                 else False
-            ),
-            "count": instance.likes.count(),
+            )
+        like_count = getattr(instance, "like_count", None)
+        if like_count is None:
+            like_count = instance.likes.count()
+        representation["likes"] = {
+            "user_has_liked": user_has_liked,
+            "count": like_count,
         }
         return representation
 
@@ -219,8 +221,7 @@ class PostSerializer(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
-        show_debugging = True
-        log_debug(show_debugging, "Creating a post", validated_data)
+        log_debug(SHOW_DEBUGGING, "Creating a post", validated_data)
 
         # Pop validated_data entries
         harmful_tool_categories_data = validated_data.pop(
@@ -232,26 +233,30 @@ class PostSerializer(serializers.ModelSerializer):
         tools_data = validated_data.pop("tools", [])
         materials_data = validated_data.pop("materials", [])
 
-        # Create the post
-        post = Post.objects.create(
-            # Associate the authenticated user
-            user=self.context["request"].user,
-            **validated_data,
-        )
-        # Handle related objects
-        handle_post_submission(
-            post,
-            tools_data,
-            materials_data,
-            harmful_tool_categories_data,
-            harmful_material_categories_data,
-        )
+        # A failed submission leaves no partial post behind
+        with transaction.atomic():
+            # Create the post
+            post = Post.objects.create(
+                # Associate the authenticated user
+                user=self.context["request"].user,
+                # The score of a post without activity yet
+                hot_score=hot_score(timezone.now()),
+                **validated_data,
+            )
+            # Handle related objects
+            handle_post_submission(
+                post,
+                tools_data,
+                materials_data,
+                harmful_tool_categories_data,
+                harmful_material_categories_data,
+            )
+        invalidate_filter_results()
 
         return post
 
     def update(self, instance, validated_data):
-        show_debugging = True
-        log_debug(show_debugging, "Updating a post", validated_data)
+        log_debug(SHOW_DEBUGGING, "Updating a post", validated_data)
 
         # Pop validated_data entries
         harmful_tool_categories_data = validated_data.pop(
@@ -263,28 +268,34 @@ class PostSerializer(serializers.ModelSerializer):
         tools_data = validated_data.pop("tools", [])
         materials_data = validated_data.pop("materials", [])
 
-        # Delete the image if it's missing in the request
-        if "image" not in validated_data:
+        # The queued image and the changes are committed together, a
+        # failed update doesn't delete the image the post still uses nor
+        # leave a partial post behind
+        with transaction.atomic():
+            # Remove the image if it's missing in the request. The file
+            # of a removed or replaced image is deleted from storage
+            # later.
             if instance.image:
-                # Delete image
-                instance.image.delete(save=False)
-                # Set the field to None
-                instance.image = None
-
-        # Update basic fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        # Handle related objects
-        handle_post_submission(
-            instance,
-            tools_data,
-            materials_data,
-            harmful_tool_categories_data,
-            harmful_material_categories_data,
-            clear_existing=True,
-        )
+                enqueue_orphaned_images(instance.image)
+                if "image" not in validated_data:
+                    # Set the field to None
+                    instance.image = None
+
+            # Update basic fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            # Handle related objects
+            handle_post_submission(
+                instance,
+                tools_data,
+                materials_data,
+                harmful_tool_categories_data,
+                harmful_material_categories_data,
+                clear_existing=True,
+            )
+        invalidate_filter_results()
 
         return instance
 
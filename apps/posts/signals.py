@@ -1,7 +1,16 @@
 from django.db import transaction
-from django.db.models.signals import post_migrate
+from django.db.models.signals import (
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
 from django.dispatch import receiver
-from .models import HarmfulToolCategory, HarmfulMaterialCategory
+from .filter_cache import invalidate_filter_results
+from .images import enqueue_orphaned_images
+from .models import HarmfulToolCategory, HarmfulMaterialCategory, Post, Rating
+from .ratings import refresh_rating_stats_on_commit
+from .similarity import lists_containing, refill_similar_posts
 from .constants import HARMFUL_TOOL_CATEGORIES, HARMFUL_MATERIAL_CATEGORIES
 
 
@@ -29,3 +38,53 @@ def populate_harmful_categories(sender, **kwargs):
 
         for material in HARMFUL_MATERIAL_CATEGORIES:
             HarmfulMaterialCategory.objects.get_or_create(category=material)
+
+
+@receiver(post_delete, sender=Post)
+def enqueue_post_image(sender, instance, **kwargs):
+    """
+    Queues the image of a deleted post for deletion from storage.
+    """
+    # pylint: disable=unused-argument
+    enqueue_orphaned_images(instance.image)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_filters_on_delete(sender, instance, **kwargs):
+    """
+    Drops cached filter results, which may include the deleted post.
+    """
+    # pylint: disable=unused-argument
+    invalidate_filter_results()
+
+
+@receiver(pre_delete, sender=Post)
+def remember_similar_lists(sender, instance, **kwargs):
+    """
+    Notes the similar posts lists holding a post before its deletion
+    removes it from them.
+    """
+    # pylint: disable=unused-argument
+    instance.similar_lists = lists_containing(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def refill_similar_lists(sender, instance, **kwargs):
+    """
+    Gives the lists a deleted post left their next best post.
+    """
+    # pylint: disable=unused-argument
+    refill_similar_posts(getattr(instance, "similar_lists", ()))
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def refresh_rating_stats_on_change(sender, instance, **kwargs):
+    """
+    Refreshes the rating figures of the post of a rating saved or
+    deleted through the ORM (e.g. in the admin, or cascading from a
+    deleted user). RatingView writes ratings with an upsert, which sends
+    no signal, and updates the figures itself.
+    """
+    # pylint: disable=unused-argument
+    refresh_rating_stats_on_commit(instance.post_id)
@@ -0,0 +1,280 @@
+"""
+Similar posts, from the tools, materials and tags they share.
+
+Every post is indexed as a set of weighted tokens ("tool:saw",
+"material:pallet", "tag:garden") in PostToken, an inverted index from
+tokens to posts. The similarity of two posts is the weighted Jaccard
+similarity of their tokens: the weight of the shared tokens over the
+weight of all their tokens.
+
+Each post's SIMILAR_POSTS_LIMIT most similar posts are precomputed in
+SimilarPost, so the endpoint reads a handful of rows. When a post is
+submitted, its tokens and list are rewritten, and the lists of the
+posts sharing tokens with it are patched: the post is added where it
+now ranks and removed where it doesn't. Lists that lose a post, to an
+update or a deletion, are recomputed so the next best post takes its
+place. `manage.py rebuild_similar_posts` recomputes every list from
+scratch.
+"""
+
+import re
+from collections import defaultdict
+from django.db.models import Count, F, Min, OuterRef, Subquery, Sum
+from .models import Material, Post, PostTag, PostToken, SimilarPost, Tool
+
+# Weight of each kind of token
+TOKEN_WEIGHTS = {"tool": 1.0, "material": 1.0, "tag": 0.5}
+# Similar posts kept per post
+SIMILAR_POSTS_LIMIT = 10
+# Posts sharing the most tokens that are scored, per post
+SIMILARITY_CANDIDATES = 500
+# Posts indexed per query when rebuilding
+SIMILARITY_BATCH_SIZE = 500
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_token(name):
+    """Returns a name as indexed: lowercase, single spaces."""
+    return WHITESPACE.sub(" ", name).strip().lower()
+
+
+def tokenize(tools, materials, tags):
+    """
+    Returns the weighted tokens of a post.
+
+    Args:
+        tools (list): The names of its tools.
+        materials (list): The names of its materials.
+        tags (list): Its normalized tags.
+
+    Returns:
+        dict: The tokens, mapped to their weight.
+    """
+    tokens = {}
+    for kind, names in [
+        ("tool", map(normalize_token, tools)),
+        ("material", map(normalize_token, materials)),
+        ("tag", tags),
+    ]:
+        for name in names:
+            if name:
+                tokens[f"{kind}:{name}"] = TOKEN_WEIGHTS[kind]
+    return tokens
+
+
+def index_posts(post_ids):
+    """Rewrites the PostToken rows of posts, in a fixed number of queries."""
+    names = {
+        kind: defaultdict(list) for kind in ("tools", "materials", "tags")
+    }
+    for kind, rows in [
+        ("tools", Tool.objects.filter(post_id__in=post_ids)),
+        ("materials", Material.objects.filter(post_id__in=post_ids)),
+        (
+            "tags",
+            PostTag.objects.filter(post_id__in=post_ids).annotate(
+                name=F("tag__name")
+            ),
+        ),
+    ]:
+        for post_id, name in rows.values_list("post_id", "name"):
+            names[kind][post_id].append(name)
+
+    PostToken.objects.filter(post_id__in=post_ids).delete()
+    PostToken.objects.bulk_create(
+        [
+            PostToken(post_id=post_id, token=token, weight=weight)
+            for post_id in post_ids
+            for token, weight in tokenize(
+                *(names[kind][post_id] for kind in names)
+            ).items()
+        ]
+    )
+
+
+def similarity_scores(post_id, total=None):
+    """
+    Scores the posts sharing tokens with a post, through the inverted
+    index, in one query.
+
+    Args:
+        post_id (int): The post, whose tokens are indexed.
+        total (float, optional): The weight of its tokens, if known.
+
+    Returns:
+        dict: The weighted Jaccard similarity of each candidate post.
+    """
+    own_tokens = PostToken.objects.filter(post_id=post_id)
+    if total is None:
+        total = own_tokens.aggregate(total=Sum("weight"))["total"] or 0
+    totals = (
+        PostToken.objects.filter(post_id=OuterRef("post_id"))
+        .order_by()
+        .values("post_id")
+        .annotate(total=Sum("weight"))
+        .values("total")
+    )
+    candidates = (
+        PostToken.objects.filter(
+            token__in=Subquery(own_tokens.values("token"))
+        )
+        .exclude(post_id=post_id)
+        .values("post_id")
+        .annotate(shared=Sum("weight"), total=Subquery(totals))
+        .order_by("-shared", "post_id")
+        .values_list("post_id", "shared", "total")[:SIMILARITY_CANDIDATES]
+    )
+    return {
+        other_id: shared / (total + other_total - shared)
+        for other_id, shared, other_total in candidates
+    }
+
+
+def top_similar(scores):
+    """Returns the SIMILAR_POSTS_LIMIT best scored posts."""
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[
+        :SIMILAR_POSTS_LIMIT
+    ]
+
+
+def _write_lists(scores):
+    """
+    Replaces the similar posts of posts by their best scored candidates.
+
+    Args:
+        scores (dict): The candidates' scores, per post.
+    """
+    SimilarPost.objects.filter(post_id__in=scores).delete()
+    SimilarPost.objects.bulk_create(
+        [
+            SimilarPost(post_id=post_id, similar_id=other_id, score=score)
+            for post_id, candidates in scores.items()
+            for other_id, score in top_similar(candidates)
+        ]
+    )
+
+
+def rebuild_similar_posts(post_ids):
+    """
+    Recomputes the similar posts of posts, whose tokens are indexed.
+    """
+    _write_lists({post_id: similarity_scores(post_id) for post_id in post_ids})
+
+
+def lists_containing(post_id):
+    """Returns the ids of the posts whose similar posts include a post."""
+    return set(
+        SimilarPost.objects.filter(similar_id=post_id).values_list(
+            "post_id", flat=True
+        )
+    )
+
+
+def refill_similar_posts(post_ids):
+    """
+    Recomputes the lists of posts that lost a similar post, skipping
+    posts deleted meanwhile.
+    """
+    post_ids = list(
+        Post.objects.filter(pk__in=post_ids).values_list("pk", flat=True)
+    )
+    if post_ids:
+        rebuild_similar_posts(post_ids)
+
+
+def update_similar_posts(post, tokens, clear_existing=False):
+    """
+    Indexes a submitted post, computes its similar posts and patches the
+    lists of the posts it shares tokens with.
+
+    Args:
+        post (Post): The post.
+        tokens (dict): Its weighted tokens, see `tokenize`.
+        clear_existing (bool): If True, replaces the post's tokens and
+            lists (for updates).
+    """
+    left = set()
+    if clear_existing:
+        PostToken.objects.filter(post=post).delete()
+        SimilarPost.objects.filter(post=post).delete()
+        # The post leaves the lists it was in
+        left = lists_containing(post.pk)
+        SimilarPost.objects.filter(similar=post).delete()
+    PostToken.objects.bulk_create(
+        [
+            PostToken(post=post, token=token, weight=weight)
+            for token, weight in tokens.items()
+        ]
+    )
+    joined = _join_lists(
+        post, similarity_scores(post.pk, sum(tokens.values()))
+    )
+    # Lists the post didn't rejoin take their next best post instead
+    if left - joined:
+        refill_similar_posts(left - joined)
+
+
+def _join_lists(post, scores):
+    """
+    Writes the similar posts of a post from its candidates' scores and
+    adds it to the lists it ranks in, trimming the full ones.
+
+    Returns:
+        set: The ids of the posts whose lists the post joined.
+    """
+    if not scores:
+        return set()
+
+    # The post joins the lists of the posts it's similar enough to
+    lists = {
+        row["post_id"]: row
+        for row in SimilarPost.objects.filter(post_id__in=scores)
+        .values("post_id")
+        .annotate(count=Count("pk"), lowest=Min("score"))
+    }
+    joined = {
+        other_id: score
+        for other_id, score in scores.items()
+        if other_id not in lists
+        or lists[other_id]["count"] < SIMILAR_POSTS_LIMIT
+        or score > lists[other_id]["lowest"]
+    }
+    # A post submitted at the same time may have written some of these
+    # pairs already, with the same score since it's symmetric
+    SimilarPost.objects.bulk_create(
+        [
+            SimilarPost(post=post, similar_id=other_id, score=score)
+            for other_id, score in top_similar(scores)
+        ]
+        + [
+            SimilarPost(post_id=other_id, similar=post, score=score)
+            for other_id, score in joined.items()
+        ],
+        ignore_conflicts=True,
+    )
+
+    # Lists that were full drop their lowest post
+    full = [
+        other_id
+        for other_id in joined
+        if other_id in lists
+        and lists[other_id]["count"] >= SIMILAR_POSTS_LIMIT
+    ]
+    if not full:
+        return set(joined)
+    entries = defaultdict(list)
+    for row in SimilarPost.objects.filter(post_id__in=full).values(
+        "pk", "post_id", "similar_id", "score"
+    ):
+        entries[row["post_id"]].append(row)
+    SimilarPost.objects.filter(
+        pk__in=[
+            row["pk"]
+            for rows in entries.values()
+            for row in sorted(
+                rows, key=lambda row: (-row["score"], row["similar_id"])
+            )[SIMILAR_POSTS_LIMIT:]
+        ]
+    ).delete()
+    return set(joined)
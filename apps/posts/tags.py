@@ -0,0 +1,116 @@
+"""
+Tags of posts.
+
+Posts keep the tags they were submitted with in their `tags` field, a
+free-form string. It's parsed into Tag rows, linked to the post by
+PostTag rows, whenever a post is saved through `PostSerializer`, so
+posts are filtered by tag with an exact match on the indexed tag name
+instead of a substring search through every post's string.
+"""
+
+import re
+from django.db.models import Count, Q
+from .models import PostTag, Tag
+
+# Tags are separated by whitespace or commas
+TAG_SEPARATORS = re.compile(r"[\s,]+")
+# Longest tag kept (Tag.name's max_length), longer ones are cut
+TAG_MAX_LENGTH = 50
+# Tags returned by `tag_counts` by default
+TAG_COUNT_LIMIT = 50
+
+
+def normalize_tag(name):
+    """Returns a tag as stored: lowercase, without "#"."""
+    return name.strip().lstrip("#").lower()[:TAG_MAX_LENGTH]
+
+
+def parse_tags(value):
+    """
+    Parses a post's `tags` string, e.g. "#wood, Garden shelf".
+
+    Returns:
+        list: The normalized tags, without duplicates, in order.
+    """
+    names = []
+    for part in TAG_SEPARATORS.split(value or ""):
+        name = normalize_tag(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def filter_tags(value):
+    """
+    Returns the tags of a filter's "tags", a list of tags or one tag.
+
+    Raises:
+        TypeError: If `value` is neither.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list) and all(isinstance(t, str) for t in value):
+        return value
+    raise TypeError(f"tags is {value!r}")
+
+
+def tag_posts(posts, clear_existing=False):
+    """
+    Links posts to the tags parsed from their `tags` field, creating
+    missing tags, in a fixed number of queries for any number of posts.
+
+    Args:
+        posts (list): The saved posts.
+        clear_existing (bool): If True, removes the posts' current tags
+            first (for updates).
+    """
+    names_by_post = {post.pk: parse_tags(post.tags) for post in posts}
+    if clear_existing:
+        PostTag.objects.filter(post__in=names_by_post).delete()
+
+    names = set().union(*names_by_post.values())
+    if not names:
+        return
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True
+    )
+    tag_ids = dict(
+        Tag.objects.filter(name__in=names).values_list("name", "pk")
+    )
+    PostTag.objects.bulk_create(
+        [
+            PostTag(post_id=post_id, tag_id=tag_ids[name])
+            for post_id, post_names in names_by_post.items()
+            for name in post_names
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def tagged(name):
+    """
+    Returns a filter for the posts tagged `name`. The tag's posts are
+    looked up through the indexes of Tag and PostTag.
+    """
+    return Q(
+        pk__in=PostTag.objects.filter(tag__name=normalize_tag(name)).values(
+            "post_id"
+        )
+    )
+
+
+def tag_counts(limit=TAG_COUNT_LIMIT):
+    """
+    Returns the most used tags, with the number of posts of each.
+
+    Returns:
+        QuerySet: Dicts with the tag's "name" and "count".
+    """
+    return (
+        Tag.objects.annotate(count=Count("post_tags"))
+        .filter(count__gt=0)
+        .order_by("-count", "name")
+        .values("name", "count")[:limit]
+    )
@@ -0,0 +1,96 @@
+"""
+Stored "hot" scores of posts, sorting the feed by trending.
+
+A post's score is the log of its weighted activity (likes, comments
+and ratings) plus its age in HOT_SCORE_TIMESCALE units since a fixed
+epoch. Newer posts start higher, so recency wins unless an older post
+has many times the activity, and the score only changes with activity:
+it is computed once per post and refreshed for the posts with new
+activity by `manage.py update_hot_scores`, instead of being recomputed
+for every post on every request.
+"""
+
+from datetime import datetime, timezone
+from math import log10
+from .models import Post, Like, Comment, Rating
+from .utils import count_per_post
+
+# Weight of each kind of activity
+ACTIVITY_WEIGHTS = {"likes": 1.0, "comments": 2.0, "ratings": 1.5}
+# Seconds of recency worth ten times the activity (12.5 hours)
+HOT_SCORE_TIMESCALE = 45000
+# Start of the time component, keeps scores small
+HOT_SCORE_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Posts updated per query
+HOT_SCORE_BATCH_SIZE = 1000
+
+
+def hot_score(created_at, likes=0, comments=0, ratings=0):
+    """
+    Returns the score of a post created at `created_at` with the given
+    activity.
+    """
+    activity = (
+        likes * ACTIVITY_WEIGHTS["likes"]
+        + comments * ACTIVITY_WEIGHTS["comments"]
+        + ratings * ACTIVITY_WEIGHTS["ratings"]
+    )
+    age = (created_at - HOT_SCORE_EPOCH).total_seconds()
+    return round(log10(max(activity, 1)) + age / HOT_SCORE_TIMESCALE, 7)
+
+
+def refresh_hot_scores(posts, batch_size=HOT_SCORE_BATCH_SIZE):
+    """
+    Recomputes the scores of `posts`, a batch per query.
+
+    Args:
+        posts (QuerySet): The posts to update.
+        batch_size (int): Posts read and updated per query.
+
+    Returns:
+        int: The number of posts updated.
+    """
+    posts = (
+        posts.order_by("pk")
+        # Ratings are counted on the post (see ratings.py)
+        .only("pk", "created_at", "rating_count").annotate(
+            like_count=count_per_post(Like),
+            comment_count=count_per_post(Comment),
+        )
+    )
+    updated, last_pk = 0, 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return updated
+        for post in batch:
+            post.hot_score = hot_score(
+                post.created_at,
+                post.like_count,
+                post.comment_count,
+                post.rating_count,
+            )
+        Post.objects.bulk_update(batch, ["hot_score"])
+        updated += len(batch)
+        last_pk = batch[-1].pk
+
+
+def active_post_ids(since):
+    """
+    Returns the ids of the posts created, liked, commented or rated
+    since `since`.
+    """
+    ids = set(
+        Post.objects.filter(created_at__gte=since).values_list("pk", flat=True)
+    )
+    for model, field in [
+        (Like, "created_at"),
+        (Comment, "created_at"),
+        (Rating, "updated_at"),
+    ]:
+        ids.update(
+            model.objects.filter(**{f"{field}__gte": since})
+            .values_list("post_id", flat=True)
+            .distinct()
+        )
+    return ids
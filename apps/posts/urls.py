@@ -5,6 +5,11 @@ from .views import (
     DeletePostView,
     RatingView,
     CommentView,
+    TagView,
+    AutocompleteView,
+    SimilarPostsView,
+    RatingDistributionView,
+    RatingLeaderboardView,
 )
 
 
@@ -16,9 +21,26 @@ urlpatterns = [
     ),
     path("posts/", PostAPIView.as_view(), name="post-list"),
     path("posts/<int:pk>/", PostAPIView.as_view(), name="post-detail"),
+    path(
+        "posts/<int:pk>/similar/",
+        SimilarPostsView.as_view(),
+        name="similar-posts",
+    ),
+    path(
+        "posts/<int:pk>/ratings/",
+        RatingDistributionView.as_view(),
+        name="rating-distribution",
+    ),
     path("like/<int:post_id>/", LikeView.as_view(), name="like-create"),
     path("ratings/<int:post_id>/", RatingView.as_view(), name="rating-create"),
+    path(
+        "ratings/leaderboard/",
+        RatingLeaderboardView.as_view(),
+        name="rating-leaderboard",
+    ),
     path(
         "comments/<int:post_id>/", CommentView.as_view(), name="comment-create"
     ),
+    path("tags/", TagView.as_view(), name="tag-list"),
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
 ]
@@ -1,12 +1,27 @@
 from rest_framework import serializers
+from django.db.models import (
+    Count,
+    Exists,
+    OuterRef,
+    Prefetch,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
 from static.utils.convert import parse_stringified_object
+from .similarity import tokenize, update_similar_posts
+from .tags import parse_tags, tag_posts
 from .models import (
     HarmfulMaterialCategory,
     HarmfulToolCategory,
     Tool,
     Material,
+    Like,
+    Comment,
 )
 
+# Rating dimensions, averaged on `Post.avg_<field>`
+RATING_FIELDS = ["saves_money", "saves_time", "is_useful"]
+
 
 def handle_post_submission(
     post,
@@ -17,8 +32,8 @@ def handle_post_submission(
     clear_existing=False,
 ):
     """
-    Adds or updates related tools, materials, and ManyToMany
-    categories.
+    Adds or updates related tools, materials, tags and ManyToMany
+    categories, then the post's similar posts.
 
     :param post: The post instance being created or updated.
     :param tools_data: List of tools to associate with the post.
@@ -56,6 +71,19 @@ def handle_post_submission(
         )
         post.harmful_material_categories.add(material)
 
+    # Tags from the post's `tags` field
+    tag_posts([post], clear_existing=clear_existing)
+    # Similar posts, from the tools, materials and tags
+    update_similar_posts(
+        post,
+        tokenize(
+            [tool.get("name", "") for tool in tools_data],
+            [material.get("name", "") for material in materials_data],
+            parse_tags(post.tags),
+        ),
+        clear_existing=clear_existing,
+    )
+
 
 def validate_harmful_category(value, model, category_name):
     """
@@ -78,3 +106,65 @@ def validate_harmful_category(value, model, category_name):
                 )
 
     return parsed_value
+
+
+def per_post(model, aggregate):
+    """
+    Returns a correlated subquery computing `aggregate` over the rows of
+    `model` that belong to the outer post. Unlike annotating with a join
+    it neither multiplies rows nor interferes with other annotations.
+    """
+    return Subquery(
+        model.objects.filter(post=OuterRef("pk"))
+        .order_by()
+        .values("post")
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+def count_per_post(model):
+    return Coalesce(per_post(model, Count("pk")), 0)
+
+
+def with_serializer_data(posts, user):
+    """
+    Loads everything `PostSerializer` reads in a fixed number of
+    queries, regardless of how many posts are serialized.
+
+    Args:
+        posts (QuerySet): The posts to serialize.
+        user (User): The requesting user, used to annotate whether
+            they have liked each post.
+
+    Returns:
+        QuerySet: The posts with related rows prefetched and likes
+        annotated (ratings are stored on the post).
+    """
+    annotations = {"like_count": count_per_post(Like)}
+    if user.is_authenticated:
+        annotations["user_has_liked"] = Exists(
+            Like.objects.filter(post=OuterRef("pk"), user=user)
+        )
+
+    return (
+        posts.select_related("user__profile")
+        .prefetch_related(
+            "harmful_tool_categories",
+            "harmful_material_categories",
+            "tools",
+            "materials",
+            Prefetch(
+                "post_comment",
+                queryset=Comment.objects.select_related("user__profile"),
+            ),
+        )
+        .annotate(
+            **{
+                name: value
+                for name, value in annotations.items()
+                # Sorting may have annotated the same figure already
+                if name not in posts.query.annotations
+            }
+        )
+    )
@@ -1,3 +1,4 @@
+# pylint: disable=too-many-lines
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import (
@@ -5,14 +6,70 @@ from rest_framework.permissions import (
     AllowAny,
     IsAuthenticated,
 )
-from django.db.models import Q, Count
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from static.utils.error_handling import throw_error
-from static.utils.logging import log_debug
+from static.utils.logging import log_debug, debug_switch
 from static.utils.helpers import check_age
+from static.utils.sql import insert_on_conflict
+from static.utils.throttling import (
+    AutocompleteThrottle,
+    CommentThrottle,
+    FilterThrottle,
+    LikeThrottle,
+)
+from static.utils.timing import timed
+from static.utils.streaming import (
+    STREAM_CHUNK_SIZE,
+    STREAM_FORMATS,
+    streaming_response,
+)
 from static.utils.convert import convert_str_to_complex_obj
 from static.utils.constants import GLOBAL_VALIDATION_RULES
+from apps.users.models import username_iexact
+from .autocomplete import (
+    AUTOCOMPLETE_LIMIT,
+    AUTOCOMPLETE_MAX_LIMIT,
+    SUGGESTERS,
+    suggest,
+)
+from .filter_cache import (
+    ADULT,
+    GUEST,
+    MINOR,
+    filtered_facets,
+    filtered_post_ids,
+    hydrate_posts,
+)
+from .facets import FACETS, requested_facets
 from .serializers import PostSerializer, CommentSerializer
-from .models import Post, Like, Rating
+from .models import Post, Like, Rating, Comment, SimilarPost
+from .ratings import (
+    LEADERBOARD_LIMIT,
+    LEADERBOARD_MAX_LIMIT,
+    leaderboard,
+    rating_distribution,
+    record_rating,
+    refresh_rating_stats,
+)
+from .tags import TAG_COUNT_LIMIT, filter_tags, tag_counts, tagged
+from .utils import RATING_FIELDS, count_per_post, with_serializer_data
+
+SHOW_DEBUGGING = debug_switch(__name__)
+
+# Orderings of filtered posts, per "sort_by"
+FILTER_SORTS = {
+    "date": lambda posts: posts.order_by("-created_at"),
+    "likes": lambda posts: posts.annotate(
+        like_count=count_per_post(Like)
+    ).order_by("-like_count"),
+    "comments": lambda posts: posts.annotate(
+        comment_count=count_per_post(Comment)
+    ).order_by("-comment_count"),
+    # Stored and indexed, see apps/posts/trending.py
+    "trending": lambda posts: posts.order_by("-hot_score"),
+}
 
 
 def age_restricted_error():
@@ -28,6 +85,8 @@ def age_restricted_error():
 
 
 class PostAPIView(APIView):
+    throttle_classes = [FilterThrottle]
+
     # Override permissions for specific actions
     def get_permissions(self):
         if self.request.method == "POST":
@@ -43,72 +102,72 @@ class PostAPIView(APIView):
         ]
 
     def get(self, request, pk=None):
-        show_post_data_debugging = False
         try:
             if pk:
                 # Single post request
                 single_post = self.filter_age_restricted_content(
-                    Post.objects.get(pk=pk)
+                    with_serializer_data(Post.objects.all(), request.user).get(
+                        pk=pk
+                    )
                 )
 
                 serializer = PostSerializer(
                     single_post, context={"request": request}
                 )
+                with timed("serialize"):
+                    data = serializer.data
                 log_debug(
-                    show_post_data_debugging,
+                    SHOW_DEBUGGING,
                     "Returning single post to the client.",
-                    serializer.data,
+                    lambda: data,
                 )
-                return Response(serializer.data, status=200)
+                return Response(data, status=200)
 
             # Return all posts
-            posts = self.filter_age_restricted_content(Post.objects.all())
+            posts = with_serializer_data(
+                self.filter_age_restricted_content(Post.objects.all()),
+                request.user,
+            )
+
+            # Stream large feeds post by post (?stream=json|ndjson)
+            stream_format = request.query_params.get("stream")
+            if stream_format in STREAM_FORMATS:
+                serializer = PostSerializer(context={"request": request})
+                return streaming_response(
+                    posts.iterator(chunk_size=STREAM_CHUNK_SIZE),
+                    serializer.to_representation,
+                    stream_format,
+                )
+
             serializer = PostSerializer(
                 posts, many=True, context={"request": request}
             )
+            with timed("serialize"):
+                data = serializer.data
 
             log_debug(
-                show_post_data_debugging,
+                SHOW_DEBUGGING,
                 "Returning post(s) to the client.",
-                serializer.data,
+                lambda: data,
             )
-            return Response(serializer.data, status=200)
+            return Response(data, status=200)
 
         except Exception:
             return age_restricted_error()
 
     def post(self, request):
-        show_debugging = True
         try:
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 "POST request! (posts)",
-                request.data,
+                lambda: request.data,
             )
             # Request type
             action = request.data.get("action", "create")
 
             # Handle search/filter action
             if action == "filter":
-                try:
-                    log_debug(
-                        show_debugging,
-                        "This is a filter request, not a post "
-                        + "creation request",
-                        "",
-                    )
-                    filters = request.data.get("filters", {})
-                    posts = self.filter_posts(filters)
-                    serializer = PostSerializer(
-                        posts,
-                        many=True,
-                        context={"request": request},
-                    )
-                    return Response(serializer.data, status=200)
-                except Exception as e:
-                    return throw_error(
-                        500, "Unable to filter posts.", log=str(e)
-                    )
+                return self.filter_request(request)
 
             # Handle post creation (default)
 
@@ -116,13 +175,13 @@ class PostAPIView(APIView):
             data = request.data.copy()
             # Convert stringified FormData (js)
             convert_str_to_complex_obj(
-                show_debugging, data, ["tools", "materials"]
+                SHOW_DEBUGGING, data, ["tools", "materials"]
             )
 
             # User is not mature enough to create this post
             if not self.user_is_mature() and self.is_harmful(data):
                 log_debug(
-                    show_debugging,
+                    SHOW_DEBUGGING,
                     "User is not old enough to create post "
                     + "because it contains harmful content.",
                     "",
@@ -144,13 +203,84 @@ class PostAPIView(APIView):
         except Exception as e:
             return throw_error(500, "Unable to create post.", log=str(e))
 
+    def filter_request(self, request):
+        """
+        Answers a filter action: a page of the matching posts, with the
+        facet counts of all matches if requested.
+        """
+        try:
+            log_debug(
+                SHOW_DEBUGGING,
+                "This is a filter request, not a post creation request",
+                "",
+            )
+            filters = request.data.get("filters", {})
+            try:
+                facets = requested_facets(request.data.get("facets"))
+            except TypeError as e:
+                return throw_error(
+                    400,
+                    "Facets must be a list of facet names.",
+                    log=str(e),
+                )
+            unknown = set(facets) - set(FACETS)
+            if unknown:
+                return throw_error(
+                    400,
+                    "Unknown facets: " + ", ".join(sorted(unknown)) + ".",
+                )
+            try:
+                filter_tags(filters.get("tags"))
+            except TypeError as e:
+                return throw_error(
+                    400,
+                    "Tags must be a tag or a list of tags.",
+                    log=str(e),
+                )
+            visibility = self.visibility_class()
+            # Cached ids of all matching posts, see filter_cache.py
+            ids = filtered_post_ids(
+                filters,
+                visibility,
+                lambda: self.filter_posts(filters),
+            )
+            posts = hydrate_posts(self.paginate(ids), request.user)
+            serializer = PostSerializer(
+                posts,
+                many=True,
+                context={"request": request},
+            )
+            with timed("serialize"):
+                data = serializer.data
+            if facets:
+                # The page and the facet counts of all matches
+                data = {
+                    "results": data,
+                    "facets": filtered_facets(
+                        filters,
+                        visibility,
+                        facets,
+                        lambda: self.filter_posts(filters),
+                    ),
+                }
+            return Response(
+                data, status=200, headers={"X-Total-Count": len(ids)}
+            )
+        except ValueError as e:
+            return throw_error(
+                400,
+                "The page and page size must be positive numbers.",
+                log=str(e),
+            )
+        except Exception as e:
+            return throw_error(500, "Unable to filter posts.", log=str(e))
+
     def put(self, request, pk=None):
-        show_debugging = True
         try:
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 f"PUT request! (posts) post id: {pk}",
-                request.data,
+                lambda: request.data,
             )
             if not pk:
                 return throw_error(
@@ -181,13 +311,13 @@ class PostAPIView(APIView):
             data = request.data.copy()
             # Convert stringified FormData (js)
             convert_str_to_complex_obj(
-                show_debugging, data, ["tools", "materials"]
+                SHOW_DEBUGGING, data, ["tools", "materials"]
             )
 
             # Return an error if the user is not mature enough to create post
             if not self.user_is_mature() and self.is_harmful(data):
                 log_debug(
-                    show_debugging,
+                    SHOW_DEBUGGING,
                     "User is not old enough to update this post "
                     + "because it contains harmful content.",
                     "",
@@ -216,12 +346,11 @@ class PostAPIView(APIView):
         Returns `True` if the user is mature and older than the
         AGE_RESTRICTED_CONTENT_AGE constant variable, `False` otherwise.
         """
-        show_debugging = True
 
         # User is a guest and assumed to not be mature
         if not self.request.user.is_authenticated:
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 "User is assumed to be immature because they're "
                 + "not authenticated",
                 "",
@@ -231,7 +360,7 @@ class PostAPIView(APIView):
         profile = getattr(self.request.user, "profile", None)
         if not profile:
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 "Checking is user is mature but profile is missing.",
                 "",
             )
@@ -243,7 +372,7 @@ class PostAPIView(APIView):
         # User is not mature
         if user_age < age_restriction:
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 f"User is {user_age} old and the age restriction "
                 + f"is {age_restriction} so user is NOT mature.",
                 "",
@@ -251,7 +380,7 @@ class PostAPIView(APIView):
             return False
 
         log_debug(
-            show_debugging,
+            SHOW_DEBUGGING,
             f"User is {user_age} old and the age restriction "
             + f"is {age_restriction} so user is mature.",
             "",
@@ -282,7 +411,6 @@ class PostAPIView(APIView):
         Filters posts based on the user's authentication and maturity.
         Guests and users under 16 can only see safe posts.
         """
-        show_debugging = True
 
         def is_harmful(posts):
             """Helper function to check if a post contains
@@ -307,14 +435,14 @@ class PostAPIView(APIView):
         # Handle single instance (not a queryset)
         if isinstance(posts, Post):
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 "User requests a single post",
                 "",
             )
             # The user is a guest, filter out harmful content
             if not self.request.user.is_authenticated:
                 log_debug(
-                    show_debugging,
+                    SHOW_DEBUGGING,
                     "User is a guest, will return a safe post",
                     "",
                 )
@@ -323,7 +451,7 @@ class PostAPIView(APIView):
                 return posts
             if not self.user_is_mature():
                 log_debug(
-                    show_debugging,
+                    SHOW_DEBUGGING,
                     "User is authenticated but not mature, returning "
                     + "a safe post",
                     "",
@@ -338,7 +466,7 @@ class PostAPIView(APIView):
         # The user is a guest, filter out harmful content
         if not self.request.user.is_authenticated:
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 "User is not authenticated, showing only safe posts.",
                 "",
             )
@@ -350,7 +478,7 @@ class PostAPIView(APIView):
         # Authenticated but not mature
         if not self.user_is_mature():
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 "User is not mature enough to post this post "
                 + "because harmful content was found in it.",
                 "",
@@ -362,13 +490,39 @@ class PostAPIView(APIView):
             )
         # User is authenticated and mature, return all posts
         log_debug(
-            show_debugging,
+            SHOW_DEBUGGING,
             "Returning all posts because the user is authenticated "
             + "and mature."
             "",
         )
         return posts
 
+    def visibility_class(self):
+        """
+        Returns the viewer's visibility class, which decides the posts
+        they may see: guests and minors only see safe posts.
+        """
+        if not self.request.user.is_authenticated:
+            return GUEST
+        return ADULT if self.user_is_mature() else MINOR
+
+    def paginate(self, ids):
+        """
+        Returns the ids of the requested page, for filter requests with
+        a "page_size" (and "page", the first by default), all ids
+        otherwise.
+
+        Raises:
+            ValueError: If the page or page size isn't a positive number.
+        """
+        page_size = self.request.data.get("page_size")
+        if page_size is None:
+            return ids
+        page, page_size = int(self.request.data.get("page", 1)), int(page_size)
+        if page < 1 or page_size < 1:
+            raise ValueError(f"page {page} of size {page_size}")
+        return ids[(page - 1) * page_size : page * page_size]
+
     def filter_posts(self, filters):
         """
         Filters posts based on the filters provided in JSON.
@@ -381,6 +535,7 @@ class PostAPIView(APIView):
         view = filters.get("view", "show_all_posts")
         also_search_in = filters.get("also_search_in", [])
         search_query = filters.get("search_query", [])
+        tags = filter_tags(filters.get("tags"))
         followers = filters.get("followers", [])
 
         if user_id:
@@ -389,7 +544,9 @@ class PostAPIView(APIView):
                 posts = posts.filter(user__id=user_id)
             else:
                 # Filter by username (case-insensitive)
-                posts = posts.filter(user__username__iexact=user_id)
+                posts = posts.filter(
+                    username_iexact(user_id, "user__username")
+                )
         if search_query:
             search_conditions = Q()
             for term in search_query:
@@ -398,7 +555,7 @@ class PostAPIView(APIView):
                 )
                 # Search in additional fields
                 if "tags" in also_search_in:
-                    search_conditions |= Q(tags__icontains=term)
+                    search_conditions |= tagged(term)
                 if "materials" in also_search_in:
                     search_conditions |= Q(materials__name__icontains=term)
                 if "tools" in also_search_in:
@@ -406,49 +563,58 @@ class PostAPIView(APIView):
 
                 posts = posts.filter(search_conditions)
 
+            # Matching several tools or materials of a post would
+            # otherwise return the post several times
+            if "materials" in also_search_in or "tools" in also_search_in:
+                posts = posts.distinct()
+
+        # Posts with all of the tags
+        for tag in tags:
+            posts = posts.filter(tagged(tag))
+
         if view == "only_users_you_follow" and followers:
             posts = posts.filter(user__username__in=followers)
 
-        # Sorting
-        if sort_by == "date":
-            posts = posts.order_by("-created_at")
-        elif sort_by == "likes":
-            posts = posts.annotate(like_count=Count("likes")).order_by(
-                "-like_count"
-            )
-        elif sort_by == "comments":
-            posts = posts.annotate(
-                comment_count=Count("post_comment")
-            ).order_by("-comment_count")
+        # Sorting (unknown sorts leave the posts unordered)
+        if sort_by in FILTER_SORTS:
+            posts = FILTER_SORTS[sort_by](posts)
 
         return posts
 
 
 class LikeView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [LikeThrottle]
 
     def post(self, request, post_id):
         try:
-            try:
-                post = Post.objects.get(id=post_id)
-            except Post.DoesNotExist:
-                return throw_error(
-                    404,
-                    "Post doesn't exist.",
-                    log="User tried to like a post that doesn't exist.",
-                )
-            # Check if the like already exists
-            if Like.objects.filter(post=post, user=request.user).exists():
+            # One statement: inserted unless the post is missing or
+            # already liked (unique_like)
+            like = insert_on_conflict(
+                Like,
+                {
+                    "post": post_id,
+                    "user": request.user.id,
+                    "created_at": timezone.now(),
+                },
+                unique_fields=["post", "user"],
+                only_if=Post.objects.filter(id=post_id),
+            )
+            if like is None:
+                if not Post.objects.filter(id=post_id).exists():
+                    return throw_error(
+                        404,
+                        "Post doesn't exist.",
+                        log="User tried to like a post that doesn't exist.",
+                    )
                 return throw_error(
                     400,
                     "You have already liked this post",
                     log="Rejected user who tried to like an already "
                     + "liked post.",
                 )
-            # Create the like
-            like = Like.objects.create(post=post, user=request.user)
             return Response(
-                {"message": "Post liked successfully!", "id": like.id},
+                {"message": "Post liked successfully!", "id": like[0]},
                 status=201,
             )
         except Exception as e:
@@ -486,10 +652,9 @@ class DeletePostView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, pk=None):
-        show_debugging = True
         try:
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 f"DELETE request! (posts) post id: {pk}",
                 "",
             )
@@ -535,31 +700,12 @@ class RatingView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, post_id=None):
-        show_debugging = True
         try:
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 "User submitted a rating",
                 type(request.data),
             )
-            try:
-                post = Post.objects.get(id=post_id)
-            except Post.DoesNotExist:
-                return throw_error(
-                    404,
-                    "Post doesn't exist.",
-                    log="User tried to rate a post that doesn't exist.",
-                )
-
-            # Prevent users from rating their own posts
-            if post.user == request.user:
-                return throw_error(
-                    403,
-                    "You cannot rate your own post.",
-                    log="User tried to rate their own post, rejected "
-                    + "request",
-                )
-
             # Extract rating values
             saves_money = request.data.get("saves_money", 0)
             saves_time = request.data.get("saves_time", 0)
@@ -576,27 +722,70 @@ class RatingView(APIView):
                     + "0 and 100.",
                 )
 
-            # Update or create the rating
-            rating, created = Rating.objects.update_or_create(
-                post=post,
-                user=request.user,
-                defaults={
-                    "saves_money": saves_money,
-                    "saves_time": saves_time,
-                    "is_useful": is_useful,
-                },
-            )
+            values = {
+                "saves_money": saves_money,
+                "saves_time": saves_time,
+                "is_useful": is_useful,
+            }
+            with transaction.atomic():
+                # The rating being replaced, its values are taken off the
+                # post's figures
+                previous = (
+                    Rating.objects.select_for_update()
+                    .filter(post_id=post_id, user=request.user)
+                    .values_list(*RATING_FIELDS)
+                    .first()
+                )
+                # One statement creates or updates the rating
+                # (unique_rating), unless the post is missing or the
+                # user's own
+                now = timezone.now()
+                rating = insert_on_conflict(
+                    Rating,
+                    {
+                        "post": post_id,
+                        "user": request.user.id,
+                        **values,
+                        "created_at": now,
+                        "updated_at": now,
+                    },
+                    unique_fields=["post", "user"],
+                    update_fields=[*RATING_FIELDS, "updated_at"],
+                    only_if=Post.objects.filter(id=post_id).exclude(
+                        user=request.user
+                    ),
+                    returning=["created_at", "updated_at"],
+                )
+                if rating is None:
+                    if not Post.objects.filter(id=post_id).exists():
+                        return throw_error(
+                            404,
+                            "Post doesn't exist.",
+                            log="User tried to rate a post that doesn't "
+                            + "exist.",
+                        )
+                    # Prevent users from rating their own posts
+                    return throw_error(
+                        403,
+                        "You cannot rate your own post.",
+                        log="User tried to rate their own post, rejected "
+                        + "request",
+                    )
+                # Updated ratings keep their creation date
+                created_at, updated_at = rating
+                if previous is None and created_at != updated_at:
+                    # A concurrent request created the rating after it
+                    # was read, its values are unknown
+                    refresh_rating_stats([post_id])
+                else:
+                    record_rating(post_id, values, previous)
 
             return Response(
                 {
                     "message": "Rating submitted successfully!",
-                    "ratings": {
-                        "saves_money": rating.saves_money,
-                        "saves_time": rating.saves_time,
-                        "is_useful": rating.is_useful,
-                    },
+                    "ratings": values,
                 },
-                status=201 if created else 200,
+                status=201 if created_at == updated_at else 200,
             )
         except Exception as e:
             return throw_error(500, "Unable to rate post.", log=str(e))
@@ -604,6 +793,7 @@ class RatingView(APIView):
 
 class CommentView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CommentThrottle]
 
     def get(self, request, post_id=None):
         """
@@ -614,9 +804,11 @@ class CommentView(APIView):
                 return throw_error(400, "Post ID is required.")
 
             post = Post.objects.get(id=post_id)
-            comments = post.post_comment.all()
+            comments = post.post_comment.order_by("created_at")
             serializer = CommentSerializer(comments, many=True)
-            return Response(serializer.data, status=200)
+            with timed("serialize"):
+                data = serializer.data
+            return Response(data, status=200)
 
         except Post.DoesNotExist:
             return throw_error(404, "Post not found.")
@@ -627,7 +819,6 @@ class CommentView(APIView):
         """
         Allows authenticated users to add a comment to a post.
         """
-        show_debugging = True
         try:
             # Ensure post_id is provided
             if not post_id:
@@ -643,7 +834,7 @@ class CommentView(APIView):
             data = request.data.copy()
             data["post"] = post.id
 
-            log_debug(show_debugging, "User submitted a comment", data)
+            log_debug(SHOW_DEBUGGING, "User submitted a comment", data)
 
             serializer = CommentSerializer(
                 data=data, context={"request": request}
@@ -660,3 +851,209 @@ class CommentView(APIView):
             return throw_error(404, "Post not found.")
         except Exception as e:
             return throw_error(500, "Unable to add comment.", log=str(e))
+
+
+class TagView(APIView):
+    """
+    Returns the most used tags with their number of posts, at most
+    `?limit=` (50 by default).
+    """
+
+    permission_classes = [AllowAny]
+    http_method_names = ["get"]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", TAG_COUNT_LIMIT))
+            if not 0 < limit <= TAG_COUNT_LIMIT:
+                raise ValueError(f"limit is {limit}")
+        except ValueError as e:
+            return throw_error(
+                400,
+                f"The limit must be a number from 1 to {TAG_COUNT_LIMIT}.",
+                log=str(e),
+            )
+        try:
+            return Response(list(tag_counts(limit)), status=200)
+        except Exception as e:
+            return throw_error(500, "Unable to retrieve tags.", log=str(e))
+
+
+class AutocompleteView(APIView):
+    """
+    Suggests usernames, tags, post titles and tool and material names
+    starting with `?q=`, for the search box. `?kinds=users,tags` limits
+    the kinds of suggestions, `?limit=` the suggestions per kind.
+    """
+
+    permission_classes = [AllowAny]
+    http_method_names = ["get"]
+    throttle_classes = [AutocompleteThrottle]
+
+    def get(self, request):
+        params = request.query_params
+        kinds = [kind for kind in params.get("kinds", "").split(",") if kind]
+        unknown = set(kinds) - set(SUGGESTERS)
+        if unknown:
+            return throw_error(
+                400,
+                "Unknown kinds of suggestions: "
+                + ", ".join(sorted(unknown))
+                + ".",
+            )
+        try:
+            limit = int(params.get("limit", AUTOCOMPLETE_LIMIT))
+            if not 0 < limit <= AUTOCOMPLETE_MAX_LIMIT:
+                raise ValueError(f"limit is {limit}")
+        except ValueError as e:
+            return throw_error(
+                400,
+                "The limit must be a number from 1 to "
+                + f"{AUTOCOMPLETE_MAX_LIMIT}.",
+                log=str(e),
+            )
+
+        try:
+            # Titles of harmful posts are only suggested to adults
+            profile = getattr(request.user, "profile", None)
+            safe_only = (
+                profile is None
+                or check_age(profile.birth_date)
+                < GLOBAL_VALIDATION_RULES["AGE_RESTRICTED_CONTENT_AGE"]
+            )
+            return Response(
+                suggest(params.get("q", ""), kinds, limit, safe_only),
+                status=200,
+            )
+        except Exception as e:
+            return throw_error(
+                500, "Unable to retrieve suggestions.", log=str(e)
+            )
+
+
+class SimilarPostsView(PostAPIView):
+    """
+    Returns the posts most similar to a post by their tools, materials
+    and tags, most similar first, each with its "similarity" from 0 to
+    1. The lists are precomputed (see apps/posts/similarity.py), age
+    restrictions are the ones of PostAPIView.
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request, pk=None):
+        try:
+            post = Post.objects.get(pk=pk)
+        except Post.DoesNotExist:
+            return throw_error(404, "Post not found.")
+        try:
+            self.filter_age_restricted_content(post)
+        except Exception:
+            return age_restricted_error()
+
+        try:
+            scores = dict(
+                SimilarPost.objects.filter(post=post)
+                .order_by("-score", "similar_id")
+                .values_list("similar_id", "score")
+            )
+            posts = {
+                similar.pk: similar
+                for similar in with_serializer_data(
+                    self.filter_age_restricted_content(
+                        Post.objects.filter(pk__in=scores)
+                    ),
+                    request.user,
+                )
+            }
+            serializer = PostSerializer(
+                [posts[pk] for pk in scores if pk in posts],
+                many=True,
+                context={"request": request},
+            )
+            with timed("serialize"):
+                data = serializer.data
+            for item in data:
+                item["similarity"] = round(scores[item["id"]], 4)
+            return Response(data, status=200)
+        except Exception as e:
+            return throw_error(
+                500, "Unable to retrieve similar posts.", log=str(e)
+            )
+
+
+class RatingDistributionView(PostAPIView):
+    """
+    Returns the figures of a post's ratings: their number, the average
+    and the histogram of each dimension (ratings per bucket of values,
+    bounds in "buckets"). Read from figures kept up to date when ratings
+    are written (see apps/posts/ratings.py).
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request, pk=None):
+        try:
+            post = Post.objects.get(pk=pk)
+        except Post.DoesNotExist:
+            return throw_error(404, "Post not found.")
+        try:
+            self.filter_age_restricted_content(post)
+        except Exception:
+            return age_restricted_error()
+
+        try:
+            return Response(rating_distribution(post), status=200)
+        except Exception as e:
+            return throw_error(
+                500, "Unable to retrieve the ratings.", log=str(e)
+            )
+
+
+class RatingLeaderboardView(PostAPIView):
+    """
+    Returns the posts with the best average rating of `?by=`
+    (saves_money, saves_time or is_useful), at most `?limit=` (10 by
+    default) with at least `?min_ratings=` ratings (1 by default).
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request, pk=None):
+        params = request.query_params
+        field = params.get("by", "")
+        if field not in RATING_FIELDS:
+            return throw_error(
+                400, "Rank posts by one of: " + ", ".join(RATING_FIELDS) + "."
+            )
+        try:
+            limit = int(params.get("limit", LEADERBOARD_LIMIT))
+            min_ratings = int(params.get("min_ratings", 1))
+            if not 0 < limit <= LEADERBOARD_MAX_LIMIT:
+                raise ValueError(f"limit is {limit}")
+        except ValueError as e:
+            return throw_error(
+                400,
+                "The limit must be a number from 1 to "
+                + f"{LEADERBOARD_MAX_LIMIT} and min_ratings a number.",
+                log=str(e),
+            )
+
+        try:
+            posts = leaderboard(
+                self.filter_age_restricted_content(Post.objects.all()),
+                field,
+                min_ratings,
+            )
+            serializer = PostSerializer(
+                with_serializer_data(posts, request.user)[:limit],
+                many=True,
+                context={"request": request},
+            )
+            with timed("serialize"):
+                data = serializer.data
+            return Response(data, status=200)
+        except Exception as e:
+            return throw_error(
+                500, "Unable to retrieve the leaderboard.", log=str(e)
+            )
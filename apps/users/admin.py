@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Profile, User, Follow
+from .models import Profile, User, Follow, AccountDeletion
 
 admin.site.register(Profile)
 admin.site.register(User)
 admin.site.register(Follow)
+admin.site.register(AccountDeletion)
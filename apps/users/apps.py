@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.users"
+
+    def ready(self):
+        """
+        Import signals to queue the images of deleted profiles for
+        deletion from storage.
+        """
+        # Supress unused import warnings
+        # pylint: disable=unused-import,import-outside-toplevel
+        import apps.users.signals  # noqa: F401
@@ -0,0 +1,248 @@
+"""
+Background purge of deleted accounts.
+
+Deleting a user in one go makes Django load every related row into
+memory before cascading, which can time out the request and hold locks
+for long. Instead the account is deactivated right away and an
+`AccountDeletion` job deletes its rows stage by stage, a batch per
+transaction, children before parents so every batch cascades to
+(almost) nothing. Each stage deletes whatever is left of it, so a job
+interrupted at any point is resumed by running it again.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from apps.posts.models import (
+    Post,
+    PostTag,
+    PostToken,
+    SimilarPost,
+    Tool,
+    Material,
+    Like,
+    Rating,
+    Comment,
+)
+from .models import AccountDeletion, Follow
+
+User = get_user_model()
+deletion_logger = logging.getLogger("app.account_deletion")
+
+
+def _authored(model, user_id):
+    """Rows of the user, and rows of others on the user's posts."""
+    return model.objects.filter(Q(user_id=user_id) | Q(post__user_id=user_id))
+
+
+def _categories(field, user_id):
+    """Links of the user's posts to harmful categories."""
+    through = getattr(Post, field).through
+    return through.objects.filter(post__user_id=user_id)
+
+
+# Stages in deletion order, each with the rows it deletes. Refresh
+# tokens aren't deleted: that would delete their blacklist entries and
+# make them valid again. Deleting the user unlinks them, and
+# `flushexpiredtokens` deletes them once they expire.
+PURGE_STAGES = {
+    "follows": lambda user_id: Follow.objects.filter(
+        Q(follower_id=user_id) | Q(following_id=user_id)
+    ),
+    "likes": lambda user_id: _authored(Like, user_id),
+    "ratings": lambda user_id: _authored(Rating, user_id),
+    "comments": lambda user_id: _authored(Comment, user_id),
+    "tools": lambda user_id: Tool.objects.filter(post__user_id=user_id),
+    "materials": lambda user_id: Material.objects.filter(
+        post__user_id=user_id
+    ),
+    "tags": lambda user_id: PostTag.objects.filter(post__user_id=user_id),
+    "post_tokens": lambda user_id: PostToken.objects.filter(
+        post__user_id=user_id
+    ),
+    # The posts leave the lists of others when deleted, which refills them
+    "similar_posts": lambda user_id: SimilarPost.objects.filter(
+        post__user_id=user_id
+    ),
+    "harmful_tool_categories": lambda user_id: _categories(
+        "harmful_tool_categories", user_id
+    ),
+    "harmful_material_categories": lambda user_id: _categories(
+        "harmful_material_categories", user_id
+    ),
+    "posts": lambda user_id: Post.objects.filter(user_id=user_id),
+    # The profile and other one-to-one rows cascade from the user
+    "account": lambda user_id: User.objects.filter(pk=user_id),
+}
+
+
+def blacklist_tokens(user_id):
+    """Blacklists the refresh tokens of a user that aren't yet."""
+    BlacklistedToken.objects.bulk_create(
+        [
+            BlacklistedToken(token_id=token_id)
+            for token_id in OutstandingToken.objects.filter(
+                user_id=user_id, blacklistedtoken__isnull=True
+            ).values_list("pk", flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def request_account_deletion(user):
+    """
+    Deactivates the user and blacklists their refresh tokens, which logs
+    them out everywhere, and creates the job that purges their data.
+    The in-process worker is started once the transaction commits (if
+    ACCOUNT_DELETION["IN_PROCESS"]).
+
+    Returns:
+        AccountDeletion: The job.
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        blacklist_tokens(user.pk)
+        job, _ = AccountDeletion.objects.get_or_create(
+            user_id=user.pk, defaults={"username": user.username}
+        )
+        if settings.ACCOUNT_DELETION["IN_PROCESS"]:
+            transaction.on_commit(lambda: start_worker(job.pk))
+    return job
+
+
+def start_worker(job_id):
+    """Runs the job in a background thread of this process."""
+    threading.Thread(
+        target=_run_in_thread,
+        args=(job_id,),
+        name=f"account-deletion-{job_id}",
+        daemon=True,
+    ).start()
+
+
+def _run_in_thread(job_id):
+    try:
+        run_account_deletion(job_id)
+    finally:
+        # The thread's own database connection
+        connection.close()
+
+
+def claim(job_id):
+    """
+    Takes the lease of a pending job, or of a running one whose worker
+    stopped renewing it (e.g. because its process died).
+
+    Returns:
+        bool: True if this worker now owns the job.
+    """
+    now = timezone.now()
+    options = settings.ACCOUNT_DELETION
+    return bool(
+        AccountDeletion.objects.filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+            pk=job_id,
+            status__in=[
+                AccountDeletion.Status.PENDING,
+                AccountDeletion.Status.RUNNING,
+            ],
+            attempts__lt=options["MAX_ATTEMPTS"],
+        ).update(
+            status=AccountDeletion.Status.RUNNING,
+            attempts=F("attempts") + 1,
+            locked_until=now + timedelta(seconds=options["LEASE_SECONDS"]),
+        )
+    )
+
+
+def _progress(job_id, stage, deleted):
+    """Records a deleted batch and renews the lease."""
+    AccountDeletion.objects.filter(pk=job_id).update(
+        stage=stage,
+        deleted_rows=F("deleted_rows") + deleted,
+        locked_until=timezone.now()
+        + timedelta(seconds=settings.ACCOUNT_DELETION["LEASE_SECONDS"]),
+    )
+
+
+def purge_stage(rows, batch_size):
+    """
+    Deletes `rows` a batch per transaction.
+
+    Yields:
+        int: The rows deleted by each batch, cascades included.
+    """
+    model = rows.model
+    while True:
+        with transaction.atomic():
+            ids = list(rows.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return
+            deleted, _ = model.objects.filter(pk__in=ids).delete()
+        yield deleted
+
+
+def run_account_deletion(job_id, batch_size=None):
+    """
+    Purges the account of a job, resuming from its current stage.
+
+    Args:
+        job_id (int): The AccountDeletion's id.
+        batch_size (int, optional): Rows per transaction, defaults to
+            ACCOUNT_DELETION["BATCH_SIZE"].
+
+    Returns:
+        bool: True if the job is done, False if another worker owns it
+        or it failed (the error is kept on the job).
+    """
+    if not claim(job_id):
+        return False
+    job = AccountDeletion.objects.get(pk=job_id)
+    batch_size = batch_size or settings.ACCOUNT_DELETION["BATCH_SIZE"]
+    stages = list(PURGE_STAGES)
+    # Stages before the recorded one are complete
+    start = stages.index(job.stage) if job.stage in PURGE_STAGES else 0
+
+    try:
+        for stage in stages[start:]:
+            rows = PURGE_STAGES[stage](job.user_id)
+            for deleted in purge_stage(rows, batch_size):
+                _progress(job_id, stage, deleted)
+            _progress(job_id, stage, 0)
+    except Exception as e:
+        deletion_logger.exception(
+            "Account deletion failed", extra={"job_id": job_id}
+        )
+        # `attempts` counts this run since the job was claimed
+        failed = job.attempts >= settings.ACCOUNT_DELETION["MAX_ATTEMPTS"]
+        AccountDeletion.objects.filter(pk=job_id).update(
+            status=(
+                AccountDeletion.Status.FAILED
+                if failed
+                else AccountDeletion.Status.PENDING
+            ),
+            last_error=str(e),
+            locked_until=None,
+        )
+        return False
+
+    AccountDeletion.objects.filter(pk=job_id).update(
+        status=AccountDeletion.Status.DONE,
+        locked_until=None,
+        finished_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    deletion_logger.info(
+        "Account deleted",
+        extra={"job_id": job_id, "deleted_rows": job.deleted_rows},
+    )
+    return True
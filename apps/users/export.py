@@ -0,0 +1,137 @@
+"""
+Export of a user's data as NDJSON records.
+
+Every record is one line: `{"type": ..., "cursor": ..., "data": ...}`.
+Records come section by section (posts with their tools and materials,
+then comments, likes and ratings), each in id order, so the cursor of
+the last record received is enough to resume an interrupted export.
+"""
+
+from django.db.models import Prefetch
+from apps.posts.models import Post, Tool, Material, Comment, Like, Rating
+from static.utils.environment import image_url
+from static.utils.streaming import STREAM_CHUNK_SIZE
+
+POST_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "instructions",
+    "tags",
+    "public",
+    "harmful_post",
+    "default_image_index",
+    "created_at",
+]
+ITEM_FIELDS = ["quantity", "name", "description"]
+
+
+def _posts(user):
+    return Post.objects.filter(user=user).prefetch_related(
+        Prefetch("tools", queryset=Tool.objects.order_by("id")),
+        Prefetch("materials", queryset=Material.objects.order_by("id")),
+        "harmful_tool_categories",
+        "harmful_material_categories",
+    )
+
+
+def _post_data(post):
+    data = {field: getattr(post, field) for field in POST_FIELDS}
+    data["image"] = image_url(post.image)
+    data["tools"] = [
+        {field: getattr(tool, field) for field in ITEM_FIELDS}
+        for tool in post.tools.all()
+    ]
+    data["materials"] = [
+        {field: getattr(material, field) for field in ITEM_FIELDS}
+        for material in post.materials.all()
+    ]
+    data["harmful_tool_categories"] = [
+        category.category for category in post.harmful_tool_categories.all()
+    ]
+    data["harmful_material_categories"] = [
+        category.category
+        for category in post.harmful_material_categories.all()
+    ]
+    return data
+
+
+# Sections in export order: record type, rows of the user and how a row
+# becomes data. Rows without a converter are fetched as dicts.
+EXPORT_SECTIONS = {
+    "posts": ("post", _posts, _post_data),
+    "comments": (
+        "comment",
+        lambda user: Comment.objects.filter(user=user).values(
+            "id", "post_id", "text", "created_at"
+        ),
+        None,
+    ),
+    "likes": (
+        "like",
+        lambda user: Like.objects.filter(user=user).values(
+            "id", "post_id", "created_at"
+        ),
+        None,
+    ),
+    "ratings": (
+        "rating",
+        lambda user: Rating.objects.filter(user=user).values(
+            "id",
+            "post_id",
+            "saves_money",
+            "saves_time",
+            "is_useful",
+            "created_at",
+            "updated_at",
+        ),
+        None,
+    ),
+}
+
+
+def parse_cursor(cursor):
+    """
+    Parses a cursor of the form `<section>:<id>`.
+
+    Returns:
+        tuple: The section and the last id exported from it.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    section, _, last_id = cursor.partition(":")
+    if section not in EXPORT_SECTIONS or not last_id.isdigit():
+        raise ValueError(f"Invalid export cursor: {cursor!r}")
+    return section, int(last_id)
+
+
+def export_records(user, cursor=None):
+    """
+    Yields the user's records, starting after `cursor` if given.
+
+    Rows are fetched `STREAM_CHUNK_SIZE` at a time (through server-side
+    cursors on PostgreSQL), so memory use doesn't grow with the size of
+    the account.
+
+    Args:
+        user (User): The user whose data is exported.
+        cursor (str, optional): The cursor of the last record received.
+
+    Yields:
+        dict: The records.
+    """
+    sections = list(EXPORT_SECTIONS)
+    start, last_id = parse_cursor(cursor) if cursor else (sections[0], 0)
+
+    for section in sections[sections.index(start) :]:
+        record_type, rows, to_data = EXPORT_SECTIONS[section]
+        rows = rows(user).filter(id__gt=last_id).order_by("id")
+        for row in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+            data = to_data(row) if to_data else row
+            yield {
+                "type": record_type,
+                "cursor": f"{section}:{data['id']}",
+                "data": data,
+            }
+        last_id = 0
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from apps.users.deletion import run_account_deletion
+from apps.users.models import AccountDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        "Purges the data of deleted accounts: pending jobs, and jobs "
+        "whose worker died (e.g. on a restart) are resumed where they "
+        "stopped. Meant to run periodically, e.g. from a scheduler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.ACCOUNT_DELETION["BATCH_SIZE"],
+            help="Rows deleted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        jobs = AccountDeletion.objects.filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=timezone.now()),
+            status__in=[
+                AccountDeletion.Status.PENDING,
+                AccountDeletion.Status.RUNNING,
+            ],
+            attempts__lt=settings.ACCOUNT_DELETION["MAX_ATTEMPTS"],
+        ).order_by("created_at")
+
+        done = failed = 0
+        for job_id in jobs.values_list("pk", flat=True):
+            if run_account_deletion(job_id, options["batch_size"]):
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {done} account(s).")
+            if not failed
+            else self.style.WARNING(
+                f"Purged {done} account(s), {failed} not finished."
+            )
+        )
@@ -1,9 +1,11 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Q, Value
 from cloudinary.models import CloudinaryField
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 from static.utils.constants import GLOBAL_VALIDATION_RULES
 from static.utils.environment import is_development
 from static.utils.helpers import check_age
@@ -23,6 +25,33 @@ class User(AbstractUser):
         email, and password.
     """
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive lookups, see username_iexact()
+            models.Index(Lower("username"), name="user_username_lower_idx")
+        ]
+
+
+# pylint: disable-next=protected-access
+User._meta.get_field("username").register_lookup(Lower)
+
+
+def username_iexact(username, field="username"):
+    """
+    Matches a username ignoring case, through the index on
+    lower(username). Unlike `iexact`, which is LIKE on SQLite and
+    compares UPPER() on Postgres, it can use the index.
+
+    Args:
+        username (str): The username to match.
+        field (str): The path to the username field, e.g.
+            "user__username".
+
+    Returns:
+        Q: The filter.
+    """
+    return Q(**{f"{field}__lower": Lower(Value(username))})
+
 
 class Profile(models.Model):
     """
@@ -88,3 +117,48 @@ class Follow(models.Model):
 
     def __str__(self):
         return f"{self.follower.username} follows {self.following.username}"
+
+
+class AccountDeletion(models.Model):
+    """
+    Tracks the background purge of a deleted account's data.
+
+    The account is deactivated when the user deletes it, then its rows
+    are deleted stage by stage, in batches (see apps/users/deletion.py).
+
+    Attributes:
+        user_id (BigIntegerField): The deleted user's id, not a foreign
+            key since the job outlives the user.
+        username (CharField): The deleted user's username.
+        status (CharField): Pending, running, done or failed.
+        stage (CharField): The stage being purged.
+        deleted_rows (PositiveBigIntegerField): Rows deleted so far.
+        attempts (PositiveIntegerField): Runs of the job so far.
+        last_error (TextField): Why the last run failed.
+        locked_until (DateTimeField): End of the running worker's
+            lease, renewed after every batch. Once it's passed the job
+            can be resumed by another worker.
+    """
+
+    class Status(models.TextChoices):  # pylint: disable=too-many-ancestors
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    user_id = models.BigIntegerField(unique=True)
+    username = models.CharField(max_length=150)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    stage = models.CharField(max_length=50, blank=True)
+    deleted_rows = models.PositiveBigIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Deletion of {self.username} ({self.status})"
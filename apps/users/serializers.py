@@ -1,10 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate
+from django.db import transaction
 from static.utils.environment import image_url
+from apps.posts.images import enqueue_orphaned_images
 from static.utils.validators import validate_image_extension
 from .constants import VALIDATION_RULES
-from .models import Profile
+from .models import Profile, username_iexact
 
 
 # Securely hash passwords before storing in database
@@ -25,8 +27,12 @@ class ProfileImageUpdateSerializer(serializers.ModelSerializer):
         return validate_image_extension(image)
 
     def update(self, instance, validated_data):
-        instance.image = validated_data["image"]
-        instance.save()
+        # The replaced file is deleted from storage later, if the new
+        # one is saved
+        with transaction.atomic():
+            enqueue_orphaned_images(instance.image)
+            instance.image = validated_data["image"]
+            instance.save()
         return instance
 
 
@@ -119,7 +125,7 @@ class SignUpSerializer(serializers.ModelSerializer):
             )
 
         # Check if username already exists, ignoring case
-        if User.objects.filter(username__iexact=normalized_username).exists():
+        if User.objects.filter(username_iexact(normalized_username)).exists():
             raise serializers.ValidationError(
                 {"username": "This username is already taken."}
             )
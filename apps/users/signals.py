@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from apps.posts.images import enqueue_orphaned_images
+from .models import Profile
+
+
+@receiver(post_delete, sender=Profile)
+def enqueue_profile_image(sender, instance, **kwargs):
+    """
+    Queues the image of a deleted profile (e.g. of a deleted account)
+    for deletion from storage.
+    """
+    # pylint: disable=unused-argument
+    enqueue_orphaned_images(instance.image)
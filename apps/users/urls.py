@@ -9,6 +9,7 @@ from .views import (
     LogIn,
     LogOut,
     DeleteAccount,
+    ExportAccount,
     UpdateProfileImage,
     FollowView,
 )
@@ -26,6 +27,7 @@ urlpatterns = [
     path("login/", LogIn.as_view(), name="login"),
     path("logout/", LogOut.as_view(), name="logout"),
     path("delete-account/", DeleteAccount.as_view(), name="delete_account"),
+    path("export/", ExportAccount.as_view(), name="export_account"),
     path("follow/<int:pk>/", FollowView.as_view(), name="follow-create"),
     path(
         "api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"
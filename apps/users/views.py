@@ -8,9 +8,20 @@ from rest_framework.permissions import (
 )
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
-from static.utils.logging import log_debug
-from .models import Profile as ProfileModel, Follow
+from static.utils.logging import log_debug, debug_switch
+from static.utils.sql import insert_on_conflict
+from static.utils.streaming import ndjson_download
+from static.utils.throttling import (
+    EarlyThrottleMixin,
+    LogInThrottle,
+    SignUpThrottle,
+)
+from static.utils.timing import timed
+from .deletion import request_account_deletion
+from .export import export_records, parse_cursor
+from .models import Profile as ProfileModel, Follow, username_iexact
 from .serializers import (
     ProfileSerializer,
     SignUpSerializer,
@@ -20,6 +31,7 @@ from .serializers import (
 )
 
 User = get_user_model()
+SHOW_DEBUGGING = debug_switch(__name__)
 
 
 class Profile(APIView):
@@ -32,40 +44,44 @@ class Profile(APIView):
     serializer_class = ProfileSerializer
 
     def get_queryset(self):
-        return ProfileModel.objects.all()
+        return ProfileModel.objects.select_related("user")
 
     def get(self, request, identifier=None):
-        show_debugging = True
         try:
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 "Loading a user's profile, received identifier:",
                 identifier,
             )
             # Get the user's profile if there's no identifier in the
             # request.
             if not identifier and request.user:
-                profile = ProfileModel.objects.get(user=request.user)
+                profile = ProfileModel.objects.select_related("user").get(
+                    user=request.user
+                )
             else:
                 # Get a specific user's profile when there's an identifier
                 # in the request.
                 if str(identifier).isdigit():
                     # Lookup profile by user ID
                     profile = get_object_or_404(
-                        ProfileModel, user__id=identifier
+                        self.get_queryset(), user__id=identifier
                     )
                 else:
                     # Lookup profile by username
                     profile = get_object_or_404(
-                        ProfileModel, user__username__iexact=identifier
+                        self.get_queryset(),
+                        username_iexact(identifier, "user__username"),
                     )
 
             # Serialize fields
             serializer = ProfileSerializer(
                 profile, context={"request": request}
             )
+            with timed("serialize"):
+                data = serializer.data
             # Return the profile
-            return Response(serializer.data, status=200)
+            return Response(data, status=200)
         # Handle profile doens't exist
         except ProfileModel.DoesNotExist:
             return throw_error(
@@ -82,12 +98,14 @@ class Profile(APIView):
             )
 
 
-class SignUp(APIView):
+class SignUp(EarlyThrottleMixin, APIView):
     """
     Registers a user account with username and password.
     """
 
     permission_classes = [AllowAny]
+    # Rejected before authentication and parsing
+    early_throttle_classes = [SignUpThrottle]
     # Only allow POST requests
     http_method_names = ["post"]
     # Enable multipart form-data parsing for images
@@ -95,7 +113,6 @@ class SignUp(APIView):
     serializer_class = SignUpSerializer
 
     def post(self, request):
-        show_debugging = True
         try:
             # Serialize incoming data
             serializer = SignUpSerializer(
@@ -110,7 +127,7 @@ class SignUp(APIView):
                 )
             # Save the user instance
             user = serializer.save()
-            log_debug(show_debugging, "User created", user.username)
+            log_debug(SHOW_DEBUGGING, "User created", user.username)
 
             # Generate JWT tokens
             refresh_token = RefreshToken.for_user(user)
@@ -132,12 +149,14 @@ class SignUp(APIView):
             )
 
 
-class LogIn(APIView):
+class LogIn(EarlyThrottleMixin, APIView):
     """
     Registers a user account with username and password.
     """
 
     permission_classes = [AllowAny]
+    # Rejected before authentication and parsing
+    early_throttle_classes = [LogInThrottle]
     # Only allow POST requests
     http_method_names = ["post"]
     # Enable multipart form-data parsing for images
@@ -145,7 +164,6 @@ class LogIn(APIView):
     serializer_class = LogInSerializer
 
     def post(self, request):
-        show_debugging = True
         try:
             # Serialize incoming data
             serializer = LogInSerializer(data=request.data)
@@ -157,7 +175,7 @@ class LogIn(APIView):
                     error_details=serializer.errors,
                 )
             user = serializer.validated_data["user"]
-            log_debug(show_debugging, "User authenticated", user.username)
+            log_debug(SHOW_DEBUGGING, "User authenticated", user.username)
 
             # Generate JWT tokens
             refresh_token = RefreshToken.for_user(user)
@@ -187,9 +205,8 @@ class LogOut(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        show_debugging = True
         try:
-            log_debug(show_debugging, "Logging out user", "")
+            log_debug(SHOW_DEBUGGING, "Logging out user", "")
             # Extract the refresh token from the request
             refresh_token = request.data.get("refresh")
             if not refresh_token:
@@ -198,7 +215,7 @@ class LogOut(APIView):
                     "Invalid token",
                     log=f"Invalid token: {str(refresh_token)}",
                 )
-            log_debug(show_debugging, "Received refresh token ", refresh_token)
+            log_debug(SHOW_DEBUGGING, "Received refresh token ", refresh_token)
 
             # Blacklist the refresh token
             try:
@@ -224,13 +241,13 @@ class LogOut(APIView):
 
 class DeleteAccount(APIView):
     """
-    Deletes a user's account.
+    Deletes a user's account: it's deactivated right away and its data
+    is purged by a background job (see apps/users/deletion.py).
     """
 
     permission_classes = [IsAuthenticated]
 
     def delete(self, request):
-        show_debugging = True
         try:
             # Serialize incoming data
             serializer = DeleteAccountSerializer(
@@ -244,13 +261,13 @@ class DeleteAccount(APIView):
                     error_details=serializer.errors,
                 )
             log_debug(
-                show_debugging,
+                SHOW_DEBUGGING,
                 "User is valid, proceeding with account deletion.",
                 "",
             )
-            # Delete the user's account
-            user = request.user
-            user.delete()
+            # Deactivate the account now and purge its data in the
+            # background
+            request_account_deletion(request.user)
 
             # Return a successful response
             return Response(
@@ -268,6 +285,41 @@ class DeleteAccount(APIView):
             )
 
 
+class ExportAccount(APIView):
+    """
+    Streams the user's posts, comments, likes and ratings as an NDJSON
+    download, gzipped with `?compress=gzip`. An interrupted export is
+    resumed by passing the cursor of the last record received as
+    `?cursor=`.
+    """
+
+    permission_classes = [IsAuthenticated]
+    http_method_names = ["get"]
+
+    def get(self, request):
+        try:
+            cursor = request.query_params.get("cursor")
+            if cursor:
+                try:
+                    parse_cursor(cursor)
+                except ValueError as e:
+                    return throw_error(400, "Invalid cursor.", log=str(e))
+            log_debug(
+                SHOW_DEBUGGING, "Exporting account, from cursor:", cursor
+            )
+            return ndjson_download(
+                export_records(request.user, cursor),
+                f"{request.user.username}-export.ndjson",
+                gzipped=request.query_params.get("compress") == "gzip",
+            )
+        except Exception as e:
+            return throw_error(
+                500,
+                "Something went wrong during the export.",
+                log=f"Unhandled exception: {str(e)}",
+            )
+
+
 class UpdateProfileImage(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser]
@@ -318,19 +370,26 @@ class FollowView(APIView):
             if request.user.id == int(pk):
                 return throw_error(400, "You cannot follow yourself.")
 
-            user_to_follow = User.objects.get(id=pk)
-
-            follow, created = Follow.objects.get_or_create(
-                follower=request.user, following=user_to_follow
+            # One statement: inserted unless the user is missing or
+            # already followed (unique_follow)
+            follow = insert_on_conflict(
+                Follow,
+                {
+                    "follower": request.user.id,
+                    "following": pk,
+                    "created_at": timezone.now(),
+                },
+                unique_fields=["follower", "following"],
+                only_if=User.objects.filter(id=pk),
             )
-            if created:
+            if follow:
                 return Response(
-                    {"message": "Followed successfully!", "id": follow.id},
+                    {"message": "Followed successfully!", "id": follow[0]},
                     status=201,
                 )
+            if not User.objects.filter(id=pk).exists():
+                return throw_error(404, "User not found.")
             return throw_error(400, "You are already following this user.")
-        except User.DoesNotExist:
-            return throw_error(404, "User not found.")
         except Exception as e:
             return throw_error(500, "Unable to follow user.", log=str(e))
 
@@ -1,8 +1,9 @@
 import os
 import sys
+import tempfile
 from datetime import timedelta
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
@@ -27,6 +28,9 @@ CLOUDINARY_URL = config("CLOUDINARY_URL")
 
 # Enable or disable all debug logs executed by static/py/utils/logging.py.
 SHOW_ALL_LOGS = config("SHOW_ALL_LOGS", default=False, cast=bool)
+# Modules (or packages) with debug logs enabled, e.g. "apps.posts.views".
+# Only has an effect in development, see debug_switch() in logging.py.
+DEBUG_LOG_MODULES = config("DEBUG_LOG_MODULES", default="", cast=Csv())
 
 dev_server_host = config("DEV_SERVER_HOST")
 dev_server_frontend_port = config("DEV_SERVER_FRONTEND_PORT")
@@ -65,6 +69,20 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly",
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # orjson based JSON, see static/utils/renderers.py
+    "DEFAULT_RENDERER_CLASSES": [
+        "static.utils.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "static.utils.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Proxies in front of the app (1 behind the Heroku router), whose
+    # X-Forwarded-For entries are trusted. Throttles key guests on the
+    # address the closest proxy saw, not on what the client sent.
+    "NUM_PROXIES": config("NUM_PROXIES", default=1, cast=int),
 }
 
 SIMPLE_JWT = {
@@ -94,9 +112,15 @@ INSTALLED_APPS = [
     # Created apps
     "apps.users",
     "apps.posts",
+    "apps.monitoring",
 ]
 
 MIDDLEWARE = [
+    # Outermost, so the whole request is timed
+    "apps.monitoring.middleware.RequestTimingMiddleware",
+    "apps.monitoring.middleware.MetricsMiddleware",
+    # Before anything that reads or changes response bodies
+    "static.utils.compression.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # CORS
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -106,10 +130,173 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Innermost, so the user is known and the view is what's profiled
+    "apps.monitoring.middleware.ProfilingMiddleware",
 ]
 
+# Per-request timing (apps/monitoring/middleware.py)
+REQUEST_TIMING = {
+    # Share of requests (0 to 1) that are timed, 0 turns timing off
+    "SAMPLE_RATE": config(
+        "REQUEST_TIMING_SAMPLE_RATE",
+        default=1.0 if DEBUG else 0.05,
+        cast=float,
+    ),
+    # Send the measurements in a Server-Timing header
+    "SERVER_TIMING_HEADER": config(
+        "SERVER_TIMING_HEADER", default=True, cast=bool
+    ),
+}
+
+# Shared by all processes when REDIS_URL is set, per process otherwise
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Request rate limits (static/utils/throttling.py)
+THROTTLING = {
+    "ENABLED": config("THROTTLING_ENABLED", default=True, cast=bool),
+    # Where buckets are kept: "cache" (the default cache, shared by all
+    # workers with REDIS_URL) or "sqlite" (a file shared by the workers
+    # of one machine)
+    "STORE": config("THROTTLE_STORE", default="cache"),
+    "SQLITE_PATH": config(
+        "THROTTLE_SQLITE_PATH",
+        default=os.path.join(tempfile.gettempdir(), "throttle.sqlite3"),
+    ),
+    # Sustained rate and burst (bucket capacity) per scope, "login" and
+    # "signup" are per IP address, the others per user (IP for guests)
+    "SCOPES": {
+        "login": {"rate": "10/min", "burst": 5},
+        "signup": {"rate": "5/hour", "burst": 5},
+        "filter": {"rate": "60/min", "burst": 30},
+        "like": {"rate": "30/min", "burst": 20},
+        "comment": {"rate": "10/min", "burst": 10},
+        "autocomplete": {"rate": "120/min", "burst": 30},
+    },
+}
+
+# Cached post filter results (apps/posts/filter_cache.py)
+FILTER_CACHE = {
+    "CACHE": "default",
+    # Seconds the ids of a filter's posts are reused, 0 turns the cache
+    # off. Likes and comments reorder cached results after this. Post
+    # writes invalidate results through a counter in the cache, which
+    # only reaches every worker through Redis, so the cache is off by
+    # default without REDIS_URL.
+    "TIMEOUT": config(
+        "FILTER_CACHE_TIMEOUT", default=30 if REDIS_URL else 0, cast=int
+    ),
+    # Larger results aren't cached
+    "MAX_IDS": 10000,
+}
+
+# Response compression (static/utils/compression.py)
+COMPRESSION = {
+    # Smaller responses are sent uncompressed
+    "MIN_SIZE": config("COMPRESSION_MIN_SIZE", default=1024, cast=int),
+    # Low levels give most of the size reduction for little CPU
+    "GZIP_LEVEL": config("COMPRESSION_GZIP_LEVEL", default=5, cast=int),
+    "BROTLI_QUALITY": config(
+        "COMPRESSION_BROTLI_QUALITY", default=4, cast=int
+    ),
+    # Compressed bodies are cached by digest
+    "CACHE": "default",
+    # Seconds compressed bodies are cached, 0 turns the cache off
+    "CACHE_TIMEOUT": config(
+        "COMPRESSION_CACHE_TIMEOUT", default=300, cast=int
+    ),
+    # Larger bodies are compressed without caching
+    "CACHE_MAX_SIZE": 2 * 1024 * 1024,
+}
+
+# Bearer token required by the /metrics endpoint, leave empty for none
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 os.makedirs(LOGS_DIR, exist_ok=True)
+
+# On-demand profiling of single requests (apps/monitoring/middleware.py)
+PROFILING = {
+    "ENABLED": config("PROFILING_ENABLED", default=True, cast=bool),
+    # Where saved profiles are written
+    "DIRECTORY": config(
+        "PROFILING_DIRECTORY", default=os.path.join(LOGS_DIR, "profiles")
+    ),
+    # Profiled requests allowed per minute
+    "RATE_LIMIT": config("PROFILING_RATE_LIMIT", default=5, cast=int),
+    # Seconds a token from `manage.py profile_token` stays valid
+    "TOKEN_MAX_AGE": config("PROFILING_TOKEN_MAX_AGE", default=3600, cast=int),
+}
+
+# Background purge of deleted accounts (apps/users/deletion.py)
+ACCOUNT_DELETION = {
+    # Rows deleted per transaction
+    "BATCH_SIZE": config("ACCOUNT_DELETION_BATCH_SIZE", default=500, cast=int),
+    # Purge in a thread of the web process once the deletion is
+    # committed, otherwise only `manage.py purge_deleted_accounts` does
+    "IN_PROCESS": config(
+        "ACCOUNT_DELETION_IN_PROCESS", default=True, cast=bool
+    ),
+    # A job whose worker stopped renewing its lease this long ago (e.g.
+    # because its process died) is resumed by the next worker
+    "LEASE_SECONDS": 300,
+    # Failed runs before a job is given up on
+    "MAX_ATTEMPTS": 5,
+}
+
+# Deletion of unused image files (apps/posts/images.py)
+IMAGE_CLEANUP = {
+    # Images per batch, Cloudinary deletes at most 100 per API call
+    "BATCH_SIZE": config("IMAGE_CLEANUP_BATCH_SIZE", default=100, cast=int),
+    # Seconds before retrying a failed deletion, doubled every attempt
+    "RETRY_DELAY": 60,
+    # Failed attempts before an image is left in the queue for good
+    "MAX_ATTEMPTS": 8,
+}
+
+# Slow query log (apps/monitoring/queries.py)
+SLOW_QUERIES = {
+    # Queries taking at least this long are logged, 0 turns the log off
+    "THRESHOLD_MS": config(
+        "SLOW_QUERY_THRESHOLD_MS", default=200.0, cast=float
+    ),
+    # Capture the query plan of slow SELECT statements
+    "EXPLAIN": config("SLOW_QUERY_EXPLAIN", default=True, cast=bool),
+    # Read by `manage.py slow_queries`
+    "LOG_FILE": os.path.join(LOGS_DIR, "slow_queries.log"),
+}
+
+# Log records are queued and written by a background thread per handler
+# (see static/utils/log_handlers.py). With the "drop" policy a full queue
+# discards records instead of slowing down requests, "block" waits up to
+# LOG_QUEUE_TIMEOUT seconds for room.
+LOG_QUEUE_SIZE = config("LOG_QUEUE_SIZE", default=10000, cast=int)
+LOG_QUEUE_POLICY = config("LOG_QUEUE_POLICY", default="drop")
+LOG_QUEUE_TIMEOUT = config("LOG_QUEUE_TIMEOUT", default=1.0, cast=float)
+# Console output as "text" (readable in development) or "json"
+LOG_CONSOLE_FORMAT = config(
+    "LOG_CONSOLE_FORMAT", default="text" if DEBUG else "json"
+)
+# Built through the "()" factory key: since Python 3.12 dictConfig
+# requires "handlers" or "listener" for a QueueHandler "class"
+LOG_QUEUE_OPTIONS = {
+    "()": "static.utils.log_handlers.QueuedHandler",
+    "maxsize": LOG_QUEUE_SIZE,
+    "policy": LOG_QUEUE_POLICY,
+    "timeout": LOG_QUEUE_TIMEOUT,
+}
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -122,31 +309,50 @@ LOGGING = {
             "format": "{levelname} {message}",
             "style": "{",
         },
+        # One JSON object per line, including `extra` fields
+        "json": {
+            "()": "static.utils.log_handlers.JsonFormatter",
+        },
     },
     "handlers": {
         # Detailed logs for error tracking (saved in error.log)
         "file_error": {
+            **LOG_QUEUE_OPTIONS,
             "level": "ERROR",
-            "class": "logging.handlers.RotatingFileHandler",
+            "target": "logging.handlers.RotatingFileHandler",
             "filename": os.path.join(BASE_DIR, "logs", "error.log"),
-            "formatter": "verbose",
+            "formatter": "json",
             "maxBytes": 1024 * 1024 * 5,  # 5 MB
             "backupCount": 5,  # Keep the last 5 files
         },
         # Detailed logs for debugging (saved in debug.log)
         "file_debug": {
+            **LOG_QUEUE_OPTIONS,
             "level": "DEBUG",
-            "class": "logging.handlers.RotatingFileHandler",
+            "target": "logging.handlers.RotatingFileHandler",
             "filename": os.path.join(BASE_DIR, "logs", "debug.log"),
-            "formatter": "verbose",
+            "formatter": "json",
+            "maxBytes": 1024 * 1024 * 10,  # 10 MB
+            "backupCount": 5,
+        },
+        # Slow queries with their query plans (saved in slow_queries.log)
+        "file_slow_queries": {
+            **LOG_QUEUE_OPTIONS,
+            "level": "WARNING",
+            "target": "logging.handlers.RotatingFileHandler",
+            "filename": SLOW_QUERIES["LOG_FILE"],
+            "formatter": "json",
             "maxBytes": 1024 * 1024 * 10,  # 10 MB
             "backupCount": 5,
         },
         # Minimal logs for terminal output during development
         "console": {
+            **LOG_QUEUE_OPTIONS,
             "level": "DEBUG",
-            "class": "logging.StreamHandler",
-            "formatter": "simple",
+            "target": "logging.StreamHandler",
+            "formatter": (
+                "simple" if LOG_CONSOLE_FORMAT == "text" else "json"
+            ),
         },
     },
     "loggers": {
@@ -160,6 +366,11 @@ LOGGING = {
             "level": "DEBUG",
             "propagate": False,
         },
+        "app.slow_queries": {
+            "handlers": ["file_slow_queries", "console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
 
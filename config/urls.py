@@ -17,6 +17,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("users/", include("apps.users.urls")),
     path("posts/", include("apps.posts.urls")),
+    path("", include("apps.monitoring.urls")),
 ]
 
 if is_development():
@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration, picked up automatically from the working
+directory (see Procfile).
+"""
+
+import os
+import shutil
+import tempfile
+
+# Workers share Prometheus metrics through files in this directory. It
+# must be set before prometheus_client is imported anywhere.
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "reoptinew-metrics"),
+)
+
+
+# pylint: disable=unused-argument
+def on_starting(server):
+    # Start with an empty store, samples from a previous run are stale
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # pylint: disable=import-outside-toplevel
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
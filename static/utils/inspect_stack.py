@@ -6,14 +6,58 @@ def get_file_name_of_caller(level):
     """
     Returns the file name of the caller.
 
+    Walks the frame chain instead of using `inspect.stack()`, which
+    reads the source context of every frame on the stack.
+
     Args:
         level (int): Index depth
     Returns:
         str: The file name of the calling function/module.
     """
+    frame = inspect.currentframe()
+    try:
+        for _ in range(level):
+            if frame is None:
+                return None
+            frame = frame.f_back
+        if frame is None:
+            return None
+        return os.path.basename(frame.f_code.co_filename)
+    finally:
+        # Break the reference cycle between the frame and this function
+        del frame
+
+
+def get_app_caller(root, exclude=()):
+    """
+    Returns the innermost frame on the stack that belongs to the
+    project, i.e. whose file is inside `root` but not in installed
+    packages or under one of the `exclude` paths.
+
+    Args:
+        root (str): The project directory.
+        exclude (tuple): Paths (within `root`) to skip, e.g. the module
+            calling this function.
+    Returns:
+        tuple: The file (relative to `root`), line number and function
+        name, or None if no frame matches.
+    """
+    root = os.path.join(str(root), "")
+    frame = inspect.currentframe().f_back
     try:
-        caller_frame = inspect.stack()[level]
-        caller_file = os.path.basename(caller_frame.filename)
-        return caller_file
-    except IndexError:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if (
+                filename.startswith(root)
+                and not filename.startswith(exclude)
+                and "site-packages" not in filename
+            ):
+                return (
+                    os.path.relpath(filename, root),
+                    frame.f_lineno,
+                    frame.f_code.co_name,
+                )
+            frame = frame.f_back
         return None
+    finally:
+        del frame
@@ -0,0 +1,164 @@
+import copy
+import json
+import os
+import queue
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from django.utils.module_loading import import_string
+
+
+# Attributes every LogRecord has, anything else was passed via `extra`
+RESERVED_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as one JSON object per line.
+
+    Fields passed through `extra` (e.g. `logger.info("...",
+    extra={"duration_ms": 12})`) are included as top-level keys.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(
+                record.created, tz=timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_RECORD_ATTRS:
+                entry[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+
+        return json.dumps(entry, default=str)
+
+
+class _Listener(QueueListener):
+    """
+    Queue listener that reports dropped records and never loses its
+    stop sentinel to a full queue.
+    """
+
+    def __init__(self, owner):
+        super().__init__(owner.queue, owner.target)
+        self.owner = owner
+        self.reported_drops = 0
+
+    def handle(self, record):
+        super().handle(record)
+        dropped = self.owner.dropped
+        if dropped > self.reported_drops:
+            self.owner.target.handle(
+                logging.makeLogRecord(
+                    {
+                        "name": record.name,
+                        "levelno": logging.WARNING,
+                        "levelname": "WARNING",
+                        "msg": "Dropped %s log record(s), the log queue "
+                        "was full.",
+                        "args": (dropped - self.reported_drops,),
+                    }
+                )
+            )
+            self.reported_drops = dropped
+
+    def enqueue_sentinel(self):
+        # Block until there's room, put_nowait() would raise queue.Full
+        self.queue.put(self._sentinel)
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Hands log records to a bounded queue and writes them through the
+    target handler in a background thread, so rotation, disk flushes
+    and console output never run inside request handling.
+
+    Configured like the target handler in `LOGGING`, with the target's
+    class path in `target` and its own keyword arguments alongside.
+
+    Args:
+        target (str): Dotted path of the handler that does the I/O.
+        maxsize (int): Maximum number of queued records.
+        policy (str): "drop" discards records when the queue is full,
+            "block" waits up to `timeout` seconds for room.
+        timeout (float): Seconds to wait with the "block" policy.
+        **options: Keyword arguments for the target handler.
+    """
+
+    def __init__(
+        self, target, maxsize=10000, policy="drop", timeout=1.0, **options
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown log queue policy: {policy}")
+        self.target = import_string(target)(**options)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.timeout = timeout
+        self.dropped = 0
+        super().__init__(queue.Queue(maxsize))
+        self.listener = _Listener(self)
+        self.listener.start()
+
+        # Threads don't survive a fork (e.g. gunicorn --preload), give
+        # each child process a fresh queue and listener.
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._restart)
+
+    def _restart(self):
+        if self.listener is None:  # Closed before the fork
+            return
+        self.queue = queue.Queue(self.maxsize)
+        self.dropped = 0
+        self.listener = _Listener(self)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        # Formatting happens in the listener thread, by the target
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        Merges the message arguments now, since they may change before
+        the listener gets to the record. Unlike the stock QueueHandler
+        the record is not formatted here.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Drains the queue and closes the target handler."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
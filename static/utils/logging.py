@@ -1,3 +1,4 @@
+import inspect
 import logging
 from django.conf import settings
 from static.utils.environment import is_development
@@ -7,22 +8,76 @@ from static.utils.inspect_stack import get_file_name_of_caller
 logger = logging.getLogger("app")
 
 
+def debug_switch(module_name):
+    """
+    Returns the debug logging switch for a module.
+
+    The switch is meant to be evaluated once, at import time, and
+    passed as the first argument to the log functions below. Modules
+    (or parent packages) listed in the DEBUG_LOG_MODULES setting are
+    switched on, SHOW_ALL_LOGS switches on every module. In production
+    the switch is always off.
+
+    Args:
+        module_name (str): The module's `__name__`.
+
+    Returns:
+        bool: True if debug logs are enabled for the module.
+    """
+    if not is_development():
+        return False
+    if settings.SHOW_ALL_LOGS:
+        return True
+    return any(
+        module_name == enabled or module_name.startswith(enabled + ".")
+        for enabled in settings.DEBUG_LOG_MODULES
+    )
+
+
+def _resolve(value):
+    """
+    Calls deferred log arguments (functions and lambdas) and returns
+    everything else as is. Classes and other callables are left alone
+    so that e.g. `type(data)` can still be logged.
+    """
+    if inspect.isfunction(value) or inspect.ismethod(value):
+        return value()
+    return value
+
+
+def _build_message(name, args):
+    # Get the file name of the caller (log_* -> _build_message -> caller)
+    caller_file = get_file_name_of_caller(3)
+    return f"(Occurred in {caller_file}) {_resolve(name)}: " + " ".join(
+        str(_resolve(arg)) for arg in args
+    )
+
+
+def _enabled(log, level):
+    return (
+        (log or settings.SHOW_ALL_LOGS)
+        and is_development()
+        and logger.isEnabledFor(level)
+    )
+
+
 def log_debug(log, name, *args):
     """
     Logs debugging messages to the console in development.
 
+    Nothing is evaluated unless the log is enabled, pass expensive
+    arguments as functions (e.g. `lambda: serializer.data`) to defer
+    them until then.
+
     Args:
-        log (bool): Extra conditional for toggling debugging.
-        name (str): Name/identifier of the log.
-        *args: Any number of additional arguments to log.
+        log (bool): Extra conditional for toggling debugging, usually
+            the module's `debug_switch()`.
+        name (str or function): Name/identifier of the log.
+        *args: Any number of additional arguments (or functions
+            returning them) to log.
     """
-    if (log or settings.SHOW_ALL_LOGS) and is_development():
-        # Get the file name of the caller
-        caller_file = get_file_name_of_caller(2)
-        message = f"(Occurred in {caller_file}) {name}: " + " ".join(
-            map(str, args)
-        )
-        logger.debug(message)
+    if _enabled(log, logging.DEBUG):
+        logger.debug(_build_message(name, args))
 
 
 def log_message(log, name, *args):
@@ -31,16 +86,12 @@ def log_message(log, name, *args):
 
     Args:
         log (bool): Extra conditional for toggling logging.
-        name (str): Name/identifier of the log.
-        *args: Any number of additional arguments to log.
+        name (str or function): Name/identifier of the log.
+        *args: Any number of additional arguments (or functions
+            returning them) to log.
     """
-    if (log or settings.SHOW_ALL_LOGS) and is_development():
-        # Get the file name of the caller
-        caller_file = get_file_name_of_caller(2)
-        message = f"(Occurred in {caller_file}) {name}: " + " ".join(
-            map(str, args)
-        )
-        logger.info(message)
+    if _enabled(log, logging.INFO):
+        logger.info(_build_message(name, args))
 
 
 def log_error(log, name, *args):
@@ -49,13 +100,9 @@ def log_error(log, name, *args):
 
     Args:
         log (bool): Extra conditional for toggling logging.
-        name (str): Name/identifier of the log.
-        *args: Any number of additional arguments to log.
-    """
-    if (log or settings.SHOW_ALL_LOGS) and is_development():
-        # Get the file name of the caller
-        caller_file = get_file_name_of_caller(2)
-        message = f"(Occurred in {caller_file}) {name}: " + " ".join(
-            map(str, args)
-        )
-        logger.error(message)
+        name (str or function): Name/identifier of the log.
+        *args: Any number of additional arguments (or functions
+            returning them) to log.
+    """
+    if _enabled(log, logging.ERROR):
+        logger.error(_build_message(name, args))
@@ -0,0 +1,49 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # The stdlib renderer is used instead
+    orjson = None
+
+
+# DRF's encoder formats what orjson passes through (dates and times,
+# Decimal, lazy strings, querysets, ...) so the output doesn't change
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer using orjson, which encodes large payloads several
+    times faster than the stdlib `json` module.
+
+    The output matches DRF's JSONRenderer: datetimes, dates, times and
+    Decimals are formatted by DRF's encoder, and U+2028/U+2029 are
+    escaped. Falls back to DRF's renderer when orjson isn't installed
+    or for output orjson can't produce (indented, non-compact or ASCII
+    only JSON).
+    """
+
+    OPTIONS = (
+        (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+        if orjson
+        else None
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        rendered = orjson.dumps(
+            data, default=_encoder.default, option=self.OPTIONS
+        )
+        # Keep the output a strict JavaScript subset, like DRF does
+        return rendered.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -0,0 +1,169 @@
+import hashlib
+import re
+from django.db import connection
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """
+    Normalizes an SQL statement so that queries which only differ in
+    their values look the same: literals and placeholders become `?`,
+    value lists become `(...)` and whitespace is collapsed.
+
+    Args:
+        sql (str): The SQL statement.
+
+    Returns:
+        str: The normalized statement.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _VALUE_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint_sql(sql):
+    """
+    Returns a short, stable identifier of the normalized statement.
+    """
+    return hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()[:12]
+
+
+def _insert_source(meta, values, only_if):
+    """
+    Returns the VALUES clause of an INSERT, or a SELECT of the values
+    that only returns them if `only_if` has results, and its params.
+    """
+    params = [
+        meta.get_field(name).get_db_prep_save(value, connection)
+        for name, value in values.items()
+    ]
+    placeholders = ", ".join(["%s"] * len(values))
+    if only_if is None:
+        return f"VALUES ({placeholders})", params
+
+    condition, condition_params = (
+        only_if.values("pk").query.get_compiler(connection=connection).as_sql()
+    )
+    return (
+        f"SELECT {placeholders} WHERE EXISTS ({condition})",
+        params + list(condition_params),
+    )
+
+
+def insert_on_conflict(
+    model,
+    values,
+    unique_fields,
+    *,
+    update_fields=(),
+    only_if=None,
+    returning=("pk",),
+):
+    """
+    Inserts a row with a single `INSERT ... ON CONFLICT` statement.
+
+    The unique constraint over `unique_fields` settles whether the row
+    already exists, instead of a SELECT beforehand: the write takes one
+    round trip and concurrent identical requests (e.g. a double tap)
+    can't both insert it. Supported by PostgreSQL and SQLite 3.35+.
+
+    Args:
+        model (Model): The model of the row.
+        values (dict): Field names mapped to the row's values, related
+            objects are given by their id.
+        unique_fields (list): The fields of the unique constraint.
+        update_fields (list, optional): Fields set to the new values
+            when the row exists, otherwise the existing row is kept.
+        only_if (QuerySet, optional): The row is only inserted if this
+            queryset has results, e.g. if the rows it refers to exist.
+            Checked by the same statement.
+        returning (list): Fields of the written row to return.
+
+    Returns:
+        tuple: The `returning` values of the inserted or updated row,
+        or None if nothing was written.
+    """
+    # pylint: disable=protected-access,too-many-arguments
+    meta = model._meta
+    quote = connection.ops.quote_name
+
+    def columns(names):
+        return [
+            quote(
+                meta.pk.column if name == "pk" else meta.get_field(name).column
+            )
+            for name in names
+        ]
+
+    if update_fields:
+        action = "DO UPDATE SET " + ", ".join(
+            f"{column} = EXCLUDED.{column}"
+            for column in columns(update_fields)
+        )
+    else:
+        action = "DO NOTHING"
+    source, params = _insert_source(meta, values, only_if)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(meta.db_table)} "
+            f"({', '.join(columns(values))}) {source} "
+            f"ON CONFLICT ({', '.join(columns(unique_fields))}) {action} "
+            f"RETURNING {', '.join(columns(returning))}",
+            params,
+        )
+        return cursor.fetchone()
+
+
+def add_on_conflict(model, rows, unique_fields, field):
+    """
+    Inserts rows with a single `INSERT ... ON CONFLICT` statement, adding
+    their `field` to the existing row's instead where one conflicts.
+
+    Counters are updated this way without reading them first, so
+    concurrent updates can't overwrite each other. Negative values
+    decrement the counter. Supported by PostgreSQL and SQLite 3.35+.
+
+    Args:
+        model (Model): The model of the rows.
+        rows (list): Dicts of field names mapped to values, all with the
+            same fields and at most one per unique key.
+        unique_fields (list): The fields of the unique constraint.
+        field (str): The counter.
+    """
+    if not rows:
+        return
+    # pylint: disable=protected-access
+    meta = model._meta
+    quote = connection.ops.quote_name
+
+    def columns(names):
+        return ", ".join(quote(meta.get_field(name).column) for name in names)
+
+    names = list(rows[0])
+    table = quote(meta.db_table)
+    counter = quote(meta.get_field(field).column)
+    placeholders = "(" + ", ".join(["%s"] * len(names)) + ")"
+    params = [
+        meta.get_field(name).get_db_prep_save(row[name], connection)
+        for row in rows
+        for name in names
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({columns(names)}) "
+            f"VALUES {', '.join([placeholders] * len(rows))} "
+            f"ON CONFLICT ({columns(unique_fields)}) "
+            f"DO UPDATE SET {counter} = {table}.{counter} + "
+            f"EXCLUDED.{counter}",
+            params,
+        )
@@ -0,0 +1,92 @@
+from django.http import StreamingHttpResponse
+from .compression import compress_stream
+from .renderers import FastJSONRenderer
+
+# Supported `?stream=` formats and their content types
+STREAM_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+# Rows fetched (and prefetched for) per database round trip
+STREAM_CHUNK_SIZE = 200
+# Rendered bytes collected before they are sent as one chunk
+STREAM_BUFFER_SIZE = 16 * 1024
+
+
+def _buffered(parts):
+    """
+    Joins small byte strings into chunks of about STREAM_BUFFER_SIZE
+    bytes.
+    """
+    buffer, length = [], 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= STREAM_BUFFER_SIZE:
+            yield b"".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _json_array(rendered):
+    yield b"["
+    for index, item in enumerate(rendered):
+        yield b"," + item if index else item
+    yield b"]"
+
+
+def _ndjson(rendered):
+    for item in rendered:
+        yield item + b"\n"
+
+
+def streaming_response(items, to_representation, stream_format):
+    """
+    Streams `items` as a JSON array or as NDJSON (one JSON object per
+    line), rendering them one at a time so memory use doesn't grow with
+    the number of items.
+
+    Args:
+        items (iterable): The objects to stream, e.g. a queryset's
+            `.iterator(chunk_size=STREAM_CHUNK_SIZE)`.
+        to_representation (callable): Turns an item into primitive data,
+            e.g. a serializer's `to_representation`.
+        stream_format (str): A key of STREAM_FORMATS.
+
+    Returns:
+        StreamingHttpResponse: The response.
+    """
+    renderer = FastJSONRenderer()
+    rendered = (renderer.render(to_representation(item)) for item in items)
+    parts = (
+        _json_array(rendered) if stream_format == "json" else _ndjson(rendered)
+    )
+    return StreamingHttpResponse(
+        _buffered(parts), content_type=STREAM_FORMATS[stream_format]
+    )
+
+
+def ndjson_download(records, filename, gzipped=False):
+    """
+    Streams `records` (primitive data) as an NDJSON file download.
+
+    Args:
+        records (iterable): The records, one per line.
+        filename (str): Name of the downloaded file.
+        gzipped (bool): Whether to gzip the file (adding ".gz" to its
+            name) while it's streamed.
+
+    Returns:
+        StreamingHttpResponse: The response.
+    """
+    renderer = FastJSONRenderer()
+    content = _buffered(_ndjson(renderer.render(record) for record in records))
+    content_type = STREAM_FORMATS["ndjson"]
+    if gzipped:
+        content = compress_stream(content)
+        content_type = "application/gzip"
+        filename += ".gz"
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,266 @@
+"""
+Token-bucket throttling.
+
+Every client has a bucket per scope holding up to `burst` tokens, which
+refills at `rate`. A request takes a token or is rejected (429) with a
+Retry-After of the time until the next token. Unlike DRF's
+SimpleRateThrottle, which stores the time of every request in its
+window, a bucket is two numbers, so a check costs the same at any rate.
+
+Rates are configured per scope in THROTTLING["SCOPES"], buckets are
+kept in the Django cache or in a SQLite file shared by the workers of
+one machine (THROTTLING["STORE"]).
+"""
+
+import random
+import sqlite3
+import threading
+from collections.abc import Mapping
+from functools import lru_cache
+from math import ceil
+from time import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+# Seconds per rate period, by the period's first letter (as in DRF)
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# Share of SQLite writes that also prune buckets idle for a day
+PRUNE_PROBABILITY = 0.001
+
+
+def parse_rate(rate):
+    """
+    Parses a rate such as "10/min".
+
+    Returns:
+        float: Tokens per second.
+    """
+    count, _, period = rate.partition("/")
+    return int(count) / PERIODS[period[0]]
+
+
+def take_token(bucket, now, rate, burst):
+    """
+    Refills a bucket for the time elapsed and takes a token from it.
+
+    Args:
+        bucket (tuple): The tokens left and the time they were counted,
+            or None for a new (full) bucket.
+        now (float): The current time.
+        rate (float): Tokens added per second.
+        burst (int): Capacity of the bucket.
+
+    Returns:
+        tuple: The tokens left, whether a token was taken and the
+        seconds until one is available if not.
+    """
+    tokens, updated_at = bucket or (burst, now)
+    tokens = min(burst, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return tokens - 1, True, 0
+    return tokens, False, (1 - tokens) / rate
+
+
+class CacheBucketStore:
+    """
+    Buckets in the default cache: shared by all workers through Redis
+    (REDIS_URL), per process with the local memory cache.
+
+    The read and write of a bucket aren't atomic, concurrent requests
+    of a client can occasionally both take its last token.
+    """
+
+    # Time of the last `clear`, buckets counted before are full again
+    CLEARED_KEY = "throttle:cleared_at"
+
+    def take(self, key, rate, burst):
+        now = time()
+        cached = cache.get_many([key, self.CLEARED_KEY])
+        bucket = cached.get(key)
+        if bucket and bucket[1] < cached.get(self.CLEARED_KEY, 0):
+            bucket = None
+        tokens, allowed, wait = take_token(bucket, now, rate, burst)
+        # An idle bucket expires once it would be full again
+        cache.set(key, (tokens, now), timeout=ceil(burst / rate) + 1)
+        return allowed, wait
+
+    def clear(self):
+        # The cache is shared with other data, only buckets are reset
+        cache.set(self.CLEARED_KEY, time(), timeout=None)
+
+
+class SQLiteBucketStore:
+    """
+    Buckets in a SQLite file, shared by the workers of one machine (e.g.
+    gunicorn's) without a cache server. Every take is an immediate
+    transaction, so buckets are updated atomically across processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def connection(self):
+        """Returns the calling thread's connection to the file."""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                + "(key TEXT PRIMARY KEY, tokens REAL, updated_at REAL)"
+            )
+            self.local.connection = connection
+        return connection
+
+    def take(self, key, rate, burst):
+        connection = self.connection()
+        now = time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            bucket = connection.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE key = ?",
+                (key,),
+            ).fetchone()
+            tokens, allowed, wait = take_token(bucket, now, rate, burst)
+            connection.execute(
+                "INSERT INTO buckets VALUES (?, ?, ?) ON CONFLICT (key) "
+                + "DO UPDATE SET tokens = excluded.tokens, "
+                + "updated_at = excluded.updated_at",
+                (key, tokens, now),
+            )
+            if random.random() < PRUNE_PROBABILITY:
+                connection.execute(
+                    "DELETE FROM buckets WHERE updated_at < ?",
+                    (now - PERIODS["d"],),
+                )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return allowed, wait
+
+    def clear(self):
+        self.connection().execute("DELETE FROM buckets")
+
+
+@lru_cache
+def _store(kind, path):
+    if kind == "sqlite":
+        return SQLiteBucketStore(path)
+    return CacheBucketStore()
+
+
+def get_store():
+    """Returns the bucket store configured in THROTTLING."""
+    options = settings.THROTTLING
+    return _store(options["STORE"], options["SQLITE_PATH"])
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Takes a token from the client's bucket for `scope`, whose rate and
+    burst are set in THROTTLING["SCOPES"] (scopes without settings
+    aren't throttled).
+
+    Attributes:
+        scope (str): The scope, i.e. the group of buckets.
+        key (str): "ip" for a bucket per IP address, "user" for a bucket
+            per user (per IP address for guests). "ip" throttles don't
+            need authentication and can run early, see
+            EarlyThrottleMixin.
+        methods (tuple): The HTTP methods throttled, empty for all.
+    """
+
+    scope = None
+    key = "user"
+    methods = ()
+
+    def __init__(self):
+        self.wait_time = 0
+
+    def applies(self, request):
+        return not self.methods or request.method in self.methods
+
+    def get_key(self, request):
+        if self.key == "user" and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        options = settings.THROTTLING
+        scope = options["SCOPES"].get(self.scope)
+        if not options["ENABLED"] or scope is None:
+            return True
+        if not self.applies(request):
+            return True
+
+        rate = parse_rate(scope["rate"])
+        allowed, self.wait_time = get_store().take(
+            f"throttle:{self.scope}:{self.get_key(request)}",
+            rate,
+            scope.get("burst") or ceil(rate * PERIODS["m"]),
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class EarlyThrottleMixin:
+    """
+    Checks `early_throttle_classes` first, before authentication,
+    permissions and body parsing, so throttled requests are rejected
+    without touching the database. Only for throttles keyed by IP
+    address, which don't need the user.
+    """
+
+    early_throttle_classes = ()
+
+    def initial(self, request, *args, **kwargs):
+        for throttle_class in self.early_throttle_classes:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                self.throttled(request, throttle.wait())
+        super().initial(request, *args, **kwargs)
+
+
+class LogInThrottle(TokenBucketThrottle):
+    scope = "login"
+    key = "ip"
+
+
+class SignUpThrottle(TokenBucketThrottle):
+    scope = "signup"
+    key = "ip"
+
+
+class FilterThrottle(TokenBucketThrottle):
+    """Throttles the filter and search action of the post list."""
+
+    scope = "filter"
+
+    def applies(self, request):
+        return (
+            request.method == "POST"
+            # The body may be any JSON value
+            and isinstance(request.data, Mapping)
+            and request.data.get("action") == "filter"
+        )
+
+
+class LikeThrottle(TokenBucketThrottle):
+    scope = "like"
+
+
+class CommentThrottle(TokenBucketThrottle):
+    scope = "comment"
+    methods = ("POST",)
+
+
+class AutocompleteThrottle(TokenBucketThrottle):
+    scope = "autocomplete"
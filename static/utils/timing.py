@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+
+# The timer of the request being handled, None when it isn't sampled
+_current_timer = ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    """
+    Collects named timing spans (in seconds) for a single request.
+    """
+
+    def __init__(self):
+        self.spans = {}
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+
+def activate_timer(timer):
+    """
+    Makes `timer` the current request's timer.
+
+    Returns:
+        Token: Pass it to `deactivate_timer()` when the request is done.
+    """
+    return _current_timer.set(timer)
+
+
+def deactivate_timer(token):
+    _current_timer.reset(token)
+
+
+def current_timer():
+    """Returns the current request's timer, or None."""
+    return _current_timer.get()
+
+
+@contextmanager
+def timed(name):
+    """
+    Adds the time spent in the block to the current request's `name`
+    span. Does nothing when the request isn't being timed.
+
+    Example:
+        with timed("serialize"):
+            data = serializer.data
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, perf_counter() - start)
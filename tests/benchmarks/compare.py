@@ -0,0 +1,42 @@
+"""
+Compares two benchmark result files.
+
+Usage: python -m tests.benchmarks.compare old.json new.json
+"""
+
+import json
+import sys
+
+COLUMNS = ["p50_ms", "p95_ms", "queries", "payload_bytes"]
+
+
+def load(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["results"]
+
+
+def change(old, new):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main(old_path, new_path):
+    old, new = load(old_path), load(new_path)
+    print(f"{'scenario':<18}" + "".join(f"{c:>28}" for c in COLUMNS))
+    for name in sorted(set(old) | set(new)):
+        if name not in old or name not in new:
+            print(f"{name:<18} only in {'new' if name in new else 'old'}")
+            continue
+        cells = [
+            f"{old[name][c]} -> {new[name][c]} "
+            f"({change(old[name][c], new[name][c])})"
+            for c in COLUMNS
+        ]
+        print(f"{name:<18}" + "".join(f"{cell:>28}" for cell in cells))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(__doc__)
+    main(sys.argv[1], sys.argv[2])
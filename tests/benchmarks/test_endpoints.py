@@ -0,0 +1,149 @@
+"""
+Benchmarks of the post feed, search and write paths.
+
+Skipped unless RUN_BENCHMARKS is set. Seed volumes are read from
+BENCHMARK_<NAME> variables (see apps/posts/seeding.py), e.g.
+
+    RUN_BENCHMARKS=1 BENCHMARK_POSTS=2000 BENCHMARK_USERS=200 \
+        pytest tests/benchmarks
+
+Results are written as JSON to BENCHMARK_OUTPUT, compare two runs with
+`python -m tests.benchmarks.compare old.json new.json`.
+"""
+
+import json
+import os
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.test import Client
+from django.test.client import MULTIPART_CONTENT, BOUNDARY, encode_multipart
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts.models import Post
+from apps.posts.seeding import seed_data
+from apps.users.models import Profile
+from .utils import env_volumes, measure, write_results
+
+User = get_user_model()
+
+ITERATIONS = int(os.environ.get("BENCHMARK_ITERATIONS", 20))
+SEED = int(os.environ.get("BENCHMARK_SEED", 0))
+SORT_MODES = ["date", "likes", "comments"]
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("RUN_BENCHMARKS"),
+    reason="Set RUN_BENCHMARKS=1 to run the benchmarks.",
+)
+
+
+def post_form(title):
+    """Post creation/update data, encoded like the frontend does."""
+    return {
+        "action": "create",
+        "title": title,
+        "description": "Benchmark description",
+        "instructions": "Benchmark instructions",
+        "default_image_index": 1,
+        "tags": "benchmark wood",
+        "harmful_post": "false",
+        "harmful_tool_categories": "[]",
+        "harmful_material_categories": "[]",
+        "tools": json.dumps(
+            [{"quantity": "1", "name": "Saw", "description": "Any saw"}]
+        ),
+        "materials": json.dumps(
+            [{"quantity": "2", "name": "Pallet", "description": "Wood"}]
+        ),
+    }
+
+
+@pytest.mark.django_db
+def test_benchmark_endpoints(settings):
+    # Repeated requests would be rate limited
+    settings.THROTTLING = {**settings.THROTTLING, "ENABLED": False}
+    volumes = env_volumes()
+    seeded = seed_data(volumes, seed=SEED, prefix="bench")
+
+    # An adult viewer that hasn't liked anything yet
+    viewer = User.objects.create_user(
+        username="benchmark_viewer", password="securePassword"
+    )
+    Profile.objects.create(user=viewer, birth_date=date(1990, 1, 1))
+    token = RefreshToken.for_user(viewer).access_token
+    client = Client(headers={"Authorization": f"Bearer {token}"})
+    guest = Client()
+
+    busiest_post = (
+        Post.objects.annotate(comment_count=Count("post_comment"))
+        .order_by("-comment_count")
+        .first()
+    )
+    author = seeded["users"][0]
+    own_post = Post.objects.create(
+        user=viewer,
+        title="Benchmark post",
+        description="Description",
+        instructions="Instructions",
+    )
+
+    def filter_request(filters):
+        return lambda: client.post(
+            reverse("post-list"),
+            data={"action": "filter", "filters": filters},
+            content_type="application/json",
+        )
+
+    scenarios = {
+        "feed_list": lambda: client.get(reverse("post-list")),
+        "feed_list_guest": lambda: guest.get(reverse("post-list")),
+        "post_detail": lambda: client.get(
+            reverse("post-detail", args=[busiest_post.id])
+        ),
+        "search": filter_request(
+            {
+                "search_query": ["wood"],
+                "also_search_in": ["tags", "materials", "tools"],
+            }
+        ),
+        "autocomplete": lambda: client.get(
+            reverse("autocomplete"), {"q": "wo"}
+        ),
+        "comments": lambda: client.get(
+            reverse("comment-create", args=[busiest_post.id])
+        ),
+        "profile": lambda: client.get(f"/users/profile/{author.username}/"),
+        "like": lambda: client.post(
+            reverse("like-create", args=[busiest_post.id])
+        ),
+        "unlike": lambda: client.delete(
+            reverse("like-create", args=[busiest_post.id])
+        ),
+        "post_create": lambda: client.post(
+            reverse("post-list"), data=post_form("Benchmark create")
+        ),
+        "post_update": lambda: client.put(
+            reverse("post-detail", args=[own_post.id]),
+            data=encode_multipart(BOUNDARY, post_form("Benchmark update")),
+            content_type=MULTIPART_CONTENT,
+        ),
+    }
+    for sort_by in SORT_MODES:
+        scenarios[f"filter_{sort_by}"] = filter_request({"sort_by": sort_by})
+
+    results = {
+        name: measure(call, ITERATIONS)
+        for name, call in scenarios.items()
+        if name not in ("like", "unlike")
+    }
+    # Every like is undone before the next one and vice versa
+    results["like"] = measure(
+        scenarios["like"], ITERATIONS, after=scenarios["unlike"]
+    )
+    results["unlike"] = measure(
+        scenarios["unlike"], ITERATIONS, before=scenarios["like"]
+    )
+
+    path = write_results(results, volumes, SEED)
+    assert os.path.exists(path)
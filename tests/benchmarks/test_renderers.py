@@ -0,0 +1,81 @@
+"""
+Benchmark of the JSON renderer and parser against DRF's stdlib based
+ones, on the feed payload of the seeded data.
+
+Skipped unless RUN_BENCHMARKS is set, results are written to
+BENCHMARK_RENDERER_OUTPUT (benchmark_results_renderers.json), e.g.
+
+    RUN_BENCHMARKS=1 BENCHMARK_POSTS=1000 pytest tests/benchmarks
+"""
+
+import io
+import json
+import os
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+import pytest
+from apps.posts.models import Post
+from apps.posts.seeding import seed_data
+from apps.posts.serializers import PostSerializer
+from apps.posts.utils import with_serializer_data
+from static.utils.parsers import FastJSONParser
+from static.utils.renderers import FastJSONRenderer
+from .utils import env_volumes, time_calls, write_results
+
+ITERATIONS = int(os.environ.get("BENCHMARK_ITERATIONS", 20))
+SEED = int(os.environ.get("BENCHMARK_SEED", 0))
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("RUN_BENCHMARKS"),
+    reason="Set RUN_BENCHMARKS=1 to run the benchmarks.",
+)
+
+
+@pytest.mark.django_db
+def test_benchmark_renderers():
+    volumes = env_volumes()
+    seed_data(volumes, seed=SEED, prefix="bench")
+
+    # The feed as a mature user sees it
+    viewer = get_user_model().objects.filter(profile__isnull=False).first()
+    request = Request(RequestFactory().get("/"))
+    request.user = viewer
+    feed = PostSerializer(
+        with_serializer_data(Post.objects.all(), viewer),
+        many=True,
+        context={"request": request},
+    ).data
+    body = JSONRenderer().render(feed)
+    assert FastJSONRenderer().render(feed) == body
+
+    results = {
+        "render_stdlib": time_calls(
+            lambda: JSONRenderer().render(feed), ITERATIONS
+        ),
+        "render_orjson": time_calls(
+            lambda: FastJSONRenderer().render(feed), ITERATIONS
+        ),
+        "parse_stdlib": time_calls(
+            lambda: JSONParser().parse(io.BytesIO(body)), ITERATIONS
+        ),
+        "parse_orjson": time_calls(
+            lambda: FastJSONParser().parse(io.BytesIO(body)), ITERATIONS
+        ),
+    }
+    for result in results.values():
+        result["payload_bytes"] = len(body)
+
+    path = write_results(
+        results,
+        volumes,
+        SEED,
+        path=os.environ.get(
+            "BENCHMARK_RENDERER_OUTPUT",
+            "benchmark_results_renderers.json",
+        ),
+    )
+    with open(path, encoding="utf-8") as file:
+        assert json.load(file)["results"]
@@ -0,0 +1,126 @@
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from time import perf_counter
+import django
+from django.db import connection
+from apps.monitoring.queries import QueryTimer, execute_wrappers
+from apps.posts.seeding import DEFAULT_VOLUMES
+
+
+def env_volumes():
+    """
+    Reads seed volumes from BENCHMARK_<NAME> environment variables,
+    e.g. BENCHMARK_POSTS=1000.
+    """
+    return {
+        name: int(os.environ.get(f"BENCHMARK_{name.upper()}", default))
+        for name, default in DEFAULT_VOLUMES.items()
+    }
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(call, iterations, warmup=1, before=None, after=None):
+    """
+    Calls `call` (which returns a response) repeatedly and returns its
+    latency percentiles (ms), query count and payload size (bytes).
+
+    `before` and `after` run around every call, outside the measurement,
+    e.g. to undo a write so the next call does the same work.
+    """
+    latencies, query_counts = [], []
+    response = None
+    for i in range(warmup + iterations):
+        if before:
+            before()
+        queries = QueryTimer()
+        with execute_wrappers(queries):
+            start = perf_counter()
+            response = call()
+            elapsed = (perf_counter() - start) * 1000
+        if after:
+            after()
+        assert response.status_code < 400, response.content[:500]
+        if i >= warmup:
+            latencies.append(elapsed)
+            query_counts.append(queries.count)
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "max_ms": round(max(latencies), 3),
+        "queries": max(query_counts),
+        "payload_bytes": len(getattr(response, "content", b"")),
+    }
+
+
+def time_calls(call, iterations, warmup=1):
+    """
+    Calls `call` repeatedly and returns its latency percentiles (ms).
+    """
+    latencies = []
+    for i in range(warmup + iterations):
+        start = perf_counter()
+        call()
+        if i >= warmup:
+            latencies.append((perf_counter() - start) * 1000)
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+    }
+
+
+def git_revision():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(results, volumes, seed, path=None):
+    """
+    Writes the results with metadata about the run to `path`, by
+    default BENCHMARK_OUTPUT (benchmark_results.json).
+
+    Returns:
+        str: The path of the written file.
+    """
+    path = path or os.environ.get("BENCHMARK_OUTPUT", "benchmark_results.json")
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "seed": seed,
+            "volumes": volumes,
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    return path
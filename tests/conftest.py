@@ -0,0 +1,8 @@
+import pytest
+from static.utils.throttling import get_store
+
+
+@pytest.fixture(autouse=True)
+def reset_throttling():
+    """Every test starts with full rate limit buckets."""
+    get_store().clear()
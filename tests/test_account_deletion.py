@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.urls import reverse
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts.models import Post, Like, Rating, Comment
+from apps.posts.seeding import seed_data
+from apps.users import deletion
+from apps.users.models import AccountDeletion, Follow, Profile
+
+
+def remaining_rows(user_id):
+    return {
+        "posts": Post.objects.filter(user_id=user_id).count(),
+        "likes": Like.objects.filter(
+            Q(user_id=user_id) | Q(post__user_id=user_id)
+        ).count(),
+        "ratings": Rating.objects.filter(user_id=user_id).count(),
+        "comments": Comment.objects.filter(user_id=user_id).count(),
+        "follows": Follow.objects.filter(
+            Q(follower_id=user_id) | Q(following_id=user_id)
+        ).count(),
+        "profile": Profile.objects.filter(user_id=user_id).count(),
+    }
+
+
+@pytest.mark.django_db
+def test_account_is_purged_in_batches_and_resumed(monkeypatch):
+    """
+    A deleted account is deactivated, then purged in batches by a job
+    that resumes from where it stopped after a failure.
+    """
+    users = seed_data({"posts": 40, "users": 5})["users"]
+    user = max(users, key=lambda user: user.post_set.count())
+    others = Post.objects.exclude(user=user).count()
+
+    job = deletion.request_account_deletion(user)
+    user.refresh_from_db()
+    assert not user.is_active
+
+    def crash(user_id):
+        raise RuntimeError("Worker died")
+
+    monkeypatch.setitem(deletion.PURGE_STAGES, "posts", crash)
+    assert not deletion.run_account_deletion(job.pk, batch_size=3)
+    job.refresh_from_db()
+    assert job.status == AccountDeletion.Status.PENDING
+    assert job.stage == "harmful_material_categories"
+    assert job.deleted_rows > 0
+    assert remaining_rows(user.pk)["likes"] == 0
+    assert remaining_rows(user.pk)["posts"] > 0
+
+    monkeypatch.undo()
+    assert deletion.run_account_deletion(job.pk, batch_size=3)
+    job.refresh_from_db()
+    assert job.status == AccountDeletion.Status.DONE
+    assert job.attempts == 2
+    assert not any(remaining_rows(user.pk).values())
+    assert not get_user_model().objects.filter(pk=user.pk).exists()
+    assert Post.objects.count() == others
+
+
+@pytest.mark.django_db
+def test_leased_job_is_not_run_twice():
+    user = seed_data({"posts": 2, "users": 2})["users"][0]
+    job = deletion.request_account_deletion(user)
+    assert deletion.claim(job.pk)
+    # The lease is held by the first worker
+    assert not deletion.run_account_deletion(job.pk)
+    assert get_user_model().objects.filter(pk=user.pk).exists()
+
+
+@pytest.mark.django_db
+def test_refresh_tokens_stay_blacklisted(client):
+    user = seed_data({"posts": 2, "users": 2})["users"][0]
+    refresh = str(RefreshToken.for_user(user))
+
+    job = deletion.request_account_deletion(user)
+    assert deletion.run_account_deletion(job.pk)
+    # The token outlives the user, unlinked and blacklisted
+    token = OutstandingToken.objects.get(token=refresh)
+    assert token.user_id is None
+    assert token.blacklistedtoken
+    response = client.post(
+        reverse("token_refresh"),
+        {"refresh": refresh},
+        content_type="application/json",
+    )
+    assert response.status_code == 401
@@ -1,6 +1,7 @@
 import json
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 import pytest
 
 User = get_user_model()
@@ -62,6 +63,10 @@ def test_authentication_actions(client):
         data=json.dumps({"password": signup_data["password"]}),
     )
 
+    # The account is deactivated right away and purged in the background
+    assert not User.objects.get(username=signup_data["username"]).is_active
+    call_command("purge_deleted_accounts")
+
     # Make sure the user got deleted
     user_exists = User.objects.filter(
         username=signup_data["username"]
@@ -0,0 +1,98 @@
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.db.models.functions import Lower
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts.autocomplete import prefixed
+from apps.posts.models import Post, PostTag, Tag, Tool
+from apps.users.models import Profile
+
+User = get_user_model()
+
+
+@pytest.fixture(name="suggestions")
+def suggestions_fixture():
+    adult = User.objects.create_user(username="Woody", password="password")
+    Profile.objects.create(user=adult, birth_date=date(1990, 1, 1))
+    User.objects.create_user(username="wolf", password="password")
+    User.objects.create_user(username="gone_wood", is_active=False)
+    for title, harmful in [
+        ("Wooden shelf", False),
+        ("Wood stove", True),
+        ("Garden wood box", False),
+    ]:
+        post = Post.objects.create(
+            user=adult,
+            title=title,
+            description="Description",
+            instructions="Instructions",
+            harmful_post=harmful,
+        )
+        Tool.objects.create(post=post, quantity="1", name="Wood saw")
+    PostTag.objects.create(post=post, tag=Tag.objects.create(name="wood"))
+    Tag.objects.create(name="woodwork")
+
+    token = RefreshToken.for_user(adult).access_token
+    adult_client = Client(headers={"Authorization": f"Bearer {token}"})
+
+    def suggestions(client=adult_client, **params):
+        response = (client or Client()).get(reverse("autocomplete"), params)
+        assert response.status_code == 200, response.json()
+        return response.json()
+
+    return suggestions
+
+
+@pytest.mark.django_db
+def test_suggestions_start_with_the_prefix(suggestions):
+    assert suggestions(q=" WO") == {
+        "users": [
+            {"id": User.objects.get(username="wolf").id, "username": "wolf"},
+            {"id": User.objects.get(username="Woody").id, "username": "Woody"},
+        ],
+        "tags": ["wood", "woodwork"],
+        # "wood stove" sorts before "wooden shelf"
+        "titles": [
+            {"id": post.id, "title": post.title}
+            for post in Post.objects.filter(title__startswith="Wood").order_by(
+                "-pk"
+            )
+        ],
+        "tools": ["wood saw"],
+        "materials": [],
+    }
+    assert suggestions(q="#woodw", kinds="tags") == {"tags": ["woodwork"]}
+    assert suggestions(q="wo", kinds="users,tags", limit=1) == {
+        "users": [
+            {"id": User.objects.get(username="wolf").id, "username": "wolf"}
+        ],
+        "tags": ["wood"],
+    }
+    # Titles of harmful posts aren't suggested to guests
+    assert suggestions(client=None, q="wood", kinds="titles") == {
+        "titles": [
+            {"id": post.id, "title": "Wooden shelf"}
+            for post in Post.objects.filter(title="Wooden shelf")
+        ]
+    }
+    assert suggestions(q="") == dict.fromkeys(
+        ["users", "tags", "titles", "tools", "materials"], []
+    )
+
+
+@pytest.mark.django_db
+def test_invalid_suggestion_requests():
+    url = reverse("autocomplete")
+    assert Client().get(url, {"q": "a", "kinds": "posts"}).status_code == 400
+    assert Client().get(url, {"q": "a", "limit": 100}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_suggestions_are_range_scans():
+    plan = prefixed(Post.objects.all(), Lower("title"), "wo")[:5].explain()
+    # SQLite's plan, e.g. "SEARCH posts_post USING INDEX
+    # post_title_lower_idx (<expr>>? AND <expr><?)"
+    assert "post_title_lower_idx" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,82 @@
+import gzip
+import brotli
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from prometheus_client import REGISTRY
+import pytest
+from apps.posts.seeding import seed_data
+from static.utils.compression import CompressionMiddleware
+
+
+def compression_hits():
+    return (
+        REGISTRY.get_sample_value(
+            "cache_lookups_total", {"cache": "compression", "result": "hit"}
+        )
+        or 0
+    )
+
+
+@pytest.mark.django_db
+def test_feed_is_compressed_as_negotiated(client):
+    """
+    Large responses are compressed with the client's preferred
+    encoding, and the compressed body is reused for identical bodies.
+    """
+    seed_data({"posts": 12, "users": 6})
+    plain = client.get(reverse("post-list"))
+    assert "Content-Encoding" not in plain
+    assert "Accept-Encoding" in plain["Vary"]
+
+    response = client.get(
+        reverse("post-list"), headers={"Accept-Encoding": "gzip, br;q=0.5"}
+    )
+    assert response["Content-Encoding"] == "gzip"
+    assert int(response["Content-Length"]) < len(plain.content)
+    assert gzip.decompress(response.content) == plain.content
+
+    hits = compression_hits()
+    for _ in range(2):
+        response = client.get(
+            reverse("post-list"), headers={"Accept-Encoding": "gzip, br"}
+        )
+        assert response["Content-Encoding"] == "br"
+        assert brotli.decompress(response.content) == plain.content
+    assert compression_hits() == hits + 1
+
+
+@pytest.mark.django_db
+def test_small_responses_are_not_compressed(client):
+    response = client.get(
+        reverse("post-list"), headers={"Accept-Encoding": "gzip, br"}
+    )
+    assert response.content == b"[]"
+    assert "Content-Encoding" not in response
+
+    response = client.get(
+        reverse("post-list"), headers={"Accept-Encoding": "identity"}
+    )
+    assert "Content-Encoding" not in response
+
+
+@pytest.mark.parametrize("level", [0, 9])
+def test_streams_are_gzipped_at_the_configured_level(settings, level):
+    settings.COMPRESSION = {**settings.COMPRESSION, "GZIP_LEVEL": level}
+    chunks = [b'{"title": "Shelf"}\n' * 100 for _ in range(3)]
+    middleware = CompressionMiddleware(
+        lambda request: StreamingHttpResponse(
+            iter(chunks), content_type="application/x-ndjson"
+        )
+    )
+    request = RequestFactory().get("/", headers={"Accept-Encoding": "gzip"})
+    response = middleware(request)
+    assert response["Content-Encoding"] == "gzip"
+
+    body = b"".join(response.streaming_content)
+    assert gzip.decompress(body) == b"".join(chunks)
+    # Level 0 stores the chunks as they are
+    if level:
+        assert len(body) < len(chunks[0])
+    else:
+        assert len(body) > len(b"".join(chunks))
@@ -0,0 +1,60 @@
+import gzip
+import json
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts.models import Post, Comment, Like, Rating
+from apps.posts.seeding import seed_data
+
+
+def export(client, user, **params):
+    token = RefreshToken.for_user(user).access_token
+    response = client.get(
+        reverse("export_account"),
+        params,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    return response, b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_export_streams_all_records_and_resumes(client):
+    """
+    The export has a record per post, comment, like and rating of the
+    user, can be resumed from any cursor and gzipped.
+    """
+    user = seed_data({"posts": 30, "users": 4})["users"][0]
+    response, content = export(client, user)
+    assert response["Content-Type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in content.splitlines()]
+
+    types = [record["type"] for record in records]
+    assert types.count("post") == Post.objects.filter(user=user).count()
+    assert types.count("comment") == Comment.objects.filter(user=user).count()
+    assert types.count("like") == Like.objects.filter(user=user).count()
+    assert types.count("rating") == Rating.objects.filter(user=user).count()
+    post = Post.objects.filter(user=user).first()
+    exported = next(r["data"] for r in records if r["data"]["id"] == post.id)
+    assert len(exported["tools"]) == post.tools.count()
+
+    middle = len(records) // 2
+    _, content = export(client, user, cursor=records[middle]["cursor"])
+    resumed = [json.loads(line) for line in content.splitlines()]
+    assert resumed == records[middle + 1 :]
+
+    response, content = export(client, user, compress="gzip")
+    assert response["Content-Type"] == "application/gzip"
+    lines = gzip.decompress(content).splitlines()
+    assert [json.loads(line) for line in lines] == records
+
+
+@pytest.mark.django_db
+def test_export_rejects_invalid_cursor(client):
+    user = seed_data({"posts": 1, "users": 1})["users"][0]
+    token = RefreshToken.for_user(user).access_token
+    response = client.get(
+        reverse("export_account"),
+        {"cursor": "profiles:1"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 400
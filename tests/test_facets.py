@@ -0,0 +1,94 @@
+from collections import Counter
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts.facets import FACET_LIMIT, FACETS, facet_counts
+from apps.posts.models import Post, PostTag
+from apps.posts.seeding import seed_data
+from apps.users.models import Profile
+
+User = get_user_model()
+
+
+def expected_counts(posts):
+    """Facet counts computed in Python."""
+    counts = {
+        "tags": Counter(
+            PostTag.objects.filter(post__in=posts).values_list(
+                "tag__name", flat=True
+            )
+        ),
+        "authors": Counter(post.user.username for post in posts),
+        "harmful_tool_categories": Counter(
+            category.category
+            for post in posts
+            for category in post.harmful_tool_categories.all()
+        ),
+        "harmful_material_categories": Counter(
+            category.category
+            for post in posts
+            for category in post.harmful_material_categories.all()
+        ),
+    }
+    return {
+        name: sorted(
+            [
+                {"value": value, "count": count}
+                for value, count in values.items()
+            ],
+            key=lambda row: (-row["count"], row["value"]),
+        )[:FACET_LIMIT]
+        for name, values in counts.items()
+    }
+
+
+@pytest.mark.django_db
+def test_facets_are_counted_in_one_query():
+    seed_data({"posts": 30, "users": 5})
+    posts = Post.objects.filter(pk__in=Post.objects.order_by("pk")[:20])
+    with CaptureQueriesContext(connection) as queries:
+        counts = facet_counts(posts, list(FACETS))
+    assert len(queries) == 1
+    assert counts == expected_counts(list(posts))
+    assert set(facet_counts(posts, ["authors"])) == {"authors"}
+
+
+@pytest.mark.django_db
+def test_filter_responses_carry_facets():
+    seed_data({"posts": 15, "users": 3})
+    adult = User.objects.create_user(username="adult", password="password")
+    Profile.objects.create(user=adult, birth_date=date(1990, 1, 1))
+    token = RefreshToken.for_user(adult).access_token
+    client = Client(headers={"Authorization": f"Bearer {token}"})
+
+    def filter_posts(**data):
+        return client.post(
+            reverse("post-list"),
+            data={"action": "filter", "filters": {}, **data},
+            content_type="application/json",
+        )
+
+    response = filter_posts(facets=["authors", "tags"], page_size=5)
+    body = response.json()
+    assert len(body["results"]) == 5
+    # Facets count all matches, not only the page
+    assert body["facets"] == {
+        name: counts
+        for name, counts in expected_counts(list(Post.objects.all())).items()
+        if name in ("authors", "tags")
+    }
+    assert filter_posts(facets=["likes"]).status_code == 400
+    # Facets are a list of names
+    for facets in ["tags", ["tags", {"name": "authors"}], [["tags"]]]:
+        response = filter_posts(facets=facets)
+        assert response.status_code == 400
+        assert response.json()["error_message"] == (
+            "Facets must be a list of facet names."
+        )
+    # Without facets the response is the list of posts
+    assert isinstance(filter_posts().json(), list)
@@ -0,0 +1,80 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+from apps.posts.filter_cache import ADULT, GUEST, filter_signature
+from apps.posts.models import Post
+from apps.posts.seeding import seed_data
+
+
+def test_equivalent_filters_share_a_signature():
+    signature = filter_signature(
+        {
+            "user_id": "Maker",
+            "tags": ["Wood", "garden"],
+            "search_query": ["jar"],
+            "also_search_in": ["tools", "tags"],
+            "followers": ["someone"],
+        },
+        GUEST,
+    )
+    assert signature == filter_signature(
+        {
+            "user_id": "maker",
+            "sort_by": "date",
+            "tags": ["garden", "#wood"],
+            "search_query": ["jar"],
+            "also_search_in": ["tags", "tools", "tags"],
+            # Followers only apply to the "only_users_you_follow" view
+            "followers": ["someone else"],
+        },
+        GUEST,
+    )
+    assert signature != filter_signature({"user_id": "maker"}, GUEST)
+    # A string is one tag
+    assert filter_signature({"tags": "Wood"}, GUEST) == filter_signature(
+        {"tags": ["wood"]}, GUEST
+    )
+    assert filter_signature({}, GUEST) != filter_signature({}, ADULT)
+
+
+@pytest.mark.django_db
+def test_filter_results_are_cached_until_posts_change(
+    client, django_capture_on_commit_callbacks, settings
+):
+    # Off by default in tests, where there is no shared cache
+    settings.FILTER_CACHE = {**settings.FILTER_CACHE, "TIMEOUT": 30}
+    seed_data({"posts": 12, "users": 4})
+    Post.objects.update(harmful_post=False)
+    Post.harmful_tool_categories.through.objects.all().delete()
+    Post.harmful_material_categories.through.objects.all().delete()
+
+    def filter_posts(**data):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                reverse("post-list"),
+                data={"action": "filter", "filters": {}, **data},
+                content_type="application/json",
+            )
+        return response, len(queries)
+
+    response, misses = filter_posts()
+    ids = [post["id"] for post in response.json()]
+    assert len(ids) == 12
+    assert ids == list(
+        Post.objects.order_by("-created_at").values_list("pk", flat=True)
+    )
+    response, hits = filter_posts(filters={"sort_by": "date"})
+    assert [post["id"] for post in response.json()] == ids
+    assert hits == misses - 1
+
+    response, _ = filter_posts(page=2, page_size=5)
+    assert [post["id"] for post in response.json()] == ids[5:10]
+    assert response["X-Total-Count"] == "12"
+    assert filter_posts(page=0, page_size=5)[0].status_code == 400
+
+    # Deleting a post starts a new generation of results
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.get(pk=ids[0]).delete()
+    response, _ = filter_posts()
+    assert [post["id"] for post in response.json()] == ids[1:]
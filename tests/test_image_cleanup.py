@@ -0,0 +1,91 @@
+from django.core.files.base import ContentFile
+from django.db.models import ImageField
+import pytest
+from apps.posts import images, serializers
+from apps.posts.models import OrphanedImage, Post
+from apps.posts.seeding import seed_data
+from apps.users.serializers import ProfileImageUpdateSerializer
+
+# Images are files in MEDIA_ROOT only when the models were loaded with
+# DEBUG on, otherwise they're Cloudinary resources
+local_images = pytest.mark.skipif(
+    # pylint: disable-next=protected-access
+    not isinstance(Post._meta.get_field("image"), ImageField),
+    reason="Images are stored in Cloudinary when DEBUG is off",
+)
+
+
+@pytest.fixture(name="media")
+def media_fixture(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@local_images
+@pytest.mark.django_db
+def test_removed_images_are_deleted_from_storage(media, monkeypatch):
+    """
+    Images of deleted posts and profiles are queued, then deleted from
+    the file system in batches, failed deletions being retried later.
+    """
+    user = seed_data({"posts": 3, "users": 1})["users"][0]
+    posts = list(Post.objects.filter(user=user))
+    for index, post in enumerate(posts):
+        post.image.save(f"post_{index}.png", ContentFile(b"png"))
+    user.profile.image.save("profile.png", ContentFile(b"png"))
+    paths = [media / post.image.name for post in posts]
+    paths.append(media / user.profile.image.name)
+
+    posts[0].delete()
+    user.delete()
+    assert OrphanedImage.objects.count() == 4
+    # Nothing is deleted from storage until the queue is processed
+    assert all(path.exists() for path in paths)
+
+    delete = images.STORAGE_DELETERS["default"]
+
+    def fail_first(names):
+        delete(names[1:])
+        return {names[0]: "Storage unavailable"}
+
+    monkeypatch.setitem(images.STORAGE_DELETERS, "default", fail_first)
+    assert images.delete_orphaned_images(batch_size=10) == (3, 1)
+    failed = OrphanedImage.objects.get()
+    assert failed.attempts == 1
+    assert failed.last_error == "Storage unavailable"
+    # Retried only once the delay has passed
+    assert images.delete_orphaned_images() == (0, 0)
+    assert sum(path.exists() for path in paths) == 1
+
+    monkeypatch.undo()
+    OrphanedImage.objects.update(next_attempt_at=failed.created_at)
+    assert images.delete_orphaned_images() == (1, 0)
+    assert not any(path.exists() for path in paths)
+    assert not OrphanedImage.objects.exists()
+
+
+@local_images
+@pytest.mark.django_db
+@pytest.mark.usefixtures("media")
+def test_failed_updates_keep_their_images(monkeypatch):
+    """Images are only queued if the change replacing them is saved."""
+    user = seed_data({"posts": 1, "users": 1})["users"][0]
+    post = Post.objects.get()
+    title = post.title
+    post.image.save("post.png", ContentFile(b"png"))
+    user.profile.image.save("profile.png", ContentFile(b"png"))
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("Database unavailable")
+
+    monkeypatch.setattr(serializers, "handle_post_submission", fail)
+    with pytest.raises(RuntimeError):
+        serializers.PostSerializer().update(post, {"title": "Renamed"})
+    monkeypatch.setattr(type(user.profile), "save", fail)
+    with pytest.raises(RuntimeError):
+        ProfileImageUpdateSerializer().update(
+            user.profile, {"image": ContentFile(b"png", name="new.png")}
+        )
+
+    assert not OrphanedImage.objects.exists()
+    assert Post.objects.get().title == title
@@ -0,0 +1,81 @@
+from django.db import connection
+from django.db.models import Count
+import pytest
+from apps.posts.models import Post, Comment, Like
+from apps.users.models import Profile, username_iexact
+
+# The index of the unique_like constraint
+LIKE_INDEX = {
+    "sqlite": "sqlite_autoindex_posts_like_1",
+    "postgresql": "unique_like",
+}
+
+
+@pytest.fixture
+def planner():
+    """
+    Makes Postgres plan with indexes wherever they apply, it would scan
+    the (empty) tables of the test database instead.
+    """
+    if connection.vendor not in LIKE_INDEX:
+        pytest.skip(f"No plans to check for {connection.vendor}")
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+
+def query_plan(queryset):
+    """Returns the plan of a query, which must not scan a whole table."""
+    plan = queryset.explain()
+    for line in plan.splitlines():
+        # SQLite's "SCAN table USING INDEX" reads the index in order
+        assert "Seq Scan" not in line, plan
+        assert "SCAN" not in line or "USING" in line, plan
+    return plan
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("planner")
+@pytest.mark.parametrize(
+    "queryset, index",
+    [
+        # The feed
+        (
+            lambda: Post.objects.order_by("-created_at")[:20],
+            "post_created_idx",
+        ),
+        # A user's posts
+        (
+            lambda: Post.objects.filter(user_id=1).order_by("-created_at"),
+            "post_user_created_idx",
+        ),
+        # A profile by username
+        (
+            lambda: Profile.objects.select_related("user").filter(
+                username_iexact("Username", "user__username")
+            ),
+            "user_username_lower_idx",
+        ),
+        # A post's comments
+        (
+            lambda: Comment.objects.filter(post_id=1).order_by("created_at"),
+            "comment_post_created_idx",
+        ),
+    ],
+)
+def test_queries_use_indexes(queryset, index):
+    assert index in query_plan(queryset())
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("planner")
+def test_likes_use_the_unique_index():
+    index = LIKE_INDEX[connection.vendor]
+    assert index in query_plan(Like.objects.filter(post_id=1, user_id=2))
+    # Counting a post's likes
+    assert index in query_plan(
+        Like.objects.filter(post_id=1)
+        .values("post")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
@@ -0,0 +1,87 @@
+import copy
+import io
+import logging
+import logging.config
+import time
+import pytest
+from django.conf import settings
+from static.utils.log_handlers import QueuedHandler
+
+
+def configure(config):
+    """Applies a logging config, returning its handlers by name."""
+    logging.config.dictConfig(config)
+    return {
+        name: next(
+            handler
+            for logger in logging.Logger.manager.loggerDict.values()
+            if isinstance(logger, logging.Logger)
+            for handler in logger.handlers
+            if handler.get_name() == name
+        )
+        for name in config["handlers"]
+    }
+
+
+@pytest.fixture(name="restore_logging")
+def restore_logging_fixture():
+    yield
+    # Back to the configuration Django set up
+    logging.config.dictConfig(settings.LOGGING)
+
+
+@pytest.mark.usefixtures("restore_logging")
+def test_settings_logging_is_applied(tmp_path):
+    config = copy.deepcopy(settings.LOGGING)
+    for handler in config["handlers"].values():
+        if "filename" in handler:
+            handler["filename"] = str(tmp_path / "app.log")
+
+    handlers = configure(config)
+    assert all(
+        isinstance(handler, QueuedHandler) for handler in handlers.values()
+    )
+    logging.getLogger("app").warning("Queued %s", "record")
+    for handler in handlers.values():
+        handler.close()
+    assert "Queued record" in (tmp_path / "app.log").read_text()
+
+
+@pytest.mark.usefixtures("restore_logging")
+@pytest.mark.parametrize("policy", ["drop", "block"])
+def test_full_queue_policies(policy):
+    stream = io.StringIO()
+    handler = configure(
+        {
+            "version": 1,
+            "disable_existing_loggers": False,
+            "handlers": {
+                "queued": {
+                    "()": "static.utils.log_handlers.QueuedHandler",
+                    "target": "logging.StreamHandler",
+                    "stream": stream,
+                    "maxsize": 1,
+                    "policy": policy,
+                    "timeout": 0.2,
+                }
+            },
+            "loggers": {"app.queued": {"handlers": ["queued"]}},
+        }
+    )["queued"]
+    # Nothing takes records off the queue
+    handler.listener.stop()
+    handler.listener = None
+
+    logger = logging.getLogger("app.queued")
+    start = time.perf_counter()
+    logger.warning("first")
+    logger.warning("second")
+    elapsed = time.perf_counter() - start
+    assert handler.dropped == 1
+    # "block" waits for room before giving up, "drop" doesn't
+    if policy == "block":
+        assert elapsed >= 0.2
+    else:
+        assert elapsed < 0.2
+    assert handler.queue.get_nowait().getMessage() == "first"
+    handler.close()
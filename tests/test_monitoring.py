@@ -0,0 +1,170 @@
+import io
+import json
+import logging
+import zipfile
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+import pytest
+from apps.monitoring.profiling import make_token
+from static.utils.log_handlers import JsonFormatter
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client, settings):
+    """
+    Sampled requests get a Server-Timing header with the total time,
+    the database time and query count, and the serialization span.
+    """
+    settings.REQUEST_TIMING = {
+        "SAMPLE_RATE": 1.0,
+        "SERVER_TIMING_HEADER": True,
+    }
+    response = client.get(reverse("post-list"))
+
+    assert response.status_code == 200
+    server_timing = response["Server-Timing"]
+    assert server_timing.startswith("total;dur=")
+    assert "db;dur=" in server_timing
+    assert "queries" in server_timing
+    assert "serialize;dur=" in server_timing
+    assert "render;dur=" in server_timing
+
+
+@pytest.mark.django_db
+def test_unsampled_requests_are_not_timed(client, settings):
+    settings.REQUEST_TIMING = {
+        "SAMPLE_RATE": 0.0,
+        "SERVER_TIMING_HEADER": True,
+    }
+    response = client.get(reverse("post-list"))
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client, settings):
+    """
+    Requests show up in the Prometheus metrics under their URL name.
+    """
+    settings.METRICS_TOKEN = ""
+    client.get(reverse("post-list"))
+    response = client.get(reverse("metrics"))
+
+    assert response.status_code == 200
+    body = response.content.decode("utf-8")
+    assert "http_request_duration_seconds_bucket" in body
+    assert 'url_name="post-list"' in body
+    assert "db_queries_per_request" in body
+    assert "http_requests_in_flight" in body
+
+
+def test_metrics_endpoint_requires_token(client, settings):
+    settings.METRICS_TOKEN = "secret"
+
+    assert client.get(reverse("metrics")).status_code == 401
+    assert (
+        client.get(
+            reverse("metrics"), headers={"Authorization": "Bearer secret"}
+        ).status_code
+        == 200
+    )
+
+
+@pytest.mark.django_db
+def test_profiling_with_signed_token(client, settings, tmp_path):
+    """
+    A request with a valid token is profiled, anonymous requests without
+    one are not, and the rate limit stops profiling.
+    """
+    settings.PROFILING = {
+        **settings.PROFILING,
+        "DIRECTORY": str(tmp_path),
+        "RATE_LIMIT": 1,
+    }
+    cache.clear()
+    token = make_token()
+
+    assert "X-Profile" not in client.get(reverse("post-list"), {"profile": 1})
+
+    response = client.get(
+        reverse("post-list"), headers={"X-Profile-Token": token}
+    )
+    assert response.status_code == 200
+    directory = tmp_path / response["X-Profile"]
+    assert (directory / "profile.prof").exists()
+    assert "cumulative" in (directory / "profile.txt").read_text()
+    timeline = json.loads((directory / "sql.json").read_text())
+    assert timeline and "fingerprint" in timeline[0]
+
+    response = client.get(
+        reverse("post-list"), headers={"X-Profile-Token": token}
+    )
+    assert response["X-Profile"] == "rate-limited"
+
+
+@pytest.mark.django_db
+def test_profiling_download_for_staff(client, settings):
+    settings.PROFILING = {**settings.PROFILING, "RATE_LIMIT": 5}
+    cache.clear()
+    staff = get_user_model().objects.create_user(
+        username="staff", password="securePassword", is_staff=True
+    )
+    client.force_login(staff)
+
+    response = client.get(reverse("post-list"), {"profile": "download"})
+
+    assert response["Content-Type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert set(archive.namelist()) == {
+            "profile.prof",
+            "profile.txt",
+            "sql.json",
+            "request.json",
+        }
+        assert json.loads(archive.read("request.json"))["status"] == 200
+
+
+@pytest.mark.django_db
+def test_slow_query_log(client, settings, tmp_path, monkeypatch):
+    """
+    Slow queries are logged with their fingerprint, origin and plan, and
+    summarized by the slow_queries command.
+    """
+    log_file = tmp_path / "slow_queries.log"
+    settings.SLOW_QUERIES = {
+        **settings.SLOW_QUERIES,
+        "THRESHOLD_MS": 1e-6,
+        "LOG_FILE": str(log_file),
+    }
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(JsonFormatter())
+    # Only to the test's file, not to the configured logs/slow_queries.log
+    logger = logging.getLogger("app.slow_queries")
+    monkeypatch.setattr(logger, "handlers", [handler])
+    monkeypatch.setattr(logger, "propagate", False)
+    try:
+        client.post(
+            reverse("post-list"),
+            data={"action": "filter", "filters": {"search_query": ["jar"]}},
+            content_type="application/json",
+        )
+    finally:
+        handler.close()
+
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    posts_query = next(
+        entry
+        for entry in entries
+        if entry["sql"].startswith('SELECT "posts_post"."id"')
+    )
+    # The ids of the matching posts, see filter_posts
+    assert posts_query["origin"]["file"] == "apps/posts/filter_cache.py"
+    assert posts_query["plan"]
+
+    output = io.StringIO()
+    call_command("slow_queries", stdout=output)
+    assert posts_query["fingerprint"] in output.getvalue()
+    assert "Plan:" in output.getvalue()
@@ -0,0 +1,216 @@
+"""
+Query-count budgets of the API endpoints.
+
+Every endpoint is requested against a small and a large data set. The
+number of SQL queries must not grow with the data (no N+1 queries) and
+must stay within the endpoint's budget. Failures list the fingerprints
+of the queries responsible.
+"""
+
+import json
+from collections import Counter
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts.models import Post, Comment, Like, Rating
+from apps.posts.seeding import seed_data
+from apps.users.models import Profile, Follow
+from static.utils.sql import fingerprint_sql, normalize_sql
+
+User = get_user_model()
+
+# Posts (and users) of the small data set, and added for the large one
+SMALL = {"posts": 10, "users": 5}
+LARGE = {"posts": 190, "users": 45}
+
+# Maximum number of queries per request, authentication included
+BUDGETS = {
+    "post_list": 8,
+    "post_list_guest": 6,
+    "post_detail": 8,
+    # Filters load the ids of the matching posts, then the posts, as the
+    # filter cache is off without a shared cache
+    "filter_date": 9,
+    "filter_likes": 9,
+    "filter_comments": 9,
+    "search": 9,
+    "comments": 3,
+    "comment_create": 4,
+    "profile": 4,
+    "like": 2,
+    # Includes reading the replaced rating and updating the post's
+    # averages and histogram
+    "rating": 5,
+    "follow": 2,
+    # Includes indexing the post for similar posts and trimming the
+    # lists it joins
+    "post_create": 19,
+}
+
+
+def build_requests(client, guest, post, author):
+    def filter_request(filters):
+        return lambda: client.post(
+            reverse("post-list"),
+            data={"action": "filter", "filters": filters},
+            content_type="application/json",
+        )
+
+    def write_request(url, data=None):
+        # Writes run inside a savepoint that is rolled back, so every
+        # run starts from the same data.
+        return lambda: client.post(
+            url, data=data or {}, content_type="application/json"
+        )
+
+    requests = {
+        "post_list": lambda: client.get(reverse("post-list")),
+        "post_list_guest": lambda: guest.get(reverse("post-list")),
+        "post_detail": lambda: client.get(
+            reverse("post-detail", args=[post.id])
+        ),
+        "search": filter_request(
+            {
+                "search_query": ["wood", "jar"],
+                "also_search_in": ["tags", "materials", "tools"],
+            }
+        ),
+        "comments": lambda: client.get(
+            reverse("comment-create", args=[post.id])
+        ),
+        "comment_create": write_request(
+            reverse("comment-create", args=[post.id]), {"text": "Nice!"}
+        ),
+        "profile": lambda: client.get(f"/users/profile/{author.username}/"),
+        "like": write_request(reverse("like-create", args=[post.id])),
+        "rating": write_request(
+            reverse("rating-create", args=[post.id]),
+            {"saves_money": 10, "saves_time": 20, "is_useful": 30},
+        ),
+        "follow": write_request(reverse("follow-create", args=[author.id])),
+        "post_create": lambda: client.post(
+            reverse("post-list"),
+            data={
+                "title": "Budget post",
+                "description": "Description",
+                "instructions": "Instructions",
+                "harmful_tool_categories": "[]",
+                "harmful_material_categories": "[]",
+                "tools": json.dumps(
+                    [{"quantity": "1", "name": "Saw", "description": "-"}]
+                ),
+                "materials": json.dumps(
+                    [{"quantity": "2", "name": "Jar", "description": "-"}]
+                ),
+            },
+        ),
+    }
+    for sort_by in ["date", "likes", "comments"]:
+        requests[f"filter_{sort_by}"] = filter_request({"sort_by": sort_by})
+    return requests
+
+
+class Rollback(Exception):
+    pass
+
+
+def capture_queries(request):
+    """
+    Returns the SQL of the queries `request` runs, undoing its writes.
+    """
+    with CaptureQueriesContext(connection) as context:
+        try:
+            with transaction.atomic():
+                response = request()
+                assert response.status_code < 400, response.content[:500]
+                raise Rollback
+        except Rollback:
+            pass
+    # Savepoint statements are an artefact of the rollback
+    return [
+        query["sql"]
+        for query in context.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+
+
+def fingerprint_report(small, large):
+    """
+    Lists the fingerprints of the queries run for the large data set,
+    those that ran more often than for the small one first.
+    """
+    small_counts = Counter(fingerprint_sql(sql) for sql in small)
+    large_counts = Counter(fingerprint_sql(sql) for sql in large)
+    examples = {fingerprint_sql(sql): normalize_sql(sql) for sql in large}
+    lines = []
+    for fingerprint, count in sorted(
+        large_counts.items(),
+        key=lambda item: small_counts[item[0]] - item[1],
+    ):
+        lines.append(
+            f"  {fingerprint} x{small_counts[fingerprint]} -> x{count}: "
+            f"{examples[fingerprint][:200]}"
+        )
+    return "\n".join(lines)
+
+
+def grow(post, author):
+    """
+    Adds posts and users, and comments, likes, ratings and followers to
+    the requested post and author.
+    """
+    users = seed_data(LARGE, seed=1, prefix="large")["users"]
+    Comment.objects.bulk_create(
+        [Comment(post=post, user=user, text="Grown") for user in users]
+    )
+    Like.objects.bulk_create([Like(post=post, user=user) for user in users])
+    Rating.objects.bulk_create(
+        [Rating(post=post, user=user, is_useful=50) for user in users]
+    )
+    Follow.objects.bulk_create(
+        [Follow(follower=user, following=author) for user in users]
+    )
+
+
+@pytest.fixture(name="endpoints")
+def endpoints_fixture():
+    seeded = seed_data(SMALL, prefix="small")
+
+    viewer = User.objects.create_user(
+        username="budget_viewer", password="securePassword"
+    )
+    Profile.objects.create(user=viewer, birth_date=date(1990, 1, 1))
+    token = RefreshToken.for_user(viewer).access_token
+    client = Client(headers={"Authorization": f"Bearer {token}"})
+
+    post = (
+        Post.objects.annotate(comment_count=Count("post_comment"))
+        .order_by("-comment_count")
+        .first()
+    )
+    author = seeded["users"][0]
+    return post, author, build_requests(client, Client(), post, author)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", sorted(BUDGETS))
+def test_query_budget(endpoints, name):
+    post, author, requests = endpoints
+    request = requests[name]
+    capture_queries(request)  # Warm up caches (e.g. content types)
+    small = capture_queries(request)
+    grow(post, author)
+    large = capture_queries(request)
+
+    if len(small) != len(large) or len(large) > BUDGETS[name]:
+        pytest.fail(
+            f"{name} ran {len(small)} queries with {SMALL['posts']} posts "
+            f"and {len(large)} with {SMALL['posts'] + LARGE['posts']} "
+            f"(budget {BUDGETS[name]}):\n" + fingerprint_report(small, large)
+        )
@@ -0,0 +1,173 @@
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts.models import Post, Rating, RatingBucket
+from apps.posts.ratings import rating_bucket, refresh_rating_stats
+from apps.posts.seeding import seed_data
+from apps.users import deletion
+from apps.users.models import Profile
+
+User = get_user_model()
+
+
+def rating_stats():
+    """The stored rating figures of every post."""
+    return {
+        "posts": {
+            post["pk"]: post
+            for post in Post.objects.values(
+                "pk",
+                "rating_count",
+                "avg_saves_money",
+                "avg_saves_time",
+                "avg_is_useful",
+            )
+        },
+        "buckets": set(
+            RatingBucket.objects.exclude(count=0).values_list(
+                "post_id", "field", "bucket", "count"
+            )
+        ),
+    }
+
+
+def assert_same_stats(stats, expected):
+    assert stats["buckets"] == expected["buckets"]
+    for pk, post in expected["posts"].items():
+        assert stats["posts"][pk] == pytest.approx(post)
+
+
+@pytest.fixture(name="raters")
+def raters_fixture():
+    author = User.objects.create_user(username="author", password="password")
+    Profile.objects.create(user=author, birth_date=date(1990, 1, 1))
+    posts = [
+        Post.objects.create(
+            user=author, title=title, description="-", instructions="-"
+        )
+        for title in ["shelf", "bench", "stool"]
+    ]
+    clients = []
+    for name in ["ann", "bob", "cid"]:
+        user = User.objects.create_user(username=name, password="password")
+        Profile.objects.create(user=user, birth_date=date(1990, 1, 1))
+        token = RefreshToken.for_user(user).access_token
+        clients.append(Client(headers={"Authorization": f"Bearer {token}"}))
+
+    def rate(client, post, saves_money, saves_time=50, is_useful=50):
+        response = client.post(
+            reverse("rating-create", args=[post.pk]),
+            data={
+                "saves_money": saves_money,
+                "saves_time": saves_time,
+                "is_useful": is_useful,
+            },
+            content_type="application/json",
+        )
+        assert response.status_code in (200, 201)
+
+    return posts, clients, rate
+
+
+def test_ratings_are_bucketed_by_tens():
+    values = [0, 9, 10, 95, 100]
+    assert [rating_bucket(value) for value in values] == [0, 0, 1, 9, 9]
+
+
+@pytest.mark.django_db
+def test_rating_figures_follow_rating_writes(raters):
+    (shelf, bench, _), (ann, bob, cid), rate = raters
+    rate(ann, shelf, 10, 100)
+    rate(bob, shelf, 35)
+    rate(cid, bench, 100)
+    # Updates replace the previous values
+    rate(bob, shelf, 80, 0)
+
+    shelf.refresh_from_db()
+    assert shelf.rating_count == 2
+    assert shelf.avg_saves_money == pytest.approx(45)
+    assert shelf.avg_saves_time == pytest.approx(50)
+
+    response = ann.get(reverse("rating-distribution", args=[shelf.pk]))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rating_count"] == 2
+    assert body["buckets"][0] == [0, 9] and body["buckets"][-1] == [90, 100]
+    money = body["distribution"]["saves_money"]
+    assert money == [0, 1] + [0] * 6 + [1, 0]
+    assert body["distribution"]["saves_time"] == [1] + [0] * 8 + [1]
+    assert ann.get(reverse("rating-distribution", args=[0])).status_code == 404
+
+    # The figures are the ones recomputed from the ratings
+    stats = rating_stats()
+    refresh_rating_stats(stats["posts"])
+    assert_same_stats(stats, rating_stats())
+
+
+@pytest.mark.django_db
+def test_leaderboards_rank_posts_by_average(raters):
+    (shelf, bench, stool), (ann, bob, _), rate = raters
+    rate(ann, shelf, 60)
+    rate(ann, bench, 90)
+    rate(bob, bench, 70)
+    rate(ann, stool, 95, is_useful=0)
+
+    def ranking(**params):
+        response = Client().get(reverse("rating-leaderboard"), params)
+        assert response.status_code == 200
+        return [post["title"] for post in response.json()]
+
+    assert ranking(by="saves_money") == ["stool", "bench", "shelf"]
+    assert ranking(by="saves_money", min_ratings=2) == ["bench"]
+    assert ranking(by="is_useful", limit=2) == ["bench", "shelf"]
+    url = reverse("rating-leaderboard")
+    assert Client().get(url, {"by": "price"}).status_code == 400
+    assert (
+        Client().get(url, {"by": "is_useful", "limit": 0}).status_code == 400
+    )
+
+
+@pytest.mark.django_db
+def test_deleted_ratings_leave_the_figures(django_capture_on_commit_callbacks):
+    users = seed_data({"posts": 20, "users": 5})["users"]
+    user = max(users, key=lambda user: user.post_ratings.count())
+    assert user.post_ratings.exists()
+
+    job = deletion.request_account_deletion(user)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert deletion.run_account_deletion(job.pk, batch_size=2)
+    # The posts the user rated no longer count their ratings
+    stats = rating_stats()
+    refresh_rating_stats(stats["posts"])
+    assert_same_stats(stats, rating_stats())
+
+
+@pytest.mark.django_db
+def test_ratings_written_outside_the_api_refresh_the_figures(
+    raters, django_capture_on_commit_callbacks
+):
+    (shelf, bench, _), (ann, bob, _), rate = raters
+    rate(ann, shelf, 20)
+    rate(bob, shelf, 60)
+    rate(ann, bench, 90)
+
+    # As the admin does
+    with django_capture_on_commit_callbacks(execute=True):
+        rating = Rating.objects.get(post=shelf, saves_money=20)
+        rating.saves_money = 40
+        rating.save()
+    shelf.refresh_from_db()
+    assert shelf.avg_saves_money == pytest.approx(50)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        User.objects.get(username="ann").delete()
+    shelf.refresh_from_db()
+    bench.refresh_from_db()
+    assert (shelf.rating_count, bench.rating_count) == (1, 0)
+    assert shelf.avg_saves_money == pytest.approx(60)
+    stats = rating_stats()
+    refresh_rating_stats(stats["posts"])
+    assert_same_stats(stats, rating_stats())
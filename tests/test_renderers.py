@@ -0,0 +1,56 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+import pytest
+from static.utils.parsers import FastJSONParser
+from static.utils.renderers import FastJSONRenderer
+
+PAYLOAD = ReturnDict(
+    {
+        "utc": datetime(2025, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc),
+        "offset": datetime(
+            2025, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=2))
+        ),
+        "naive": datetime(2025, 1, 2, 3, 4, 5),
+        "date": date(2025, 1, 2),
+        "time": time(3, 4, 5),
+        "duration": timedelta(minutes=2),
+        "decimal": Decimal("4.50"),
+        "uuid": uuid.UUID(int=1),
+        "lazy": gettext_lazy("Post liked successfully!"),
+        "text": "Ünïcode \u2028 separators \u2029",
+        "nested": [{"id": 1, "tools": [], "rating": 1.5, "ok": None}],
+        1: "non-string key",
+    },
+    serializer=None,
+)
+
+
+def test_renderer_matches_drf():
+    """
+    The orjson renderer produces the same bytes as DRF's renderer,
+    including how dates, Decimals and line separators are encoded.
+    """
+    assert FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+    # Indented output is left to DRF
+    assert FastJSONRenderer().render(
+        PAYLOAD, "application/json; indent=2"
+    ) == JSONRenderer().render(PAYLOAD, "application/json; indent=2")
+
+
+def test_parser_matches_drf():
+    body = '{"title": "Ünïcode", "tools": [{"quantity": 1.5}], "x": null}'
+
+    def parse(parser, content):
+        return parser.parse(io.BytesIO(content.encode("utf-8")))
+
+    assert parse(FastJSONParser(), body) == parse(JSONParser(), body)
+    for invalid in ['{"a": NaN}', "{", ""]:
+        with pytest.raises(ParseError):
+            parse(FastJSONParser(), invalid)
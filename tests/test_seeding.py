@@ -0,0 +1,43 @@
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+import pytest
+from apps.posts.models import Post, Like
+from apps.users.models import Follow
+
+User = get_user_model()
+
+
+def seed(**options):
+    out = StringIO()
+    call_command("seed_data", users=30, posts=40, stdout=out, **options)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_seed_data_command():
+    """
+    The command creates the requested volumes in batches, and the same
+    seed generates the same data whatever the batch size.
+    """
+    output = seed(prefix="first", seed=4, batch_size=7)
+    assert "Created" in output
+    assert User.objects.filter(username__startswith="first_").count() == 30
+    assert Post.objects.count() == 40
+    assert Like.objects.exists() and Follow.objects.exists()
+
+    seed(prefix="second", seed=4)
+
+    def likes(prefix):
+        return sorted(
+            (title, username.removeprefix(prefix))
+            for title, username in Like.objects.filter(
+                user__username__startswith=prefix
+            ).values_list("post__title", "user__username")
+        )
+
+    assert likes("first") == likes("second")
+
+    with pytest.raises(CommandError):
+        seed(prefix="first")
@@ -0,0 +1,180 @@
+import json
+from io import StringIO
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client
+from django.test.client import MULTIPART_CONTENT, BOUNDARY, encode_multipart
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts import similarity
+from apps.posts.models import Post, PostToken, SimilarPost
+from apps.posts.similarity import tokenize, update_similar_posts
+from apps.users.models import Profile
+
+User = get_user_model()
+
+
+def post_form(title, tools=(), materials=(), tags=""):
+    return {
+        "action": "create",
+        "title": title,
+        "description": "Description",
+        "instructions": "Instructions",
+        "default_image_index": 1,
+        "tags": tags,
+        "harmful_post": "false",
+        "harmful_tool_categories": "[]",
+        "harmful_material_categories": "[]",
+        "tools": json.dumps(
+            [
+                {"quantity": "1", "name": name, "description": "-"}
+                for name in tools
+            ]
+        ),
+        "materials": json.dumps(
+            [
+                {"quantity": "1", "name": name, "description": "-"}
+                for name in materials
+            ]
+        ),
+    }
+
+
+def similar_lists():
+    lists = {}
+    for post_id, similar_id, score in SimilarPost.objects.order_by(
+        "post_id", "-score", "similar_id"
+    ).values_list("post_id", "similar_id", "score"):
+        lists.setdefault(post_id, []).append((similar_id, round(score, 6)))
+    return lists
+
+
+@pytest.fixture(name="maker")
+def maker_fixture():
+    user = User.objects.create_user(username="maker", password="password")
+    Profile.objects.create(user=user, birth_date=date(1990, 1, 1))
+    token = RefreshToken.for_user(user).access_token
+    return Client(headers={"Authorization": f"Bearer {token}"})
+
+
+def test_posts_are_tokenized():
+    assert tokenize([" Hand  Saw"], ["Jar", ""], ["wood"]) == {
+        "tool:hand saw": 1.0,
+        "material:jar": 1.0,
+        "tag:wood": 0.5,
+    }
+
+
+@pytest.mark.django_db
+def test_similar_posts_are_kept_up_to_date(maker, monkeypatch):
+    monkeypatch.setattr(similarity, "SIMILAR_POSTS_LIMIT", 2)
+
+    def create(title, **fields):
+        response = maker.post(reverse("post-list"), post_form(title, **fields))
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    shelf = create("shelf", tools=["Saw"], materials=["Jar"], tags="wood")
+    bench = create("bench", tools=["saw"], materials=["jar"])
+    stool = create("stool", tools=["Saw"], tags="garden")
+    lamp = create("lamp", tools=["Drill"])
+
+    # 2 / (2.5 + 2 - 2) and 1 / (2.5 + 1.5 - 1)
+    assert similar_lists()[shelf] == [(bench, 0.8), (stool, 0.333333)]
+    assert lamp not in similar_lists()
+
+    # A closer post pushes the stool out of the full lists
+    crate = create("crate", tools=["Saw"], materials=["Jar"])
+    assert similar_lists()[bench] == [(crate, 1.0), (shelf, 0.8)]
+
+    # Updates move the post between lists
+    response = maker.put(
+        reverse("post-detail", args=[stool]),
+        encode_multipart(BOUNDARY, post_form("stool", tools=["Drill"])),
+        content_type=MULTIPART_CONTENT,
+    )
+    assert response.status_code == 200
+    assert similar_lists()[lamp] == [(stool, 1.0)]
+    assert stool not in dict(similar_lists()[shelf])
+
+    # The patched lists are the ones a rebuild computes
+    patched = similar_lists()
+    call_command("rebuild_similar_posts", stdout=StringIO())
+    assert similar_lists() == patched
+
+
+@pytest.mark.django_db
+def test_similar_posts_endpoint(maker):
+    ids = [
+        maker.post(reverse("post-list"), post_form(title, **fields)).json()[
+            "id"
+        ]
+        for title, fields in [
+            ("shelf", {"tools": ["Saw"], "materials": ["Jar"]}),
+            ("bench", {"tools": ["Saw"]}),
+            ("crate", {"tools": ["Saw"], "materials": ["Jar"]}),
+        ]
+    ]
+    response = maker.get(reverse("similar-posts", args=[ids[0]]))
+    assert response.status_code == 200
+    assert [(post["id"], post["similarity"]) for post in response.json()] == [
+        (ids[2], 1.0),
+        (ids[1], 0.5),
+    ]
+    assert maker.get(reverse("similar-posts", args=[0])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_pairs_written_by_concurrent_submissions_are_kept(maker):
+    shelf, bench = [
+        maker.post(
+            reverse("post-list"), post_form(title, tools=["Saw"])
+        ).json()["id"]
+        for title in ["shelf", "bench"]
+    ]
+    lists = similar_lists()
+    assert lists[shelf] == [(bench, 1.0)]
+
+    # The bench is submitted again while the shelf's list already holds
+    # it, as when both posts are submitted at the same time
+    PostToken.objects.filter(post_id=bench).delete()
+    SimilarPost.objects.filter(post_id=bench).delete()
+    update_similar_posts(Post.objects.get(pk=bench), tokenize(["Saw"], [], []))
+    assert similar_lists() == lists
+
+
+@pytest.mark.django_db
+def test_lists_that_lose_a_post_are_refilled(maker, monkeypatch):
+    monkeypatch.setattr(similarity, "SIMILAR_POSTS_LIMIT", 2)
+    shelf, bench, stool, crate = [
+        maker.post(reverse("post-list"), post_form(title, **fields)).json()[
+            "id"
+        ]
+        for title, fields in [
+            ("shelf", {"tools": ["Saw"], "materials": ["Jar"]}),
+            ("bench", {"tools": ["Saw"], "materials": ["Jar"]}),
+            ("stool", {"tools": ["Saw"], "materials": ["Jar", "Nail"]}),
+            ("crate", {"tools": ["Saw"]}),
+        ]
+    ]
+    # The crate is third for the shelf
+    assert similar_lists()[shelf] == [(bench, 1.0), (stool, 0.666667)]
+
+    # The bench no longer shares anything with the shelf
+    response = maker.put(
+        reverse("post-detail", args=[bench]),
+        encode_multipart(BOUNDARY, post_form("bench", tools=["Drill"])),
+        content_type=MULTIPART_CONTENT,
+    )
+    assert response.status_code == 200
+    assert similar_lists()[shelf] == [(stool, 0.666667), (crate, 0.5)]
+
+    response = maker.delete(reverse("delete-post", args=[stool]))
+    assert response.status_code == 200
+    assert similar_lists()[shelf] == [(crate, 0.5)]
+    # The lists are the ones a rebuild computes
+    patched = similar_lists()
+    call_command("rebuild_similar_posts", stdout=StringIO())
+    assert similar_lists() == patched
@@ -0,0 +1,50 @@
+import gzip
+import json
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+from apps.posts.seeding import seed_data
+from static.utils import streaming
+
+
+@pytest.mark.django_db
+def test_streamed_feed_matches_feed(client, monkeypatch):
+    """
+    The streamed feed (JSON array or NDJSON) has the same posts as the
+    regular one, and is fetched in chunks without N+1 queries.
+    """
+    seed_data({"posts": 12, "users": 6})
+    monkeypatch.setattr(streaming, "STREAM_BUFFER_SIZE", 1)
+    feed = client.get(reverse("post-list")).json()
+
+    response = client.get(reverse("post-list"), {"stream": "json"})
+    assert response.streaming
+    assert response["Content-Type"] == "application/json"
+    with CaptureQueriesContext(connection) as queries:
+        chunks = list(response.streaming_content)
+    # "[", every post and "]"
+    assert len(chunks) == len(feed) + 2
+    assert json.loads(b"".join(chunks)) == feed
+    # One query for the posts and one per prefetched relation
+    assert len(queries) <= 6
+
+    response = client.get(reverse("post-list"), {"stream": "ndjson"})
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).splitlines()
+    assert [json.loads(line) for line in lines] == feed
+
+
+@pytest.mark.parametrize("level", [0, 9])
+def test_downloads_are_gzipped_at_the_configured_level(settings, level):
+    settings.COMPRESSION = {**settings.COMPRESSION, "GZIP_LEVEL": level}
+    records = [{"type": "post", "title": "Shelf"}] * 200
+    response = streaming.ndjson_download(records, "export.ndjson", True)
+    assert response["Content-Type"] == "application/gzip"
+    assert 'filename="export.ndjson.gz"' in response["Content-Disposition"]
+
+    content = b"".join(response.streaming_content)
+    plain = gzip.decompress(content)
+    assert [json.loads(line) for line in plain.splitlines()] == records
+    # Level 0 stores the file as it is
+    assert (len(content) > len(plain)) == (level == 0)
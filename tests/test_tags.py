@@ -0,0 +1,103 @@
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.test.client import MULTIPART_CONTENT, BOUNDARY, encode_multipart
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts.models import Post, PostTag
+from apps.posts.tags import parse_tags
+from apps.users.models import Profile
+
+User = get_user_model()
+
+
+def post_form(title, tags):
+    return {
+        "action": "create",
+        "title": title,
+        "description": "Description",
+        "instructions": "Instructions",
+        "default_image_index": 1,
+        "tags": tags,
+        "harmful_post": "false",
+        "harmful_tool_categories": "[]",
+        "harmful_material_categories": "[]",
+        "tools": "[]",
+        "materials": "[]",
+    }
+
+
+def post_tags(post_id):
+    return set(
+        PostTag.objects.filter(post_id=post_id).values_list(
+            "tag__name", flat=True
+        )
+    )
+
+
+def test_tags_are_parsed_and_normalized():
+    assert parse_tags("#Wood, garden  wood,,") == ["wood", "garden"]
+    assert not parse_tags(None)
+    assert parse_tags("x" * 80) == ["x" * 50]
+
+
+@pytest.mark.django_db
+def test_posts_are_filtered_by_exact_tags():
+    user = User.objects.create_user(username="tagger", password="password")
+    Profile.objects.create(user=user, birth_date=date(1990, 1, 1))
+    token = RefreshToken.for_user(user).access_token
+    client = Client(headers={"Authorization": f"Bearer {token}"})
+
+    ids = {}
+    for title, tags in [
+        ("shelf", "#Wood, garden"),
+        ("bench", "wood metal"),
+        ("panel", "woodwork"),
+    ]:
+        response = client.post(reverse("post-list"), post_form(title, tags))
+        assert response.status_code == 201
+        ids[title] = response.json()["id"]
+    assert post_tags(ids["shelf"]) == {"wood", "garden"}
+
+    # Updates replace the tags
+    response = client.put(
+        reverse("post-detail", args=[ids["panel"]]),
+        encode_multipart(BOUNDARY, post_form("panel", "Metal")),
+        content_type=MULTIPART_CONTENT,
+    )
+    assert response.status_code == 200
+    assert post_tags(ids["panel"]) == {"metal"}
+
+    def titles(filters):
+        response = client.post(
+            reverse("post-list"),
+            data={"action": "filter", "filters": filters},
+            content_type="application/json",
+        )
+        assert response.status_code == 200
+        return {post["title"] for post in response.json()}
+
+    assert titles({"tags": ["WOOD"]}) == {"shelf", "bench"}
+    assert titles({"tags": ["wood", "metal"]}) == {"bench"}
+    # A string is one tag, not one tag per character
+    assert titles({"tags": "Wood"}) == {"shelf", "bench"}
+    response = client.post(
+        reverse("post-list"),
+        data={"action": "filter", "filters": {"tags": {"name": "wood"}}},
+        content_type="application/json",
+    )
+    assert response.status_code == 400
+    # Searching in tags matches whole tags, not parts of the string
+    Post.objects.filter(pk=ids["panel"]).update(tags="metal woodwork")
+    assert titles({"search_query": ["wood"], "also_search_in": ["tags"]}) == {
+        "shelf",
+        "bench",
+    }
+
+    response = client.get(reverse("tag-list"), {"limit": 2})
+    assert response.json() == [
+        {"name": "metal", "count": 2},
+        {"name": "wood", "count": 2},
+    ]
+    assert client.get(reverse("tag-list"), {"limit": 0}).status_code == 400
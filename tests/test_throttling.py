@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+import pytest
+from static.utils.throttling import (
+    CacheBucketStore,
+    FilterThrottle,
+    SQLiteBucketStore,
+    parse_rate,
+)
+
+
+@pytest.mark.django_db
+def test_login_is_throttled_before_authentication(client, settings):
+    settings.THROTTLING = {
+        **settings.THROTTLING,
+        "SCOPES": {"login": {"rate": "1/min", "burst": 2}},
+    }
+    credentials = {"username": "nobody", "password": "wrong"}
+    for _ in range(2):
+        response = client.post(reverse("login"), data=credentials)
+        assert response.status_code == 400
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(reverse("login"), data=credentials)
+    assert response.status_code == 429
+    assert 0 < int(response["Retry-After"]) <= 60
+    assert len(queries) == 0
+
+    # Buckets are per IP address
+    response = client.post(
+        reverse("login"), data=credentials, REMOTE_ADDR="10.0.0.2"
+    )
+    assert response.status_code == 400
+
+
+def test_sqlite_buckets_are_shared_and_refill(tmp_path, monkeypatch):
+    """Two stores on one file act like two workers of one machine."""
+    path = str(tmp_path / "throttle.sqlite3")
+    workers = [SQLiteBucketStore(path), SQLiteBucketStore(path)]
+    rate = parse_rate("60/min")
+    now = 1000.0
+    monkeypatch.setattr("static.utils.throttling.time", lambda: now)
+
+    results = [workers[i % 2].take("key", rate, 3)[0] for i in range(4)]
+    assert results == [True, True, True, False]
+    allowed, wait = workers[0].take("key", rate, 3)
+    assert not allowed and wait == pytest.approx(1)
+
+    now += 1
+    assert workers[1].take("key", rate, 3)[0]
+    assert not workers[0].take("key", rate, 3)[0]
+
+
+def test_failed_sqlite_takes_are_rolled_back(tmp_path, monkeypatch):
+    store = SQLiteBucketStore(str(tmp_path / "throttle.sqlite3"))
+    rate = parse_rate("60/min")
+
+    def fail():
+        raise RuntimeError("Pruning failed")
+
+    # Fails after the bucket is written
+    monkeypatch.setattr("static.utils.throttling.random.random", fail)
+    with pytest.raises(RuntimeError, match="Pruning failed"):
+        store.take("key", rate, 1)
+    monkeypatch.undo()
+    # The token wasn't taken, and the connection is usable
+    assert store.take("key", rate, 1)[0]
+    assert not store.take("key", rate, 1)[0]
+
+
+@pytest.mark.django_db
+def test_forwarded_addresses_are_not_trusted_beyond_the_proxy(
+    client, settings
+):
+    settings.THROTTLING = {
+        **settings.THROTTLING,
+        "SCOPES": {"login": {"rate": "1/min", "burst": 5}},
+    }
+    credentials = {"username": "nobody", "password": "wrong"}
+
+    def log_in(forwarded_for):
+        # The proxy appends the address it received the request from
+        return client.post(
+            reverse("login"),
+            data=credentials,
+            HTTP_X_FORWARDED_FOR=f"{forwarded_for}, 203.0.113.7",
+        ).status_code
+
+    statuses = [log_in(f"10.0.0.{i}") for i in range(10)]
+    assert statuses == [400] * 5 + [429] * 5
+
+
+def test_clearing_buckets_keeps_the_rest_of_the_cache():
+    cache.set("unrelated", "kept")
+    store = CacheBucketStore()
+    rate = parse_rate("1/min")
+    assert store.take("throttle:test", rate, 1)[0]
+    assert not store.take("throttle:test", rate, 1)[0]
+
+    store.clear()
+    assert store.take("throttle:test", rate, 1)[0]
+    assert cache.get("unrelated") == "kept"
+
+
+def test_filter_throttle_ignores_non_object_bodies():
+    request = Request(
+        APIRequestFactory().post("/posts/", [1, 2], format="json"),
+        parsers=[JSONParser()],
+    )
+    assert not FilterThrottle().applies(request)
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+import pytest
+from apps.posts.models import Like, Post
+from apps.posts.seeding import seed_data
+from apps.posts.trending import hot_score
+
+
+@pytest.mark.django_db
+def test_trending_sort_follows_activity(
+    client, django_capture_on_commit_callbacks
+):
+    """
+    The trending sort orders posts by their stored score, which favours
+    recent posts and is refreshed for posts with new activity.
+    """
+    users = seed_data({"posts": 20, "users": 10})["users"]
+    posts = list(Post.objects.all())
+    assert all(post.hot_score >= hot_score(post.created_at) for post in posts)
+
+    def trending():
+        response = client.post(
+            reverse("post-list"),
+            data={"action": "filter", "filters": {"sort_by": "trending"}},
+            content_type="application/json",
+        )
+        return [post["id"] for post in response.json()]
+
+    # Anonymous clients don't see age restricted posts
+    scores = {post.pk: post.hot_score for post in posts}
+    ranking = trending()
+    assert ranking
+    assert [scores[pk] for pk in ranking] == sorted(
+        [scores[pk] for pk in ranking], reverse=True
+    )
+
+    # An old post overtakes the others with enough new activity
+    old = Post.objects.get(pk=ranking[-1])
+    Post.objects.filter(pk=old.pk).update(
+        created_at=timezone.now() - timedelta(days=1)
+    )
+    Like.objects.filter(post=old).delete()
+    Like.objects.bulk_create([Like(post=old, user=user) for user in users])
+    call_command("update_hot_scores", minutes=5)
+    old.refresh_from_db()
+    assert old.hot_score >= hot_score(old.created_at, likes=len(users))
+
+    Post.objects.exclude(pk=old.pk).update(
+        created_at=timezone.now() - timedelta(days=3)
+    )
+    # The new scores drop cached trending results
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("update_hot_scores", all=True)
+    assert trending()[0] == old.pk
+
+
+@pytest.mark.django_db
+def test_trending_sort_scans_the_index():
+    plan = Post.objects.order_by("-hot_score")[:20].explain()
+    assert "hot_score" in plan and "SCAN posts_post USING INDEX" in plan
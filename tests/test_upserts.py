@@ -0,0 +1,63 @@
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+import pytest
+from apps.posts.models import Like, Post, Rating
+from apps.posts.seeding import seed_data
+from apps.users.models import Follow
+
+RATING = {"saves_money": 10, "saves_time": 20, "is_useful": 30}
+
+
+@pytest.fixture(name="writes")
+def writes_fixture():
+    author, viewer = seed_data({"posts": 1, "users": 2})["users"]
+    post = Post.objects.get()
+    if post.user != author:
+        author, viewer = viewer, author
+    token = RefreshToken.for_user(viewer).access_token
+    client = Client(headers={"Authorization": f"Bearer {token}"})
+
+    def write(name, pk, data=None):
+        return client.post(
+            reverse(name, args=[pk]),
+            data=data or {},
+            content_type="application/json",
+        )
+
+    Like.objects.all().delete()
+    Rating.objects.all().delete()
+    Follow.objects.all().delete()
+    return post, author, write
+
+
+@pytest.mark.django_db
+def test_likes_and_follows_are_written_once(writes):
+    post, author, write = writes
+    assert write("like-create", post.id).status_code == 201
+    assert write("like-create", post.id).status_code == 400
+    assert write("like-create", post.id + 1).status_code == 404
+    assert Like.objects.count() == 1
+
+    assert write("follow-create", author.id).status_code == 201
+    assert write("follow-create", author.id).status_code == 400
+    assert write("follow-create", author.id + 100).status_code == 404
+    assert Follow.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_ratings_are_created_then_updated(writes):
+    post, _, write = writes
+    assert write("rating-create", post.id, RATING).status_code == 201
+    response = write("rating-create", post.id, {**RATING, "is_useful": 90})
+    assert response.status_code == 200
+    assert response.json()["ratings"]["is_useful"] == 90
+    rating = Rating.objects.get()
+    assert rating.is_useful == 90
+    assert rating.updated_at > rating.created_at
+
+    assert write("rating-create", post.id + 1, RATING).status_code == 404
+    # Authors can't rate their own posts
+    post.user = rating.user
+    post.save()
+    assert write("rating-create", post.id, RATING).status_code == 403